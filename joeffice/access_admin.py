@@ -0,0 +1,713 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+출입/근태 관리 명령행 도구 (GUI 없이 실행).
+access_log 스키마(log_date 등)는 iot_project_access.py 가 한 번 실행되며 준비해 둔 상태를 전제로 한다.
+
+    python access_admin.py rebuild-daily                                   # daily_attendance 전체 재계산
+    python access_admin.py rebuild-daily --from 2025-01-01 --to 2025-01-31 # 기간만
+    python access_admin.py migrate-flags                                   # FIRST_IN/LAST_OUT 행 → IN/OUT
+    python access_admin.py import-users users.csv [--batch 1000] [--dry-run] [--rejects bad.csv]
+    python access_admin.py export --from 2025-01-01 --to 2025-01-31 -o jan.csv      # 일별 근무시간
+    python access_admin.py export --from 2025-01-01 --to 2025-12-31 -o y.parquet    # 컬럼형 (pyarrow 필요)
+    python access_admin.py export --from 2025-01-01 --to 2025-01-31 -o raw.csv --raw
+    python access_admin.py partition-init                  # access_log → 월별 RANGE 파티션 (1회, 테이블 재구성)
+    python access_admin.py partition-maintain --ahead 3    # 앞으로 3개월 파티션 미리 생성 (매월 cron)
+    python access_admin.py archive --keep-months 12        # 닫힌 오래된 달 → archive/*.csv.gz 후 파티션 제거
+    python access_admin.py archive-query --from 2023-01-01 --to 2023-03-31 [--uid a20df603] [-o out.csv]
+"""
+
+import argparse, csv, gzip, os, re, sys, time
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import mysql.connector
+
+from attendance_sql import ensure_daily_table, insert_daily_rows, update_day_owners
+
+# ================== DB 설정 ==================
+DB = dict(
+    host="database-1.c1kkeqig4j9x.ap-northeast-2.rds.amazonaws.com",
+    port=3306,
+    user="joeffice_user",
+    password="12345678",
+    database="joeffice",
+    autocommit=True,
+)
+
+
+KST = ZoneInfo("Asia/Seoul")
+
+
+def connect_db():
+    return mysql.connector.connect(connection_timeout=5, **DB)
+
+
+def parse_day(s: str) -> date:
+    try:
+        return datetime.strptime(s, "%Y-%m-%d").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"날짜는 YYYY-MM-DD 형식이어야 합니다: {s}")
+
+
+def month_ranges(d_from: date, d_to: date):
+    """[d_from, d_to] 를 월 단위 반열린 구간 [start, end) 로 자른다."""
+    start = d_from
+    while start <= d_to:
+        nxt = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+        yield start, min(nxt, d_to + timedelta(days=1))
+        start = nxt
+
+
+# ================== daily_attendance 재계산 ==================
+def rebuild_daily(db, d_from: date | None = None, d_to: date | None = None):
+    cur = db.cursor()
+    ensure_daily_table(cur)
+    if d_from is None or d_to is None:
+        cur.execute("SELECT MIN(log_date), MAX(log_date) FROM access_log")
+        lo, hi = cur.fetchone()
+        if lo is None:
+            print("[REBUILD] access_log 비어있음")
+            cur.close()
+            return
+        d_from = d_from or lo
+        d_to = d_to or hi
+
+    # 아카이브된 달은 원본이 DB 에 없다 → 요약을 지우면 다시 만들 수 없으므로 경계 이후만 재계산
+    cutoff = archived_before(cur)
+    if cutoff is not None and d_from < cutoff:
+        print(f"[REBUILD][WARN] {cutoff} 이전은 아카이브됨 → {d_from} 대신 {cutoff} 부터 재계산")
+        d_from = cutoff
+    if d_from > d_to:
+        print("[REBUILD] 재계산할 기간 없음 (전부 아카이브됨)")
+        cur.close()
+        return
+
+    t0 = time.perf_counter()
+    total = 0
+    # 월 단위 트랜잭션: 잠금 범위와 undo 크기를 작게 유지
+    for start, end in month_ranges(d_from, d_to):
+        db.start_transaction()
+        cur.execute("DELETE FROM daily_attendance WHERE date >= %s AND date < %s", (start, end))
+        n = insert_daily_rows(cur, start, end)
+        update_day_owners(cur, start, end)
+        db.commit()
+        total += n
+        print(f"[REBUILD] {start} ~ {end - timedelta(days=1)}: {n} rows")
+    cur.close()
+    print(f"[REBUILD] done: {total} rows in {time.perf_counter() - t0:.1f}s")
+
+
+# ================== FIRST_IN/LAST_OUT 행 마이그레이션 ==================
+MIGRATE_CHUNK = 5000
+
+
+def migrate_flags(db):
+    """
+    예전 방식으로 저장된 FIRST_IN/LAST_OUT 행을 IN/OUT 으로 바꾼다.
+    소유자는 이제 읽을 때 파생되므로 행 재기록은 이번이 마지막. 짧은 트랜잭션으로 잘라 잠금을 줄인다.
+    """
+    cur = db.cursor()
+    days = set()
+    for old, new in (("FIRST_IN", "IN"), ("LAST_OUT", "OUT")):
+        while True:
+            db.start_transaction()
+            cur.execute(
+                "SELECT id, log_date FROM access_log WHERE action=%s ORDER BY id LIMIT %s FOR UPDATE",
+                (old, MIGRATE_CHUNK)
+            )
+            rows = cur.fetchall()
+            if not rows:
+                db.commit()
+                break
+            ids = [r[0] for r in rows]
+            days.update(r[1] for r in rows)
+            ph = ",".join(["%s"] * len(ids))
+            cur.execute(f"UPDATE access_log SET action=%s WHERE id IN ({ph})", [new, *ids])
+            db.commit()
+            print(f"[MIGRATE] {old} -> {new}: {len(ids)} rows")
+    cur.close()
+
+    if days:
+        # 요약 테이블 소유자 플래그를 파생 규칙으로 다시 맞춤
+        rebuild_daily(db, min(days), max(days))
+    print(f"[MIGRATE] done ({len(days)} days touched)")
+
+
+# ================== users CSV 가져오기 ==================
+# 헤더: uid_hex(또는 uid), name, company, [class], [valid_until]  — register_user 가 쓰는 users.csv 와 같은 형식
+IMPORT_BATCH = 1000
+UID_RE = re.compile(r"^[0-9a-f]{8}$")
+USER_CLASSES = ("직원", "방문객")
+
+
+def parse_valid_until(s: str):
+    """'YYYY-MM-DD HH:MM:SS' / 'YYYY-MM-DD HH:MM' / 'YYYY-MM-DD'(그날 끝) → datetime, 빈 값은 None."""
+    s = (s or "").strip()
+    if not s:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.strptime(s, fmt)
+        except ValueError:
+            pass
+    return datetime.combine(datetime.strptime(s, "%Y-%m-%d").date(), datetime.max.time().replace(microsecond=0))
+
+
+def validate_user_row(row: dict):
+    """CSV 한 행 → (uid, name, company, class|None, valid_until|None). 잘못되면 ValueError."""
+    uid = (row.get("uid_hex") or row.get("uid") or "").strip().lower()
+    if not UID_RE.match(uid):
+        raise ValueError(f"uid 형식 오류: {uid!r} (8자리 hex)")
+    name = (row.get("name") or "").strip()
+    company = (row.get("company") or "").strip()
+    if not name or not company:
+        raise ValueError("name/company 비어 있음")
+    if len(name) > 100 or len(company) > 100:
+        raise ValueError("name/company 100자 초과")
+    klass = (row.get("class") or "").strip() or None
+    if klass is not None and klass not in USER_CLASSES:
+        raise ValueError(f"class 는 {'/'.join(USER_CLASSES)} 중 하나: {klass!r}")
+    try:
+        valid_until = parse_valid_until(row.get("valid_until"))
+    except ValueError:
+        raise ValueError(f"valid_until 형식 오류: {row.get('valid_until')!r}")
+    return uid, name, company, klass, valid_until
+
+
+def _upsert_users(db, cur, rows):
+    """
+    한 트랜잭션, 다중 행 INSERT ... ON DUPLICATE KEY UPDATE. class/valid_until 이 빈 칸이면 기존 값 유지.
+    기한이 미래로 바뀐(연장된) 방문객은 다시 active=1.
+    """
+    now = datetime.now(KST).replace(tzinfo=None)   # valid_until 은 KST 로 저장됨
+    with_class = [r for r in rows if r[3] is not None]
+    no_class = [(uid, name, company, vu) for uid, name, company, _, vu in rows if _ is None]
+    db.start_transaction()
+    if with_class:
+        values = ",".join(["(%s, %s, %s, %s, %s)"] * len(with_class))
+        cur.execute(
+            f"""
+            INSERT INTO users (uid, name, company, class, valid_until) VALUES {values}
+            ON DUPLICATE KEY UPDATE
+                name=VALUES(name), company=VALUES(company), class=VALUES(class),
+                valid_until=COALESCE(VALUES(valid_until), valid_until),
+                active=IF(valid_until IS NULL OR valid_until > %s, 1, active)
+            """,
+            [v for r in with_class for v in r] + [now]
+        )
+    if no_class:
+        # 새 행은 테이블 기본 class 를 따른다
+        values = ",".join(["(%s, %s, %s, %s)"] * len(no_class))
+        cur.execute(
+            f"""
+            INSERT INTO users (uid, name, company, valid_until) VALUES {values}
+            ON DUPLICATE KEY UPDATE
+                name=VALUES(name), company=VALUES(company),
+                valid_until=COALESCE(VALUES(valid_until), valid_until),
+                active=IF(valid_until IS NULL OR valid_until > %s, 1, active)
+            """,
+            [v for r in no_class for v in r] + [now]
+        )
+    db.commit()
+
+
+def import_users(db, path: str, batch: int = IMPORT_BATCH, dry_run: bool = False, rejects: str | None = None):
+    """
+    CSV 를 batch 행씩 읽어 검증 → users 에 upsert. 파일 크기와 상관없이 메모리는 batch 만큼만 쓴다.
+    같은 uid 가 파일에 여러 번 나오면 마지막 행이 이긴다.
+    """
+    t0 = time.perf_counter()
+    ok = bad = 0
+    cur = db.cursor() if not dry_run else None
+    rej_f = rej_w = None
+    try:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f)
+            if not reader.fieldnames or not ({"uid_hex", "uid"} & set(reader.fieldnames)):
+                raise SystemExit(f"[IMPORT] 헤더에 uid_hex(또는 uid) 컬럼이 없습니다: {reader.fieldnames}")
+            if rejects:
+                rej_f = open(rejects, "w", encoding="utf-8", newline="")
+                rej_w = csv.writer(rej_f)
+                rej_w.writerow(["line", "error", *reader.fieldnames])
+
+            buf = {}
+            for row in reader:
+                try:
+                    r = validate_user_row(row)
+                except ValueError as e:
+                    bad += 1
+                    if rej_w is not None:
+                        rej_w.writerow([reader.line_num, str(e), *[row.get(k, "") for k in reader.fieldnames]])
+                    elif bad <= 20:
+                        print(f"[IMPORT][SKIP] line {reader.line_num}: {e}")
+                    continue
+                buf[r[0]] = r
+                if len(buf) >= batch:
+                    if cur is not None:
+                        _upsert_users(db, cur, list(buf.values()))
+                    ok += len(buf)
+                    buf.clear()
+                    el = time.perf_counter() - t0
+                    print(f"  ... {ok:,} rows ({ok / el:,.0f} rows/s)")
+            if buf:
+                if cur is not None:
+                    _upsert_users(db, cur, list(buf.values()))
+                ok += len(buf)
+    finally:
+        if cur is not None:
+            cur.close()
+        if rej_f is not None:
+            rej_f.close()
+
+    el = time.perf_counter() - t0
+    print(f"[IMPORT] {'검증만(dry-run) ' if dry_run else ''}{ok:,} rows upserted, {bad:,} rejected "
+          f"in {el:.2f}s ({ok / el if el > 0 else 0:,.0f} rows/s)")
+    return ok, bad
+
+
+# ================== 근태 내보내기 (스트리밍) ==================
+EXPORT_CHUNK = 5000
+DAILY_FIELDS = ["date", "uid", "name", "company", "first_in", "last_out", "worked_sec", "events", "open_in"]
+RAW_FIELDS = ["id", "date", "uid", "name", "company", "ts", "action", "door_id"]
+
+
+def iter_access_rows(db, d_from: date, d_to: date, chunk: int = EXPORT_CHUNK):
+    """
+    (id, log_date, uid, name, company, ts, action, door_id) 를 (log_date, uid, ts) 순서로 흘려보낸다.
+    비버퍼 커서 + fetchmany 라 기간 길이와 상관없이 메모리는 chunk 행만큼만 쓴다.
+    idx_date_uid_ts 를 그대로 따라가므로 정렬(filesort) 없음.
+    """
+    cur = db.cursor(buffered=False)
+    try:
+        cur.execute(
+            """
+            SELECT al.id, al.log_date, al.uid,
+                   COALESCE(NULLIF(u.name,''), NULLIF(al.name,''), 'Unknown')       AS name,
+                   COALESCE(NULLIF(u.company,''), NULLIF(al.company,''), 'Unknown') AS company,
+                   al.ts, al.action, al.door_id
+              FROM access_log al
+              LEFT JOIN users u ON u.uid = al.uid
+             WHERE al.log_date BETWEEN %s AND %s
+             ORDER BY al.log_date, al.uid, al.ts, al.id
+            """,
+            (d_from, d_to)
+        )
+        while True:
+            rows = cur.fetchmany(chunk)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cur.close()
+
+
+def iter_daily_attendance(db, d_from: date, d_to: date, chunk: int = EXPORT_CHUNK):
+    """
+    (uid, 날짜) 마다 한 행: 첫 출근/마지막 퇴근/근무시간(초)/이벤트 수/퇴근 없이 끝났는지.
+    근무시간은 IN→OUT 짝의 합 (연속 IN 은 첫 IN, 짝 없는 OUT 은 무시).
+    입력이 (날짜, uid) 로 정렬돼 있으므로 한 사람-하루씩만 메모리에 둔다.
+    """
+    key = None
+    for _id, d, uid, name, company, ts, action, _door in iter_access_rows(db, d_from, d_to, chunk):
+        if (d, uid) != key:
+            if key is not None:
+                yield _daily_row(key, cur_name, cur_company, first_in, last_out, worked, n, open_in)
+            key = (d, uid)
+            cur_name, cur_company = name, company
+            first_in = last_out = open_in = None
+            worked = 0.0
+            n = 0
+        n += 1
+        if action in ("IN", "FIRST_IN"):
+            if first_in is None:
+                first_in = ts
+            if open_in is None:
+                open_in = ts
+        else:
+            last_out = ts
+            if open_in is not None:
+                worked += (ts - open_in).total_seconds()
+                open_in = None
+    if key is not None:
+        yield _daily_row(key, cur_name, cur_company, first_in, last_out, worked, n, open_in)
+
+
+def _daily_row(key, name, company, first_in, last_out, worked, n, open_in):
+    d, uid = key
+    return (d, uid, name, company, first_in, last_out, int(worked), n, int(open_in is not None))
+
+
+def _write_csv(path, fields, rows):
+    n = 0
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:   # 엑셀에서 한글이 깨지지 않도록 BOM
+        w = csv.writer(f)
+        w.writerow(fields)
+        for r in rows:
+            w.writerow(["" if v is None else v for v in r])
+            n += 1
+    return n
+
+
+def _parquet_schema(pa, fields):
+    types = {
+        "id": pa.int64(), "date": pa.date32(), "uid": pa.string(), "name": pa.string(), "company": pa.string(),
+        "ts": pa.timestamp("s"), "action": pa.string(), "door_id": pa.string(),
+        "first_in": pa.timestamp("s"), "last_out": pa.timestamp("s"),
+        "worked_sec": pa.int64(), "events": pa.int32(), "open_in": pa.int8(),
+    }
+    return pa.schema([(f, types[f]) for f in fields])
+
+
+def _write_parquet(path, fields, rows, chunk: int):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("[EXPORT] parquet 출력에는 pyarrow 가 필요합니다: pip install pyarrow")
+    schema = _parquet_schema(pa, fields)
+    n = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        buf = []
+        for r in rows:
+            buf.append(r)
+            if len(buf) >= chunk:
+                writer.write_table(pa.Table.from_pylist([dict(zip(fields, r)) for r in buf], schema=schema))   # row group 하나
+                n += len(buf)
+                buf = []
+        if buf:
+            writer.write_table(pa.Table.from_pylist([dict(zip(fields, r)) for r in buf], schema=schema))
+            n += len(buf)
+    return n
+
+
+def export_attendance(db, d_from: date, d_to: date, path: str, raw: bool = False,
+                      fmt: str | None = None, chunk: int = EXPORT_CHUNK) -> int:
+    """기간의 일별 근무(raw=True 면 원본 이벤트)를 CSV/Parquet 로. 쓴 행 수."""
+    fmt = fmt or ("parquet" if path.lower().endswith(".parquet") else "csv")
+    t0 = time.perf_counter()
+    if raw:
+        fields, rows = RAW_FIELDS, iter_access_rows(db, d_from, d_to, chunk)
+    else:
+        fields, rows = DAILY_FIELDS, iter_daily_attendance(db, d_from, d_to, chunk)
+    if fmt == "parquet":
+        n = _write_parquet(path, fields, rows, chunk)
+    else:
+        n = _write_csv(path, fields, rows)
+    el = time.perf_counter() - t0
+    print(f"[EXPORT] {d_from} ~ {d_to}: {n:,} rows -> {path} ({fmt}) in {el:.1f}s")
+    return n
+
+
+# ================== 월별 파티션 + 콜드 아카이브 ==================
+# access_log 는 log_date 기준 월별 RANGE COLUMNS 파티션(p202501 ...) + pmax.
+# 파티션 키는 모든 UNIQUE 키에 들어가야 하므로 PK=(id, log_date), uq_ev_id=(ev_id, log_date).
+# (같은 ev_id 는 항상 같은 ts → 같은 log_date 라 저널 재전송 중복 방지는 그대로)
+# 닫힌 달은 archive/access_log_YYYY-MM.csv.gz 로 옮기고 access_archive 에 기록한 뒤 파티션을 지운다.
+# daily_attendance(요약)는 남기므로 관리 화면의 과거 근태는 계속 보인다.
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive")
+ARCHIVE_FIELDS = ["id", "uid", "name", "company", "ts", "action", "ev_id", "door_id"]
+ARCHIVE_DELETE_CHUNK = 5000
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def add_months(d: date, n: int) -> date:
+    y, m = divmod(d.year * 12 + d.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def _pname(m: date) -> str:
+    return f"p{m:%Y%m}"
+
+
+def _pdef(m: date) -> str:
+    return f"PARTITION {_pname(m)} VALUES LESS THAN ('{add_months(m, 1).isoformat()}')"
+
+
+def list_partitions(cur):
+    """[(이름, 상한 'YYYY-MM-DD' | 'MAXVALUE')] — 파티션이 없으면 []."""
+    cur.execute(
+        """
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION
+          FROM INFORMATION_SCHEMA.PARTITIONS
+         WHERE TABLE_SCHEMA=%s AND TABLE_NAME='access_log' AND PARTITION_NAME IS NOT NULL
+         ORDER BY PARTITION_ORDINAL_POSITION
+        """,
+        (DB["database"],)
+    )
+    return [(n, (d or "").strip("'")) for n, d in cur.fetchall()]
+
+
+def ensure_archive_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS access_archive (
+            month CHAR(7) PRIMARY KEY,
+            path VARCHAR(255) NOT NULL,
+            row_count BIGINT NOT NULL,
+            archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+def archived_before(cur):
+    """이 날짜 이전의 access_log 원본은 아카이브되어 DB 에 없다 (아카이브한 적 없으면 None)."""
+    cur.execute("""
+        SELECT 1 FROM INFORMATION_SCHEMA.TABLES
+         WHERE TABLE_SCHEMA=%s AND TABLE_NAME='access_archive'
+    """, (DB["database"],))
+    if cur.fetchone() is None:
+        return None
+    cur.execute("SELECT MAX(month) FROM access_archive")
+    last = cur.fetchone()[0]
+    if not last:
+        return None
+    y, m = map(int, last.split("-"))
+    return add_months(date(y, m, 1), 1)
+
+
+def partition_init(db, ahead: int = 3):
+    cur = db.cursor()
+    if list_partitions(cur):
+        print("[PARTITION] 이미 파티션됨 → partition-maintain 을 쓰세요")
+        cur.close()
+        return
+    cur.execute("SELECT MIN(log_date) FROM access_log")
+    lo = cur.fetchone()[0] or date.today()
+    first, last = month_start(lo), add_months(month_start(date.today()), ahead)
+    months = []
+    m = first
+    while m <= last:
+        months.append(m)
+        m = add_months(m, 1)
+
+    t0 = time.perf_counter()
+    print("[PARTITION] 키 변경: PK(id, log_date), uq_ev_id(ev_id, log_date)")
+    cur.execute("""
+        ALTER TABLE access_log
+          DROP PRIMARY KEY, ADD PRIMARY KEY (id, log_date),
+          DROP INDEX uq_ev_id, ADD UNIQUE INDEX uq_ev_id (ev_id, log_date)
+    """)
+    print(f"[PARTITION] {len(months)}개 월 파티션 생성 ({first:%Y-%m} ~ {last:%Y-%m} + pmax), 테이블 재구성 중...")
+    cur.execute(
+        "ALTER TABLE access_log PARTITION BY RANGE COLUMNS(log_date) ("
+        + ", ".join(_pdef(m) for m in months)
+        + ", PARTITION pmax VALUES LESS THAN (MAXVALUE))"
+    )
+    cur.close()
+    print(f"[PARTITION] done in {time.perf_counter() - t0:.1f}s")
+
+
+def partition_maintain(db, ahead: int = 3):
+    """pmax 를 쪼개 앞으로 ahead 개월 파티션을 만든다. (pmax 가 비어 있으면 메타데이터 작업)"""
+    cur = db.cursor()
+    parts = list_partitions(cur)
+    if not parts:
+        print("[PARTITION] 파티션 안 됨 → partition-init 먼저")
+        cur.close()
+        return
+    bounded = [datetime.strptime(d, "%Y-%m-%d").date() for n, d in parts if d != "MAXVALUE"]
+    nxt = max(bounded) if bounded else month_start(date.today())   # 마지막 파티션 상한 = 다음 달 1일
+    last = add_months(month_start(date.today()), ahead)
+    months = []
+    while nxt <= last:
+        months.append(nxt)
+        nxt = add_months(nxt, 1)
+    if months:
+        cur.execute(
+            "ALTER TABLE access_log REORGANIZE PARTITION pmax INTO ("
+            + ", ".join(_pdef(m) for m in months)
+            + ", PARTITION pmax VALUES LESS THAN (MAXVALUE))"
+        )
+        print(f"[PARTITION] added {', '.join(_pname(m) for m in months)}")
+    else:
+        print("[PARTITION] 추가할 파티션 없음")
+    cur.close()
+
+
+def _write_archive_file(db, m: date, path: str) -> int:
+    """한 달 원본 이벤트를 gzip CSV 로 (비버퍼 커서, 임시 파일 → fsync → rename)."""
+    tmp = path + ".tmp"
+    n = 0
+    cur = db.cursor(buffered=False)
+    try:
+        cur.execute(
+            "SELECT id, uid, name, company, ts, action, ev_id, door_id FROM access_log "
+            "WHERE log_date >= %s AND log_date < %s ORDER BY log_date, uid, ts, id",
+            (m, add_months(m, 1))
+        )
+        with gzip.open(tmp, "wt", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(ARCHIVE_FIELDS)
+            while True:
+                rows = cur.fetchmany(EXPORT_CHUNK)
+                if not rows:
+                    break
+                for r in rows:
+                    w.writerow(["" if v is None else v for v in r])
+                n += len(rows)
+    finally:
+        cur.close()
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return n
+
+
+def _count_archive_file(path: str) -> int:
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        return sum(1 for _ in csv.reader(f)) - 1
+
+
+def archive_months(db, keep_months: int = 12, out_dir: str = ARCHIVE_DIR):
+    """
+    이번 달 기준 keep_months 개월보다 오래된 달을 파일로 옮기고 DB 에서 지운다.
+    파티션이면 DROP PARTITION (즉시), 아니면 log_date 범위로 잘라 DELETE.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    cur = db.cursor()
+    ensure_archive_table(cur)
+    cutoff = add_months(month_start(date.today()), -keep_months)
+    parts = dict(list_partitions(cur))
+    cur.execute("SELECT MIN(log_date) FROM access_log WHERE log_date < %s", (cutoff,))
+    lo = cur.fetchone()[0]
+    if lo is None:
+        print(f"[ARCHIVE] {cutoff:%Y-%m} 이전 데이터 없음")
+        cur.close()
+        return
+
+    m = month_start(lo)
+    while m < cutoff:
+        label = f"{m:%Y-%m}"
+        path = os.path.join(out_dir, f"access_log_{label}.csv.gz")
+        cur.execute("SELECT path, row_count FROM access_archive WHERE month=%s", (label,))
+        done = cur.fetchone()
+        if done is None:
+            t0 = time.perf_counter()
+            n = _write_archive_file(db, m, path)
+            if _count_archive_file(path) != n:
+                raise SystemExit(f"[ARCHIVE] {path} 검증 실패 (DB 는 그대로)")
+            cur.execute("INSERT INTO access_archive (month, path, row_count) VALUES (%s, %s, %s)",
+                        (label, path, n))
+            print(f"[ARCHIVE] {label}: {n:,} rows -> {path} ({time.perf_counter() - t0:.1f}s)")
+        # 파일/기록이 확정된 뒤에만 지운다 (중간에 끊겨도 다시 실행하면 여기서부터)
+        if _pname(m) in parts:
+            cur.execute(f"ALTER TABLE access_log DROP PARTITION {_pname(m)}")
+        else:
+            while True:
+                cur.execute(
+                    "DELETE FROM access_log WHERE log_date >= %s AND log_date < %s LIMIT %s",
+                    (m, add_months(m, 1), ARCHIVE_DELETE_CHUNK)
+                )
+                if cur.rowcount < ARCHIVE_DELETE_CHUNK:
+                    break
+        m = add_months(m, 1)
+    cur.close()
+
+
+def iter_archive_rows(db, d_from: date, d_to: date, uid: str | None = None):
+    """access_archive 에 기록된 달 파일만 열어 기간/uid 로 걸러 흘려보낸다. (DB 는 목록 조회만)"""
+    cur = db.cursor()
+    cur.execute(
+        "SELECT month, path FROM access_archive WHERE month BETWEEN %s AND %s ORDER BY month",
+        (f"{d_from:%Y-%m}", f"{d_to:%Y-%m}")
+    )
+    files = cur.fetchall()
+    cur.close()
+    lo, hi = d_from.isoformat(), (d_to + timedelta(days=1)).isoformat()
+    for month, path in files:
+        if not os.path.exists(path):
+            print(f"[ARCHIVE][WARN] {month}: 파일 없음 {path}", file=sys.stderr)
+            continue
+        with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+            r = csv.reader(f)
+            next(r, None)
+            for row in r:
+                if lo <= row[4] < hi and (uid is None or row[1] == uid):
+                    yield row
+
+
+def archive_query(db, d_from: date, d_to: date, uid: str | None = None, out: str | None = None):
+    f = open(out, "w", encoding="utf-8-sig", newline="") if out else sys.stdout
+    try:
+        w = csv.writer(f)
+        w.writerow(ARCHIVE_FIELDS)
+        n = 0
+        for row in iter_archive_rows(db, d_from, d_to, uid):
+            w.writerow(row)
+            n += 1
+    finally:
+        if out:
+            f.close()
+    print(f"[ARCHIVE] {n:,} rows", file=sys.stderr)
+
+
+# ================== 엔트리 ==================
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Joeffice 출입/근태 관리 도구")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("rebuild-daily", help="access_log 로 daily_attendance 재계산")
+    p.add_argument("--from", dest="d_from", type=parse_day, help="시작일 (YYYY-MM-DD)")
+    p.add_argument("--to", dest="d_to", type=parse_day, help="종료일 (YYYY-MM-DD, 포함)")
+
+    sub.add_parser("migrate-flags", help="FIRST_IN/LAST_OUT 행을 IN/OUT 으로 변환 (소유자는 읽을 때 파생)")
+
+    p = sub.add_parser("import-users", help="users CSV 를 스트리밍으로 검증 + upsert")
+    p.add_argument("csv_path", help="uid_hex,name,company[,class,valid_until] CSV")
+    p.add_argument("--batch", type=int, default=IMPORT_BATCH, help="트랜잭션당 행 수")
+    p.add_argument("--dry-run", action="store_true", help="DB 에 쓰지 않고 검증만")
+    p.add_argument("--rejects", help="거부된 행을 이 CSV 로 저장 (줄 번호/사유 포함)")
+
+    p = sub.add_parser("export", help="기간 근태를 CSV/Parquet 로 내보내기 (일정 메모리)")
+    p.add_argument("--from", dest="d_from", type=parse_day, required=True, help="시작일 (YYYY-MM-DD)")
+    p.add_argument("--to", dest="d_to", type=parse_day, required=True, help="종료일 (YYYY-MM-DD, 포함)")
+    p.add_argument("-o", "--out", required=True, help="출력 파일 (.csv / .parquet)")
+    p.add_argument("--format", choices=("csv", "parquet"), help="기본: 확장자로 판단")
+    p.add_argument("--raw", action="store_true", help="일별 요약 대신 원본 출입 이벤트")
+    p.add_argument("--chunk", type=int, default=EXPORT_CHUNK, help="한 번에 가져오는 행 수")
+
+    p = sub.add_parser("partition-init", help="access_log 를 월별 파티션 테이블로 변환 (1회)")
+    p.add_argument("--ahead", type=int, default=3, help="미리 만들 미래 개월 수")
+    p = sub.add_parser("partition-maintain", help="미래 월 파티션 추가")
+    p.add_argument("--ahead", type=int, default=3, help="미리 만들 미래 개월 수")
+    p = sub.add_parser("archive", help="오래된 달을 압축 파일로 옮기고 DB 에서 제거")
+    p.add_argument("--keep-months", type=int, default=12, help="DB 에 남길 개월 수 (이번 달 포함 이전)")
+    p.add_argument("--dir", default=ARCHIVE_DIR, help="아카이브 디렉터리")
+    p = sub.add_parser("archive-query", help="아카이브 파일에서 기간 이벤트 조회")
+    p.add_argument("--from", dest="d_from", type=parse_day, required=True)
+    p.add_argument("--to", dest="d_to", type=parse_day, required=True)
+    p.add_argument("--uid", type=str.lower)
+    p.add_argument("-o", "--out", help="CSV 파일 (기본: 표준출력)")
+
+    args = ap.parse_args(argv)
+    if args.cmd == "import-users" and args.dry_run:
+        import_users(None, args.csv_path, args.batch, dry_run=True, rejects=args.rejects)
+        return 0
+    db = connect_db()
+    try:
+        if args.cmd == "rebuild-daily":
+            rebuild_daily(db, args.d_from, args.d_to)
+        elif args.cmd == "migrate-flags":
+            migrate_flags(db)
+        elif args.cmd == "import-users":
+            import_users(db, args.csv_path, args.batch, rejects=args.rejects)
+        elif args.cmd == "export":
+            export_attendance(db, args.d_from, args.d_to, args.out, raw=args.raw, fmt=args.format, chunk=args.chunk)
+        elif args.cmd == "partition-init":
+            partition_init(db, args.ahead)
+        elif args.cmd == "partition-maintain":
+            partition_maintain(db, args.ahead)
+        elif args.cmd == "archive":
+            archive_months(db, args.keep_months, args.dir)
+        elif args.cmd == "archive-query":
+            archive_query(db, args.d_from, args.d_to, args.uid, args.out)
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
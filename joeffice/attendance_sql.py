@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+daily_attendance(일별 근태 요약) 계산 SQL — 출입 화면(iot_project_access.py)과 관리 도구(access_admin.py)가 같이 쓴다.
+첫 출근/마지막 퇴근 소유 규칙은 여기 한 곳에만 둔다. (Qt 를 import 하지 않는다)
+"""
+
+from datetime import datetime, timedelta
+
+# ================== 날짜별 첫 출근/마지막 퇴근 소유자 ==================
+# access_log 에는 IN/OUT 만 저장한다. 날짜별 첫 출근/마지막 퇴근 소유자는 읽을 때 윈도 함수로 파생:
+#  - first_uid: 그날 가장 이른 IN 의 uid
+#  - last_uid : 그날 가장 늦은 OUT 의 uid (단, 그날 마지막 동작이 IN 인 사람이 없을 때만)
+# (예전 FIRST_IN/LAST_OUT 행도 IN/OUT 으로 취급 → 마이그레이션 전 데이터도 그대로 읽힌다)
+# 파라미터: [log_date 시작, log_date 끝) 반열린 구간
+DAY_OWNERS_SQL = """
+    SELECT log_date,
+           MAX(CASE WHEN canon='IN' AND rn_first=1 THEN uid END) AS first_uid,
+           CASE WHEN SUM(canon='IN' AND rn_uid=1) = 0
+                THEN MAX(CASE WHEN canon='OUT' AND rn_last=1 THEN uid END)
+           END AS last_uid
+      FROM (
+            SELECT log_date, uid, canon,
+                   ROW_NUMBER() OVER (PARTITION BY log_date, canon ORDER BY ts ASC,  id ASC)  AS rn_first,
+                   ROW_NUMBER() OVER (PARTITION BY log_date, canon ORDER BY ts DESC, id DESC) AS rn_last,
+                   ROW_NUMBER() OVER (PARTITION BY log_date, uid   ORDER BY ts DESC, id DESC) AS rn_uid
+              FROM (SELECT log_date, uid, ts, id,
+                           IF(action IN ('IN','FIRST_IN'), 'IN', 'OUT') AS canon
+                      FROM access_log
+                     WHERE log_date >= %s AND log_date < %s) a
+           ) w
+     GROUP BY log_date
+"""
+
+
+def next_day(day: str) -> str:
+    return (datetime.strptime(day, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def ensure_daily_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS daily_attendance (
+            uid VARCHAR(16) NOT NULL,
+            date DATE NOT NULL,
+            first_in DATETIME NULL,
+            last_out DATETIME NULL,
+            first_owner TINYINT(1) NOT NULL DEFAULT 0,
+            last_owner TINYINT(1) NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, uid)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+# ================== 요약 행 계산 ==================
+def insert_daily_rows(cur, d_from=None, d_to=None, uids=None) -> int:
+    """
+    access_log 에서 (uid, 날짜)별 첫 IN / 마지막 OUT 을 계산해 daily_attendance 에 넣는다. 넣은 행 수.
+    범위: [d_from, d_to) 날짜, uids 가 있으면 그 uid 만 (없으면 전체). 대상 행은 미리 지워 둬야 한다.
+    소유자 플래그는 0 으로 넣으므로 이어서 update_day_owners / refresh_daily_owners 를 불러야 한다.
+    """
+    where, params = [], []
+    if d_from is not None:
+        where.append("log_date >= %s")
+        params.append(d_from)
+    if d_to is not None:
+        where.append("log_date < %s")
+        params.append(d_to)
+    if uids:
+        uids = list(uids)
+        where.append(f"uid IN ({','.join(['%s'] * len(uids))})")
+        params += uids
+    cur.execute(
+        f"""
+        INSERT INTO daily_attendance (uid, date, first_in, last_out, first_owner, last_owner)
+        SELECT uid, log_date,
+               MIN(CASE WHEN action IN ('IN','FIRST_IN')  THEN ts END),
+               MAX(CASE WHEN action IN ('OUT','LAST_OUT') THEN ts END),
+               0, 0
+          FROM access_log
+         {"WHERE " + " AND ".join(where) if where else ""}
+         GROUP BY uid, log_date
+        """,
+        params
+    )
+    return cur.rowcount
+
+
+def update_day_owners(cur, d_from, d_to):
+    """[d_from, d_to) 모든 날짜의 first_owner/last_owner 를 한 번에 다시 매긴다 (재계산/최초 채움용)."""
+    cur.execute(
+        f"""
+        UPDATE daily_attendance d
+          JOIN ({DAY_OWNERS_SQL}) o ON o.log_date = d.date
+           SET d.first_owner = (d.uid <=> o.first_uid), d.last_owner = (d.uid <=> o.last_uid)
+        """,
+        (d_from, d_to)
+    )
+
+
+def refresh_daily_attendance(cur, day: str, uids):
+    """(day, uid) 요약 행을 그날의 access_log 에서 다시 계산한다. 기록이 없어진 uid 는 행이 지워진다.
+    소유자 플래그는 0 으로 넣으므로 이어서 refresh_daily_owners(day) 를 불러야 한다."""
+    uids = list(uids)
+    if not uids:
+        return
+    ph = ",".join(["%s"] * len(uids))
+    cur.execute(f"DELETE FROM daily_attendance WHERE date=%s AND uid IN ({ph})", [day, *uids])
+    insert_daily_rows(cur, day, next_day(day), uids)
+
+
+def day_owners(cur, day: str):
+    """(first_uid, last_uid) — access_log 를 다시 쓰지 않고 윈도 함수로 계산."""
+    cur.execute(DAY_OWNERS_SQL, (day, next_day(day)))
+    rows = cur.fetchall()
+    return (rows[0][1], rows[0][2]) if rows else (None, None)
+
+
+def refresh_daily_owners(cur, day: str):
+    """그날 daily_attendance 의 first_owner/last_owner 중 바뀐 행만 고친다."""
+    first_uid, last_uid = day_owners(cur, day)
+    cur.execute(
+        """
+        UPDATE daily_attendance
+           SET first_owner = (uid <=> %s), last_owner = (uid <=> %s)
+         WHERE date = %s
+           AND (first_owner <> (uid <=> %s) OR last_owner <> (uid <=> %s))
+        """,
+        (first_uid, last_uid, day, first_uid, last_uid)
+    )
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+access_log '하루' 조회 벤치마크.
+
+합성 access_log(access_log_bench)를 수백만 행 채운 뒤, 기존 DATE(ts)=%s 쿼리와
+log_date 생성 컬럼 / 반열린 ts 범위 쿼리를 EXPLAIN + 실행시간으로 비교한다.
+테이블을 지우고 새로 만들기 때문에 로컬 MySQL 의 별도 스키마(기본 joeffice_bench)에서만 돈다.
+
+    python bench_access_log.py --rows 3000000            # 생성 + 측정
+    python bench_access_log.py --reuse                   # 이미 만든 테이블로 측정만
+    python bench_access_log.py --rows 3000000 --drop     # 측정 후 테이블 삭제
+"""
+
+import argparse, random, statistics, time
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+import access_admin
+
+# ================== DB 설정 (로컬 전용) ==================
+BENCH_DB = dict(
+    host="127.0.0.1",
+    port=3306,
+    user="root",
+    password="",
+    database="joeffice_bench",
+    autocommit=True,
+)
+
+TABLE = "access_log_bench"
+CHUNK = 5000
+
+
+def connect_db(cfg):
+    server = {k: v for k, v in cfg.items() if k != "database"}
+    conn = mysql.connector.connect(connection_timeout=5, **server)
+    cur = conn.cursor()
+    cur.execute(f"CREATE DATABASE IF NOT EXISTS `{cfg['database']}` DEFAULT CHARSET utf8mb4")
+    cur.close()
+    conn.close()
+    return mysql.connector.connect(connection_timeout=5, **cfg)
+
+
+def create_table(cur):
+    cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cur.execute(f"""
+        CREATE TABLE {TABLE} (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            uid VARCHAR(16) NOT NULL,
+            name VARCHAR(100),
+            company VARCHAR(100),
+            ts DATETIME NOT NULL,
+            action ENUM('IN','OUT','FIRST_IN','LAST_OUT') NOT NULL,
+            ev_id CHAR(32) NULL,
+            log_date DATE AS (DATE(ts)) STORED,
+            INDEX idx_uid_date (uid, ts),
+            INDEX idx_date_uid_ts (log_date, uid, ts),
+            INDEX idx_date_action (log_date, action, ts),
+            UNIQUE INDEX uq_ev_id (ev_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+def synthetic_rows(n_rows: int, n_users: int, end_day):
+    """하루에 출근자마다 IN/OUT 쌍을 만들며 과거로 거슬러 올라간다. (날짜 오름차순 아님)"""
+    uids = [f"{random.getrandbits(32):08x}" for _ in range(n_users)]
+    made = 0
+    day = end_day
+    while made < n_rows:
+        base = datetime.combine(day, datetime.min.time())
+        for uid in random.sample(uids, k=max(1, int(n_users * 0.8))):
+            t_in = base + timedelta(hours=8, seconds=random.randint(0, 3 * 3600))
+            t_out = t_in + timedelta(hours=8, seconds=random.randint(0, 2 * 3600))
+            yield (uid, "bench", "bench", t_in, "IN")
+            yield (uid, "bench", "bench", t_out, "OUT")
+            made += 2
+            if made >= n_rows:
+                return
+        day -= timedelta(days=1)
+
+
+def populate(db, n_rows: int, n_users: int, end_day):
+    cur = db.cursor()
+    create_table(cur)
+    t0 = time.perf_counter()
+    buf = []
+    done = 0
+    for row in synthetic_rows(n_rows, n_users, end_day):
+        buf.append(row)
+        if len(buf) >= CHUNK:
+            _insert_chunk(db, cur, buf)
+            done += len(buf)
+            buf.clear()
+            if done % (CHUNK * 40) == 0:
+                print(f"  ... {done:,} rows ({done / (time.perf_counter() - t0):,.0f} rows/s)")
+    if buf:
+        _insert_chunk(db, cur, buf)
+        done += len(buf)
+    cur.execute(f"ANALYZE TABLE {TABLE}")
+    cur.fetchall()
+    cur.close()
+    print(f"[BENCH] {done:,} rows in {time.perf_counter() - t0:.1f}s")
+
+
+def _insert_chunk(db, cur, rows):
+    values = ",".join(["(%s, %s, %s, %s, %s)"] * len(rows))
+    db.start_transaction()
+    cur.execute(
+        f"INSERT INTO {TABLE} (uid, name, company, ts, action) VALUES {values}",
+        [v for r in rows for v in r]
+    )
+    db.commit()
+
+
+def pick_probe(cur):
+    """측정 대상: 가장 최근 날짜와 그날 출근한 uid 하나."""
+    cur.execute(f"SELECT log_date, uid FROM {TABLE} ORDER BY log_date DESC, uid LIMIT 1")
+    d, uid = cur.fetchone()
+    return d.isoformat(), uid
+
+
+def query_pairs(day: str, uid: str):
+    nxt = (datetime.strptime(day, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+    present_old = f"""
+        SELECT COUNT(*) FROM (
+            SELECT al.uid FROM {TABLE} al
+            JOIN (SELECT uid, MAX(ts) AS max_ts FROM {TABLE} WHERE DATE(ts)=%s GROUP BY uid) m
+              ON m.uid=al.uid AND m.max_ts=al.ts
+            WHERE DATE(al.ts)=%s AND al.action IN ('IN','FIRST_IN')
+            GROUP BY al.uid
+        ) AS present
+    """
+    present_new = present_old.replace("DATE(ts)=%s", "log_date=%s").replace("DATE(al.ts)=%s", "al.log_date=%s")
+    return [
+        ("next action (uid, day)",
+         (f"SELECT action FROM {TABLE} WHERE uid=%s AND DATE(ts)=%s ORDER BY id DESC LIMIT 1", (uid, day)),
+         (f"SELECT action FROM {TABLE} WHERE log_date=%s AND uid=%s ORDER BY ts DESC LIMIT 1", (day, uid))),
+        ("next action (uid, ts range)",
+         (f"SELECT action FROM {TABLE} WHERE uid=%s AND DATE(ts)=%s ORDER BY id DESC LIMIT 1", (uid, day)),
+         (f"SELECT action FROM {TABLE} WHERE uid=%s AND ts >= %s AND ts < %s ORDER BY ts DESC LIMIT 1",
+          (uid, day, nxt))),
+        ("present count",
+         (present_old, (day, day)),
+         (present_new, (day, day))),
+        ("today attendees",
+         (f"SELECT uid, MIN(ts) FROM {TABLE} WHERE DATE(ts)=%s AND action IN ('IN','FIRST_IN') GROUP BY uid", (day,)),
+         (f"SELECT uid, MIN(ts) FROM {TABLE} WHERE log_date=%s AND action IN ('IN','FIRST_IN') GROUP BY uid", (day,))),
+        ("first IN of day",
+         (f"SELECT id FROM {TABLE} WHERE DATE(ts)=%s AND action IN ('IN','FIRST_IN') ORDER BY ts ASC LIMIT 1", (day,)),
+         (f"SELECT id FROM {TABLE} WHERE log_date=%s AND action IN ('IN','FIRST_IN') ORDER BY ts ASC LIMIT 1", (day,))),
+        ("delete (uid, day)",
+         (f"SELECT id FROM {TABLE} WHERE uid=%s AND DATE(ts)=%s", (uid, day)),
+         (f"SELECT id FROM {TABLE} WHERE log_date=%s AND uid=%s", (day, uid))),
+    ]
+
+
+def explain(cur, sql, params):
+    cur.execute("EXPLAIN " + sql, params)
+    cols = [c[0] for c in cur.description]
+    out = []
+    for row in cur.fetchall():
+        r = dict(zip(cols, row))
+        out.append(f"{r.get('table')}:{r.get('type')} key={r.get('key')} rows={r.get('rows')} {r.get('Extra') or ''}".strip())
+    return out
+
+
+def timed(cur, sql, params, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        cur.execute(sql, params)
+        cur.fetchall()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples)
+
+
+def run_bench(db, repeat: int):
+    cur = db.cursor()
+    cur.execute(f"SELECT COUNT(*) FROM {TABLE}")
+    total = cur.fetchone()[0]
+    day, uid = pick_probe(cur)
+    print(f"[BENCH] {TABLE}: {total:,} rows, probe day={day} uid={uid}, median of {repeat}\n")
+
+    for title, (old_sql, old_p), (new_sql, new_p) in query_pairs(day, uid):
+        old_ms = timed(cur, old_sql, old_p, repeat)
+        new_ms = timed(cur, new_sql, new_p, repeat)
+        speedup = old_ms / new_ms if new_ms > 0 else float("inf")
+        print(f"== {title}: DATE(ts) {old_ms:8.2f} ms -> {new_ms:8.2f} ms  (x{speedup:,.1f})")
+        for line in explain(cur, old_sql, old_p):
+            print(f"   old  {line}")
+        for line in explain(cur, new_sql, new_p):
+            print(f"   new  {line}")
+        print()
+    cur.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="access_log DATE(ts) vs log_date 벤치마크")
+    ap.add_argument("--rows", type=int, default=3_000_000, help="합성 행 수")
+    ap.add_argument("--users", type=int, default=400, help="합성 uid 수")
+    ap.add_argument("--repeat", type=int, default=20, help="쿼리별 반복 횟수")
+    ap.add_argument("--reuse", action="store_true", help="기존 access_log_bench 재사용")
+    ap.add_argument("--drop", action="store_true", help="측정 후 테이블 삭제")
+    ap.add_argument("--host", default=BENCH_DB["host"])
+    ap.add_argument("--port", type=int, default=BENCH_DB["port"])
+    ap.add_argument("--user", default=BENCH_DB["user"])
+    ap.add_argument("--password", default=BENCH_DB["password"])
+    ap.add_argument("--database", default=BENCH_DB["database"], help="벤치 전용 스키마 (없으면 만든다)")
+    args = ap.parse_args()
+    if args.host == access_admin.DB["host"]:
+        ap.error("운영 DB 서버에서는 돌릴 수 없습니다 (--host 확인)")
+
+    random.seed(1234)
+    db = connect_db(dict(BENCH_DB, host=args.host, port=args.port, user=args.user,
+                         password=args.password, database=args.database))
+    try:
+        if not args.reuse:
+            populate(db, args.rows, args.users, datetime.now().date())
+        run_bench(db, args.repeat)
+        if args.drop:
+            cur = db.cursor()
+            cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            cur.close()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+번호판 OCR 엔진별 크롭당 지연 벤치마크.
+
+같은 번호판 크롭 세트를 plate_ocr 의 각 엔진(tesserocr / paddle / pytesseract)으로 읽어
+엔진 로딩 시간, 크롭당 지연(p50/p99/평균), 정답률을 비교한다.
+정답은 파일 이름에서 읽는다: 12가3456.jpg, 12가3456_2.png 처럼 번호판이 들어 있으면 정답으로 쓴다.
+
+    python bench_plate_ocr.py --plates plates/
+    python bench_plate_ocr.py --plates plates/ --backends tesserocr,pytesseract --repeat 5
+"""
+
+import argparse, os, statistics, sys, time
+
+import cv2
+import numpy as np
+
+import plate_ocr
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def load_plates(path: str):
+    """[(이름, BGR 크롭, 정답|None)] — 한글 경로도 열리도록 imdecode 사용."""
+    out = []
+    for fn in sorted(os.listdir(path)):
+        if not fn.lower().endswith(IMAGE_EXTS):
+            continue
+        img = cv2.imdecode(np.fromfile(os.path.join(path, fn), dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            print(f"[WARN] 읽기 실패: {fn}", file=sys.stderr)
+            continue
+        out.append((fn, img, plate_ocr.validate_plate(os.path.splitext(fn)[0])))
+    return out
+
+
+def pct(samples, p: float) -> float:
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(round(p / 100.0 * (len(s) - 1))))]
+
+
+def bench_backend(name: str, plates, repeat: int):
+    t0 = time.perf_counter()
+    try:
+        backend = plate_ocr.make_backend(name, fallback=False)
+    except Exception as e:
+        print(f"== {name}: 사용 불가 ({e})")
+        return
+    load_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    plate_ocr.ocr_plate(plates[0][1], backend)   # 첫 호출(지연 초기화/캐시)은 따로
+    first_ms = (time.perf_counter() - t0) * 1000.0
+
+    samples, correct, labeled, read = [], 0, 0, 0
+    for _ in range(repeat):
+        for fn, img, truth in plates:
+            t0 = time.perf_counter()
+            got = plate_ocr.ocr_plate(img, backend)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+            read += bool(got)
+            if truth:
+                labeled += 1
+                correct += (got == truth)
+    backend.close()
+
+    acc = f", exact {correct / labeled:6.1%}" if labeled else ""
+    print(f"== {name:12s} load {load_s:6.2f}s  first {first_ms:8.1f} ms  "
+          f"p50 {pct(samples, 50):7.1f} ms  p99 {pct(samples, 99):7.1f} ms  mean {statistics.fmean(samples):7.1f} ms  "
+          f"({1000.0 / statistics.fmean(samples):5.1f} crops/s){acc}, valid {read / len(samples):6.1%}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="번호판 OCR 엔진별 크롭당 지연 비교")
+    ap.add_argument("--plates", required=True, help="번호판 크롭 이미지 폴더 (파일명에 정답 번호판)")
+    ap.add_argument("--backends", default=",".join(plate_ocr.OCR_BACKENDS), help="쉼표로 구분")
+    ap.add_argument("--repeat", type=int, default=3, help="세트 반복 횟수")
+    args = ap.parse_args()
+
+    plates = load_plates(args.plates)
+    if not plates:
+        ap.error(f"{args.plates} 에 이미지가 없습니다")
+    labeled = sum(1 for _, _, t in plates if t)
+    print(f"[BENCH] {len(plates)} crops ({labeled} labeled) x {args.repeat}\n")
+    for name in args.backends.split(","):
+        bench_backend(name.strip(), plates, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
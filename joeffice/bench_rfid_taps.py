@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RFID 태깅 부하 발생기 + 태깅 지연 벤치마크 (헤드리스).
+
+출입문마다 pty 로 가짜 RFID 리더를 만들어 "UID xxxxxxxx" 줄을 일정 속도(포아송) + 버스트로 보내고,
+출입 화면(MyDialog)을 화면 없이(offscreen) 띄워 실제 태깅 처리 경로를 그대로 태운다.
+    RfidIngest(시리얼 수신/중복 제거) → record_event(판정·저널) → AccessLogWriter(DB 반영)
+
+측정:
+  - 판정 지연: 리더가 줄을 쓴 시각 → record_event 종료 (문 앞에서 IN/OUT 이 정해지기까지)
+  - 반영 지연: 리더가 줄을 쓴 시각 → 저널 ack (access_log + daily_attendance 커밋까지)
+  - 처리량, 태깅당 DB 문장 수 (GUI 연결 / 쓰기 스레드 연결)
+
+운영 DB 를 건드리지 않도록 로컬 MySQL 의 별도 스키마(기본 joeffice_bench)에서만 돈다.
+시리얼 감시(포트 식별)와 HVAC 명령 경로는 막아 둔다 — 실제 HVAC 보드가 꽂힌 PC 에서 돌려도 보드를 열거나 HE 를 보내지 않는다.
+(access_log 쓰기 경로가 ON DUPLICATE KEY / 윈도 함수 / 생성 컬럼을 쓰므로 SQLite 로는 대신할 수 없다)
+
+    python bench_rfid_taps.py --rate 20 --duration 30
+    python bench_rfid_taps.py --doors 3 --rate 5 --burst 50 --burst-every 5
+    python bench_rfid_taps.py --uids 40 --rate 10          # 같은 카드 반복 → 중복 제거/쿨다운 확인
+    python bench_rfid_taps.py --rate 50 --drop             # 측정 후 스키마 삭제
+"""
+
+import argparse, contextlib, os, random, statistics, sys, tempfile, threading, time, tty
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.chdir(os.path.dirname(os.path.abspath(__file__)))   # .ui 를 import 시점에 상대 경로로 읽는다
+
+import mysql.connector
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QApplication
+
+import iot_project_access as access
+
+# ================== DB 설정 (로컬 전용) ==================
+BENCH_DB = dict(
+    host="127.0.0.1",
+    port=3306,
+    user="root",
+    password="",
+    database="joeffice_bench",
+    autocommit=True,
+)
+
+DRAIN_TIMEOUT_SECS = 30.0   # 부하 종료 후 쓰기 스레드가 저널을 비우길 기다리는 상한
+
+
+# ==========================
+#  DB 문장 수 세기 (연결 래퍼)
+# ==========================
+class CountingCursor:
+    def __init__(self, cur, counts, label):
+        self._cur = cur
+        self._counts = counts
+        self._label = label
+
+    def execute(self, *a, **k):
+        self._counts.add(self._label)
+        return self._cur.execute(*a, **k)
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+class CountingConnection:
+    """execute + 트랜잭션 제어(start/commit/rollback)를 연결 라벨별로 센다. 나머지는 그대로 위임."""
+
+    def __init__(self, conn, counts, label):
+        self._conn = conn
+        self._counts = counts
+        self._label = label
+
+    def cursor(self, *a, **k):
+        return CountingCursor(self._conn.cursor(*a, **k), self._counts, self._label)
+
+    def start_transaction(self, *a, **k):
+        self._counts.add(self._label)
+        return self._conn.start_transaction(*a, **k)
+
+    def commit(self):
+        self._counts.add(self._label)
+        return self._conn.commit()
+
+    def rollback(self):
+        self._counts.add(self._label)
+        return self._conn.rollback()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class StatementCounts:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.by_label = {}
+
+    def add(self, label):
+        with self._lock:
+            self.by_label[label] = self.by_label.get(label, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self.by_label.clear()
+
+
+# ==========================
+#  시리얼 감시 / HVAC 명령 차단
+# ==========================
+class NoSerialSupervisor(QObject):
+    """SerialSupervisor 자리: 포트를 열거나 식별하지 않는다 (보드 리셋/HR 없음). HVAC 는 끝까지 미연결."""
+    hvac_attached = pyqtSignal(object)
+    hvac_detached = pyqtSignal(str)
+    port_identified = pyqtSignal(str, str)
+
+    def __init__(self, rfid=None, baudrate=9600, parent=None):
+        super().__init__(parent)
+
+    def start(self):
+        pass
+
+    def rescan(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def wait(self, *a):
+        return True
+
+
+class NoSendHvacCommander(access.HvacCommander):
+    """HvacCommander 자리: 인원 기반 판단(요청 수 집계)은 그대로, 보드로는 아무것도 보내지 않는다."""
+
+    def __init__(self, send_line, is_connected, parent=None):
+        super().__init__(lambda text, quiet=False: False, lambda: False, parent)
+
+
+# ==========================
+#  가짜 RFID 리더 (pty)
+# ==========================
+class FakeReader(threading.Thread):
+    """
+    pty 하나 = 출입문 하나. 슬레이브 경로를 RFID_DOORS 에 넣으면 앱은 진짜 리더처럼 연다.
+    rate(초당 태깅, 포아송 도착) + burst_every 초마다 burst 개를 연달아 보낸다.
+    """
+
+    def __init__(self, door_id, rate, burst, burst_every, duration, uid_pool, on_sent):
+        super().__init__(daemon=True)
+        self.door_id = door_id
+        self.rate = rate
+        self.burst = burst
+        self.burst_every = burst_every
+        self.duration = duration
+        self.uid_pool = uid_pool
+        self.on_sent = on_sent
+        self.master, self._slave = os.openpty()   # 슬레이브를 열어 둬야 마스터 쓰기가 EIO 로 안 끊긴다
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self.sent = 0
+
+    def _uid(self) -> str:
+        if self.uid_pool:
+            return random.choice(self.uid_pool)
+        return f"{random.getrandbits(32):08x}"
+
+    def _tap(self):
+        uid = self._uid()
+        self.on_sent(uid, time.monotonic())
+        os.write(self.master, f"UID {uid}\r\n".encode())
+        self.sent += 1
+
+    def run(self):
+        t0 = time.monotonic()
+        t_end = t0 + self.duration
+        next_burst = t0 + self.burst_every if self.burst else float("inf")
+        next_tap = t0 + (random.expovariate(self.rate) if self.rate > 0 else float("inf"))
+        while True:
+            now = time.monotonic()
+            if now >= t_end:
+                break
+            if now >= next_burst:
+                for _ in range(self.burst):
+                    self._tap()
+                next_burst += self.burst_every
+            if now >= next_tap:
+                self._tap()
+                next_tap += random.expovariate(self.rate)
+            time.sleep(max(0.0, min(next_tap, next_burst, t_end) - time.monotonic()))
+
+    def close(self):
+        for fd in (self.master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+# ==========================
+#  지연 기록
+# ==========================
+class TapStats:
+    """uid 의 최근 송신 시각으로 판정/반영 지연을 잰다. (같은 카드가 겹치면 가장 최근 송신 기준)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sent_at = {}     # uid -> monotonic
+        self._ev_sent = {}     # ev_id -> monotonic (저널에 들어간 이벤트)
+        self.sent = 0
+        self.decide_ms = []
+        self.commit_ms = []
+
+    def on_sent(self, uid, t):
+        with self._lock:
+            self._sent_at[uid] = t
+            self.sent += 1
+
+    def on_journal(self, ev):
+        with self._lock:
+            t = self._sent_at.get(ev["uid"])
+            if t is not None:
+                self._ev_sent[ev["ev_id"]] = t
+
+    def on_decided(self, uid):
+        now = time.monotonic()
+        with self._lock:
+            t = self._sent_at.pop(uid, None)
+            if t is not None:
+                self.decide_ms.append((now - t) * 1000.0)
+
+    def on_ack(self, ev_ids):
+        now = time.monotonic()
+        with self._lock:
+            for ev_id in ev_ids:
+                t = self._ev_sent.pop(ev_id, None)
+                if t is not None:
+                    self.commit_ms.append((now - t) * 1000.0)
+
+    def outstanding(self) -> int:
+        with self._lock:
+            return len(self._ev_sent)
+
+
+def pct(samples, p: float) -> float:
+    if not samples:
+        return float("nan")
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(round(p / 100.0 * (len(s) - 1))))]
+
+
+# ==========================
+#  하네스
+# ==========================
+def prepare_schema(cfg, drop_first: bool):
+    server = {k: v for k, v in cfg.items() if k != "database"}
+    conn = mysql.connector.connect(connection_timeout=5, **server)
+    cur = conn.cursor()
+    if drop_first:
+        cur.execute(f"DROP DATABASE IF EXISTS `{cfg['database']}`")
+    cur.execute(f"CREATE DATABASE IF NOT EXISTS `{cfg['database']}` DEFAULT CHARSET utf8mb4")
+    cur.close()
+    conn.close()
+
+
+def drop_schema(cfg):
+    server = {k: v for k, v in cfg.items() if k != "database"}
+    conn = mysql.connector.connect(connection_timeout=5, **server)
+    cur = conn.cursor()
+    cur.execute(f"DROP DATABASE IF EXISTS `{cfg['database']}`")
+    cur.close()
+    conn.close()
+
+
+def install_hooks(dlg, stats: TapStats):
+    """record_event 종료 / 저널 기록 / 저널 ack 시점을 가로채 기록 (원래 동작은 그대로)."""
+    record_event = dlg.record_event
+    journal = dlg.journal
+    append, ack = journal.append, journal.ack
+
+    def hooked_record_event(uid_hex, door_id=None):
+        record_event(uid_hex, door_id)
+        stats.on_decided(uid_hex)
+
+    def hooked_append(ev):
+        append(ev)
+        stats.on_journal(ev)
+
+    def hooked_ack(ev_ids):
+        ack(ev_ids)
+        stats.on_ack(ev_ids)
+
+    dlg.record_event = hooked_record_event
+    journal.append = hooked_append
+    journal.ack = hooked_ack
+
+
+def run_bench(args):
+    cfg = dict(BENCH_DB, host=args.host, port=args.port, user=args.user,
+               password=args.password, database=args.database)
+    prepare_schema(cfg, drop_first=not args.reuse)
+
+    counts = StatementCounts()
+
+    def connect_db():
+        label = "gui" if threading.current_thread() is threading.main_thread() else "writer"
+        return CountingConnection(mysql.connector.connect(connection_timeout=5, **cfg), counts, label)
+
+    # 앱 설정을 벤치용으로 바꾼다 (모듈 전역을 참조하므로 MyDialog 생성 전에)
+    access.DB_CFG.clear()
+    access.DB_CFG.update(cfg)
+    access.connect_db = connect_db
+    journal_dir = tempfile.mkdtemp(prefix="bench_rfid_")
+    access.JOURNAL_PATH = os.path.join(journal_dir, "access_journal.jsonl")
+    access.JOURNAL_REJECT_PATH = os.path.join(journal_dir, "access_rejected.jsonl")
+
+    stats = TapStats()
+    pool = [f"{random.getrandbits(32):08x}" for _ in range(args.uids)] if args.uids else None
+    readers = [
+        FakeReader(f"door{i + 1}", args.rate, args.burst, args.burst_every, args.duration, pool, stats.on_sent)
+        for i in range(args.doors)
+    ]
+    access.RFID_DOORS.clear()
+    access.RFID_DOORS.update({r.door_id: r.port for r in readers})
+    access.SerialSupervisor = NoSerialSupervisor
+    access.HvacCommander = NoSendHvacCommander
+
+    app = QApplication(sys.argv[:1])
+    quiet = open(os.devnull, "w") if not args.verbose else None
+    with contextlib.redirect_stdout(quiet) if quiet else contextlib.nullcontext():
+        dlg = access.MyDialog()
+        dlg.show()   # 실제 앱처럼 화면 갱신(스케줄러)까지 포함
+    install_hooks(dlg, stats)
+
+    phase = {"name": "connect", "t": time.monotonic()}
+    result = {}
+
+    def tick():
+        now = time.monotonic()
+        if phase["name"] == "connect":
+            if len(dlg.rfid.connected_doors()) == len(readers):
+                counts.reset()   # 시작 시 스키마 확인/사용자 로드 문장은 빼고 잰다
+                for r in readers:
+                    r.start()
+                phase.update(name="load", t=now)
+                print(f"[BENCH] {len(readers)} doors up, load {args.rate}/s/door"
+                      + (f" + burst {args.burst} every {args.burst_every}s" if args.burst else "")
+                      + f" for {args.duration}s", file=sys.stderr)
+            elif now - phase["t"] > 10:
+                print("[BENCH][ERROR] 가짜 리더가 연결되지 않음", file=sys.stderr)
+                app.quit()
+        elif phase["name"] == "load":
+            if not any(r.is_alive() for r in readers):
+                result["load_secs"] = now - phase["t"]
+                phase.update(name="drain", t=now)
+        elif phase["name"] == "drain":
+            done = not dlg.rfid_events.qsize() and not dlg.journal.pending()
+            if done or now - phase["t"] > DRAIN_TIMEOUT_SECS:
+                result["drain_secs"] = now - phase["t"]
+                result["drained"] = done
+                app.quit()
+
+    monitor = QTimer()
+    monitor.setInterval(50)
+    monitor.timeout.connect(tick)
+    monitor.start()
+    with contextlib.redirect_stdout(quiet) if quiet else contextlib.nullcontext():
+        app.exec()
+        stmt = dict(counts.by_label)
+        dlg.close()
+    for r in readers:
+        r.close()
+    if quiet:
+        quiet.close()
+
+    report(args, readers, stats, dlg.rfid.dedup, stmt, result)
+    if args.drop:
+        drop_schema(cfg)
+
+
+def report(args, readers, stats: TapStats, dedup, stmt, result):
+    sent = sum(r.sent for r in readers)
+    decided, committed = len(stats.decide_ms), len(stats.commit_ms)
+    load = result.get("load_secs") or args.duration
+    wall = load + result.get("drain_secs", 0.0)
+    print(f"\n[BENCH] taps sent {sent:,} ({sent / load:,.1f}/s offered), "
+          f"decided {decided:,}, committed {committed:,}"
+          + ("" if result.get("drained", True) else f"  (!! {stats.outstanding()} not committed after drain)"))
+    print(f"[BENCH] dedup: {dedup.summary()}")
+    print(f"[BENCH] throughput: decided {decided / load:,.1f}/s, committed {committed / wall:,.1f}/s "
+          f"(load {load:.1f}s + drain {result.get('drain_secs', 0.0):.1f}s)")
+    for title, s in (("decide (line -> IN/OUT)", stats.decide_ms), ("commit (line -> DB ack)", stats.commit_ms)):
+        if s:
+            print(f"== {title}: p50 {pct(s, 50):8.2f} ms  p99 {pct(s, 99):8.2f} ms  "
+                  f"max {max(s):8.2f} ms  mean {statistics.fmean(s):8.2f} ms")
+    n = max(1, decided)
+    total = sum(stmt.values())
+    parts = ", ".join(f"{k} {v:,} ({v / n:.2f}/tap)" for k, v in sorted(stmt.items()))
+    print(f"== DB statements: {total:,} ({total / n:.2f}/tap)  [{parts}]")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="RFID 태깅 부하 발생기 + 태깅 지연 벤치마크 (로컬 MySQL)")
+    ap.add_argument("--doors", type=int, default=1, help="가짜 리더(출입문) 수")
+    ap.add_argument("--rate", type=float, default=5.0, help="출입문당 초당 태깅 (포아송 평균)")
+    ap.add_argument("--burst", type=int, default=0, help="버스트 크기 (0=없음)")
+    ap.add_argument("--burst-every", type=float, default=10.0, help="버스트 간격(초)")
+    ap.add_argument("--duration", type=float, default=20.0, help="부하 시간(초)")
+    ap.add_argument("--uids", type=int, default=0, help="카드 풀 크기 (0=태깅마다 새 카드)")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--host", default=BENCH_DB["host"])
+    ap.add_argument("--port", type=int, default=BENCH_DB["port"])
+    ap.add_argument("--user", default=BENCH_DB["user"])
+    ap.add_argument("--password", default=BENCH_DB["password"])
+    ap.add_argument("--database", default=BENCH_DB["database"], help="벤치 전용 스키마 (시작 시 새로 만든다)")
+    ap.add_argument("--reuse", action="store_true", help="스키마를 지우지 않고 이어서 사용")
+    ap.add_argument("--drop", action="store_true", help="측정 후 스키마 삭제")
+    ap.add_argument("--verbose", action="store_true", help="앱 로그(detected/ATTEND 등) 출력")
+    args = ap.parse_args()
+    if args.host == access.DB_CFG["host"]:
+        ap.error("운영 DB 서버에서는 돌릴 수 없습니다 (--host 확인)")
+
+    random.seed(args.seed)
+    run_bench(args)
+
+
+if __name__ == "__main__":
+    main()
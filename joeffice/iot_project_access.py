@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import sys, os, csv
+import sys, os, re, csv, json, time, uuid, heapq, queue, threading, selectors
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
-from PyQt6.QtGui import QKeySequence, QShortcut
+from PyQt6.QtGui import QColor, QFont, QKeySequence, QShortcut
 from PyQt6 import uic
 import serial
 import serial.tools.list_ports as lp
+from collections import OrderedDict
 from datetime import datetime, date, timedelta
 from zoneinfo import ZoneInfo
 
@@ -19,97 +20,1304 @@ except ImportError:
     print("   pip install mysql-connector-python")
     sys.exit(1)
 
+from attendance_sql import ensure_daily_table, insert_daily_rows, update_day_owners, \
+    refresh_daily_attendance, refresh_daily_owners
+
 from_class = uic.loadUiType("iot_project_access.ui")[0]
 
+# ================== DB 설정 ==================
+DB_CFG = dict(
+    host="database-1.c1kkeqig4j9x.ap-northeast-2.rds.amazonaws.com",
+    port=3306,
+    user="joeffice_user",
+    password="12345678",
+    database="joeffice",
+    autocommit=True,
+)
+
+def connect_db():
+    return mysql.connector.connect(connection_timeout=5, **DB_CFG)
+
+# ================== 출입 저널(write-behind) 설정 ==================
+JOURNAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "access_journal.jsonl")
+JOURNAL_REJECT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "access_rejected.jsonl")
+JOURNAL_QUEUE_MAX = 1000         # 쓰기 스레드 큐 상한 (넘치면 저널 재생으로 반영)
+JOURNAL_BATCH_MAX = 200          # 한 트랜잭션에 묶는 최대 이벤트 수
+JOURNAL_FLUSH_MS = 5             # 첫 이벤트 후 추가 이벤트를 모으는 시간(ms)
+JOURNAL_COMPACT_BYTES = 1 << 20  # 모두 반영된 상태에서 이 크기를 넘으면 저널 비움
+DB_RETRY_SECS = 2.0              # DB 재연결 간격(초)
+
+# ================== 화면 갱신 설정 ==================
+# 뷰별 최소 재그리기 간격(ms). 이 간격 안에 들어온 갱신 요청은 한 번으로 합쳐진다.
+# (근무 인원 라벨/HVAC 는 OccupancyState 신호로 바로 갱신 → 여기 없음)
+REFRESH_INTERVAL_MS = {
+    "present": 1000,      # 오늘 출근자 표 (메모리 상태로 다시 그림)
+    "table": 2000,        # 근태 관리 페이지 재조회
+}
+
+
+# ================== 사용자 캐시 동기화 설정 ==================
+USERS_SYNC_MS = 5000             # users.updated_at 워터마크 이후 변경분 조회 주기
+USERS_SYNC_OVERLAP_SECS = 5      # 워터마크를 이만큼 겹쳐 읽음 (늦게 커밋된 행/같은 초 수정 대비)
+VISITOR_SWEEP_MS = 60000         # 만료 방문객 비활성화 주기 (만료된 사람이 없으면 DB 안 건드림)
+
+# ================== RFID 리더(출입문) 설정 ==================
+# door_id -> 포트. 출입문마다 iot_project_rfaccess 리더 1대 ("UID xxxxxxxx" 줄 출력)
+RFID_DOORS = {
+    "main": "/dev/ttyACM0",
+}
+DOOR_ID_MAX = 16         # access_log.door_id VARCHAR 길이 — 더 긴 door_id 는 시작 시 거부
+RFID_BAUD = 9600
+RFID_REOPEN_SECS = 2.0   # 열리지 않은/끊긴 포트 재시도 간격(초)
+RFID_LINE_MAX = 128      # 개행 없이 이보다 길어지면 버퍼 폐기(노이즈)
+TAP_DEDUP_SECS = 3.0     # 같은 카드가 이 시간 안에 다시 읽히면 수신 단계에서 버림 (카드를 대고 있는 동안 포함)
+TAP_DEDUP_MAX = 4096     # 중복 판정 캐시 최대 UID 수 (넘치면 가장 오래된 것부터 제거)
+
+# ================== 시리얼 감시(핫플러그) 설정 ==================
+SERIAL_SCAN_SECS = 0.5        # 포트 목록 재조회 간격(초)
+PROBE_BANNER_SECS = 3.0       # 새 포트: 열면 보드가 리셋되므로 부트 배너를 기다리는 최대 시간
+PROBE_HR_AFTER_SECS = 1.0     # 이 시간까지 배너가 없으면 'HR' 로 물어봄
+HVAC_BANNER = "HVAC+LIGHT ready"   # IoT_Building_ 펌웨어 setup() 출력
+# 식별하려고 열어 볼 포트 허용 목록: 장치 경로(/dev/serial/by-id/... 권장) 또는 "VID:PID"(16진).
+# Arduino 계열은 포트를 여는 것만으로 리셋되므로 목록 밖의 포트(다른 장비)는 절대 열지 않는다.
+HVAC_PROBE_ALLOW = ("2341:0043", "2341:0001")   # Arduino Uno (정품 / 구형 펌웨어)
+
+# ================== 건물 상태(텔레메트리) 설정 ==================
+BUILDING_ID = 1                  # building_system_status.building_id (adminGUI ExtraWindow 가 읽는 행)
+HVAC_POLL_MS = 5000              # 'HR' 요청 주기 (펌웨어는 HR 에만 상태를 출력)
+TELEMETRY_FLUSH_SECS = 30.0      # 스냅샷을 모아 DB 에 쓰는 주기
+TELEMETRY_BUFFER_MAX = 2000      # DB 끊김 동안 보관할 최대 스냅샷 수 (넘치면 오래된 것부터 버림)
+HVAC_LINE_MAX = 256              # 개행 없이 이보다 길어지면 버퍼 폐기
+
+# ================== HVAC 명령 스케줄러 설정 ==================
+HVAC_MIN_ON_SECS = 300           # 켠 뒤 최소 유지 시간 (마지막 퇴근 직후 재출근 대비)
+HVAC_MIN_OFF_SECS = 60           # 끈 뒤 최소 유지 시간 (릴레이 보호)
+HVAC_ACK_TIMEOUT_MS = 1500       # "[OK] HE x" 응답 대기
+HVAC_MAX_RETRIES = 2             # 응답 없을 때 재전송 횟수
+HVAC_GIVEUP_BACKOFF_SECS = 30    # 재전송까지 실패하면 이만큼 쉬었다가 다시 판단
+HVAC_MAX_CMDS_PER_MIN = 6        # HE 전송 상한 (재전송 포함, 최근 60초)
+
 
 # ==========================
-#  RFID 수신 스레드
+#  중복 태깅 억제 (수신 단계, TTL 캐시)
 # ==========================
-class Receiver(QThread):
-    detected = pyqtSignal(bytes)  # 4바이트 UID
+class TapDeduper:
+    """
+    UID(4바이트) → 마지막으로 읽힌 시각. ttl 안에 다시 읽히면 버리고 시각을 갱신한다(슬라이딩).
+    카드를 리더에 대고 있는 동안 펌웨어가 2초마다 재전송하는 것도 한 번으로 취급된다.
+    수신 스레드 전용이므로 잠금 없음. 카운터는 GUI 에서 읽기만 한다.
+    """
+
+    def __init__(self, ttl=TAP_DEDUP_SECS, max_size=TAP_DEDUP_MAX):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._seen = OrderedDict()   # uid -> monotonic (오래된 순)
+        self.passed = 0
+        self.suppressed = 0
+        self.evicted = 0
+        self.by_door = {}            # door_id -> suppressed
+
+    def accept(self, uid: bytes, door_id: str, now: float = None) -> bool:
+        now = time.monotonic() if now is None else now
+        last = self._seen.pop(uid, None)
+        self._seen[uid] = now
+        if last is not None and now - last < self.ttl:
+            self.suppressed += 1
+            self.by_door[door_id] = self.by_door.get(door_id, 0) + 1
+            return False
+        # 만료된 항목은 앞쪽에 몰려 있으므로 앞에서부터 정리
+        while self._seen:
+            k, t = next(iter(self._seen.items()))
+            if now - t < self.ttl and len(self._seen) <= self.max_size:
+                break
+            self._seen.popitem(last=False)
+            if now - t < self.ttl:
+                self.evicted += 1
+        self.passed += 1
+        return True
+
+    def summary(self) -> str:
+        doors = " ".join(f"{d}:{n}" for d, n in sorted(self.by_door.items()))
+        return (f"passed={self.passed} suppressed={self.suppressed} evicted={self.evicted}"
+                + (f" by_door[{doors}]" if doors else ""))
 
-    def __init__(self, conn, parent=None):
+
+# ==========================
+#  RFID 수신 스레드 (여러 출입문, selector 루프 하나)
+# ==========================
+class RfidIngest(QThread):
+    """
+    RFID_DOORS 의 모든 리더를 논블로킹으로 열어 selector 하나로 읽는다.
+    UID 줄마다 (door_id, uid 4바이트)를 공유 큐(events)에 넣고 events_ready 로 GUI 를 깨운다.
+    같은 카드의 반복 읽힘은 큐에 넣기 전에 TapDeduper 로 버린다 (DB/GUI/HVAC 작업 없음).
+    포트가 없거나 뽑히면 RFID_REOPEN_SECS 마다 다시 열어 본다.
+    """
+    events_ready = pyqtSignal()
+    door_state = pyqtSignal(str, bool)   # door_id, 연결 여부
+
+    def __init__(self, doors, events, baudrate=RFID_BAUD, parent=None):
         super().__init__(parent)
-        self.conn = conn
+        self.doors = dict(doors)
+        self.events = events
+        self.baudrate = baudrate
+        self.dedup = TapDeduper()
+        self._sel = selectors.DefaultSelector()
+        self._open = {}        # door_id -> (serial, bytearray)
+        self._next_try = {}    # door_id -> monotonic
+        self._warned = set()   # 열기 실패를 이미 알린 door_id (재시도마다 로그 반복 방지)
+        self._lock = threading.Lock()
+
+    # ----- GUI 스레드에서 호출 -----
+    def connected_doors(self):
+        with self._lock:
+            return sorted(self._open)
+
+    def ports(self):
+        return set(self.doors.values())
+
+    def reopen_now(self):
+        """F5: 끊긴 포트 재시도 시각을 당긴다. (실제 열기는 수신 스레드에서)"""
+        with self._lock:
+            self._next_try.clear()
 
-    def run(self):
-        if self.conn is None:
-            return
-        print("[RFID] recv start")
-        try:
-            self.conn.reset_input_buffer()
-        except Exception as e:
-            print("[SERIAL][WARN] reset_input_buffer:", e)
+    def stop(self):
+        self.requestInterruption()
 
+    # ----- 수신 스레드 -----
+    def run(self):
+        print(f"[RFID] ingest start ({len(self.doors)} doors)")
         while not self.isInterruptionRequested():
+            self._reopen_missing()
+            if not self._open:
+                self.msleep(200)
+                continue
+            got = False
+            for key, _ in self._sel.select(timeout=0.5):
+                got |= self._read(key.data)
+            if got:
+                self.events_ready.emit()
+        for door_id in list(self._open):
+            self._close(door_id, announce=False)
+        self._sel.close()
+        print("[RFID] ingest stop")
+
+    def _reopen_missing(self):
+        now = time.monotonic()
+        for door_id, port in self.doors.items():
+            with self._lock:
+                if door_id in self._open or self._next_try.get(door_id, 0.0) > now:
+                    continue
+                self._next_try[door_id] = now + RFID_REOPEN_SECS
             try:
-                line = self.conn.read_until(b"\n")  # timeout=1 로 설정되어 있으면 주기적으로 빠져나옴
+                ser = serial.Serial(port=port, baudrate=self.baudrate, timeout=0)
+                ser.reset_input_buffer()
             except Exception as e:
-                print("[SERIAL][ERROR] read_until:", e)
+                if door_id not in self._warned:
+                    self._warned.add(door_id)
+                    print(f"[SERIAL][RFID] {door_id}: {port} 열기 실패: {e} -> {RFID_REOPEN_SECS:.0f}초마다 재시도")
                 continue
+            self._warned.discard(door_id)
+            with self._lock:
+                self._open[door_id] = (ser, bytearray())
+            self._sel.register(ser.fileno(), selectors.EVENT_READ, door_id)
+            print(f"[SERIAL] RFID {door_id} connected: {port} @ {self.baudrate}")
+            self.door_state.emit(door_id, True)
+
+    def _close(self, door_id, announce=True):
+        with self._lock:
+            ser, _ = self._open.pop(door_id)
+            self._next_try[door_id] = time.monotonic() + RFID_REOPEN_SECS
+        try:
+            self._sel.unregister(ser.fileno())
+        except Exception:
+            pass
+        try:
+            ser.close()
+        except Exception:
+            pass
+        if announce:
+            print(f"[SERIAL] RFID {door_id} disconnected")
+            self.door_state.emit(door_id, False)
 
-            if not line:
+    def _read(self, door_id) -> bool:
+        ser, buf = self._open[door_id]
+        try:
+            chunk = ser.read(max(1, ser.in_waiting))
+        except Exception as e:
+            print(f"[SERIAL][ERROR] {door_id} read:", e)
+            self._close(door_id)
+            return False
+        buf.extend(chunk)
+
+        got = False
+        while True:
+            i = buf.find(b"\n")
+            if i < 0:
+                break
+            line = bytes(buf[:i])
+            del buf[:i + 1]
+            msg = line.decode("utf-8", errors="ignore").strip()
+            # 기대 포맷: "UID a20df603"
+            if not msg.startswith("UID "):
+                continue
+            uid_hex = msg[4:].strip().lower()
+            try:
+                uid = bytes.fromhex(uid_hex)
+            except ValueError:
+                uid = b""
+            if len(uid) != 4:
+                print(f"[WARN] invalid UID from {door_id}:", msg)
                 continue
+            if not self.dedup.accept(uid, door_id):
+                continue
+            self.events.put((door_id, uid))
+            got = True
+        if len(buf) > RFID_LINE_MAX:
+            buf.clear()
+        return got
+
+
+# ==========================
+#  시리얼 감시 스레드 (핫플러그: 포트 재조회 + 보드 식별)
+# ==========================
+class SerialSupervisor(QThread):
+    """
+    SERIAL_SCAN_SECS 마다 ttyACM/ttyUSB 목록을 다시 읽는다.
+      - 새 포트가 RFID_DOORS 에 있으면: RfidIngest 에 즉시 재연결 요청
+      - 그 외 새 포트: HVAC_PROBE_ALLOW 에 있고 아무도(이 프로세스 포함) 열어 두지 않았으면 배타적으로 열어서
+        부트 배너(HVAC_BANNER) 또는 'HR' 응답(TEMP:/[ERR])으로 HVAC 보드인지 식별 (목록 밖은 'skipped')
+      - 포트가 사라지면: 역할 정보를 지우고, HVAC 였다면 hvac_detached
+    식별(수 초 걸림)은 전부 이 스레드에서 하므로 GUI 는 멈추지 않는다.
+    """
+    hvac_attached = pyqtSignal(object)      # serial.Serial (열린 상태로 넘김)
+    hvac_detached = pyqtSignal(str)         # port
+    port_identified = pyqtSignal(str, str)  # port, 'hvac' | 'rfid' | 'unknown' | 'skipped' | 'busy'
+
+    def __init__(self, rfid=None, baudrate=9600, parent=None):
+        super().__init__(parent)
+        self.rfid = rfid
+        self.baudrate = baudrate
+        self._roles = {}       # port -> role (꽂혀 있는 동안 다시 식별하지 않음)
+        self._hvac = None      # (port, serial)
+        self._rescan = False
 
+    def rescan(self):
+        """F5: 'unknown'/'busy' 로 판정된 포트도 다시 식별해 본다 (허용 목록 밖 포트는 그대로)."""
+        self._rescan = True
+
+    def stop(self):
+        self.requestInterruption()
+
+    def run(self):
+        print("[SERIAL] supervisor start")
+        while not self.isInterruptionRequested():
+            try:
+                present = {p.device: p for p in lp.comports() if "ttyACM" in p.device or "ttyUSB" in p.device}
+            except Exception as e:
+                print("[SERIAL][WARN] port scan failed:", e)
+                present = {}
+            if self._rescan:
+                self._rescan = False
+                for port in [p for p, r in self._roles.items() if r in ("unknown", "busy")]:
+                    del self._roles[port]
+            self._drop_removed(present)
+            self._identify_added(present)
+            self.msleep(int(SERIAL_SCAN_SECS * 1000))
+        if self._hvac is not None:
             try:
-                msg = line.decode("utf-8", errors="ignore").strip()
+                self._hvac[1].close()
             except Exception:
+                pass
+        print("[SERIAL] supervisor stop")
+
+    def _drop_removed(self, present):
+        for port in [p for p in self._roles if p not in present]:
+            role = self._roles.pop(port)
+            print(f"[SERIAL] unplugged: {port} ({role})")
+            if self._hvac is not None and self._hvac[0] == port:
+                try:
+                    self._hvac[1].close()
+                except Exception:
+                    pass
+                self._hvac = None
+                self.hvac_detached.emit(port)
+
+    @staticmethod
+    def _vidpid(info):
+        return f"{info.vid:04x}:{info.pid:04x}" if info.vid is not None and info.pid is not None else None
+
+    @classmethod
+    def _allowed(cls, info) -> bool:
+        """HVAC_PROBE_ALLOW 에 장치 경로나 VID:PID 가 있는 포트만 열어 본다."""
+        vidpid = cls._vidpid(info)
+        for entry in HVAC_PROBE_ALLOW:
+            if entry.lower() == vidpid or os.path.realpath(entry) == os.path.realpath(info.device):
+                return True
+        return False
+
+    @staticmethod
+    def _port_in_use(port) -> bool:
+        """누가 이 장치를 열어 두었는지 (/proc/<pid>/fd, 읽을 수 있는 프로세스만).
+        이 프로세스 자신도 본다 — ControlHub 에선 주차 ArduinoController 가 같은 프로세스에서 포트를 연다.
+        (RfidIngest 포트와 이미 붙인 HVAC 포트는 여기까지 오지 않는다)"""
+        target = os.path.realpath(port)
+        try:
+            pids = [d for d in os.listdir("/proc") if d.isdigit()]
+        except OSError:
+            return False
+        for pid in pids:
+            try:
+                fds = os.listdir(f"/proc/{pid}/fd")
+                if any(os.path.realpath(f"/proc/{pid}/fd/{fd}") == target for fd in fds):
+                    return True
+            except OSError:
                 continue
+        return False
 
-            # 기대 포맷: "UID a20df603"
-            if msg.startswith("UID "):
-                uid_hex = msg[4:].strip().lower()
-                if len(uid_hex) == 8:
-                    self.detected.emit(bytes.fromhex(uid_hex))
+    def _identify_added(self, present):
+        rfid_ports = self.rfid.ports() if self.rfid is not None else set()
+        for port in sorted(set(present) - set(self._roles)):
+            if self.isInterruptionRequested():
+                return
+            if port in rfid_ports:
+                # RFID 포트는 RfidIngest 소유: 열지 않고 재연결만 앞당긴다
+                role = "rfid"
+                self.rfid.reopen_now()
+            elif not self._allowed(present[port]):
+                role = "skipped"
+                print(f"[SERIAL] not probing {port} ({self._vidpid(present[port]) or 'no usb id'}): HVAC_PROBE_ALLOW 에 없음")
+            elif self._port_in_use(port):
+                role = "busy"
+                print(f"[SERIAL][WARN] {port} 를 이미 누가 열어 두었음 → 식별 안 함 (F5 로 다시 시도)")
+            else:
+                role, ser = self._probe(port)
+                if role == "hvac" and self._hvac is None:
+                    self._hvac = (port, ser)
+                    print(f"[SERIAL] HVAC connected: {port}")
+                    self.hvac_attached.emit(ser)
                 else:
-                    print("[WARN] invalid UID:", msg)
+                    if role == "hvac":
+                        print(f"[SERIAL][WARN] 두 번째 HVAC 보드 무시: {port}")
+                    elif role == "rfid":
+                        print(f"[SERIAL][WARN] RFID_DOORS 에 없는 리더: {port} (door_id 를 지정해 추가하세요)")
+                    if ser is not None:
+                        try:
+                            ser.close()
+                        except Exception:
+                            pass
+            self._roles[port] = role
+            self.port_identified.emit(port, role)
+
+    def _probe(self, port):
+        """(role, serial|None). hvac 면 열린 포트를 그대로 돌려준다."""
+        try:
+            ser = serial.Serial(port=port, baudrate=self.baudrate, timeout=0.1, exclusive=True)
+        except Exception as e:
+            print(f"[SERIAL] probe open failed: {port}: {e}")
+            return "busy", None
+
+        t0 = time.monotonic()
+        next_hr = t0 + PROBE_HR_AFTER_SECS
+        role = "unknown"
+        try:
+            while time.monotonic() - t0 < PROBE_BANNER_SECS and not self.isInterruptionRequested():
+                line = ser.readline().decode("utf-8", errors="ignore").strip()
+                if line.startswith(HVAC_BANNER) or line.startswith("TEMP:") or line.startswith("[ERR]"):
+                    role = "hvac"
+                    break
+                if line.startswith("UID "):
+                    role = "rfid"
+                    break
+                if not line and time.monotonic() >= next_hr:
+                    ser.write(b"HR\r\n")
+                    next_hr = time.monotonic() + 0.5
+        except Exception as e:
+            print(f"[SERIAL] probe failed: {port}: {e}")
+            role = "unknown"
 
-        print("[RFID] recv stop")
+        if role == "hvac":
+            return role, ser
+        try:
+            ser.close()
+        except Exception:
+            pass
+        return role, None
 
-    def stop(self):
-        self.requestInterruption()
+
+# ==========================
+#  HVAC 수신 스레드 (상태 줄 파싱 + 건물 상태 기록)
+# ==========================
+# 예: "TEMP:25.3C HUM:55.0% ENABLE:1 STATE:IDLE LIGHT:ON MODE:1"
+HVAC_STATUS_RE = re.compile(
+    rb"TEMP:(-?\d+(?:\.\d+)?)C HUM:(\d+(?:\.\d+)?)% ENABLE:([01]) STATE:(\w+) LIGHT:(ON|OFF) MODE:(\S+)"
+)
+
+
+def parse_hvac_status(line: bytes):
+    """HR 응답 한 줄 → dict, 상태 줄이 아니면 None."""
+    m = HVAC_STATUS_RE.match(line)
+    if m is None:
+        return None
+    return {
+        "temp_c": float(m.group(1)),
+        "hum_pct": float(m.group(2)),
+        "hvac_on": m.group(3) == b"1",
+        "state": m.group(4).decode("ascii"),
+        "light_on": m.group(5) == b"ON",
+        "mode": m.group(6).decode("ascii", errors="ignore"),
+    }
 
 
-# (옵션) HVAC 수신 스레드 – 현재는 미사용이지만 틀만 남겨둠
 class HvacReader(QThread):
+    """
+    HVAC 포트를 읽어 줄 단위로 나눈다. (버퍼는 bytearray 하나를 재사용)
+      - 모든 줄: line_rx
+      - 상태 줄: status_rx(dict) + 스냅샷 버퍼 → TELEMETRY_FLUSH_SECS 마다
+        building_system_status(최신 1행) 와 building_status_history 에 한 트랜잭션으로 기록
+    DB 는 쓰기 스레드처럼 자체 연결을 쓰고, 끊겨 있으면 버퍼에 모아 두었다가 다음 주기에 쓴다.
+    """
     line_rx = pyqtSignal(str)
-    def __init__(self, ser, parent=None):
+    status_rx = pyqtSignal(dict)
+
+    def __init__(self, ser, building_id=BUILDING_ID, parent=None):
         super().__init__(parent)
         self.ser = ser
+        self.building_id = building_id
+        self._buf = bytearray()
+        self._snaps = []        # [(ts, dict)]
+        self._db = None
+        self._next_flush = 0.0
 
     def run(self):
         if not self.ser:
             return
         print("[HVAC] reader start")
-        buf = b""
         try:
             self.ser.reset_input_buffer()
         except Exception:
             pass
+        self._next_flush = time.monotonic() + TELEMETRY_FLUSH_SECS
         while not self.isInterruptionRequested() and self.ser and self.ser.is_open:
             try:
-                chunk = self.ser.read(64)
-                if not chunk:
-                    continue
-                buf += chunk
-                while b"\n" in buf or b"\r" in buf:
-                    for sep in (b"\r\n", b"\n", b"\r"):
-                        if sep in buf:
-                            line, buf = buf.split(sep, 1)
-                            s = line.decode("utf-8", errors="ignore").strip()
-                            if s:
-                                self.line_rx.emit(s)
-                            break
-                    else:
-                        break
-            except Exception:
+                chunk = self.ser.read(max(1, self.ser.in_waiting))
+            except Exception as e:
+                print("[HVAC][ERROR] read:", e)
                 break
+            if chunk:
+                self._feed(chunk)
+            if time.monotonic() >= self._next_flush:
+                self._flush()
+        self._flush()
+        if self._db is not None:
+            try:
+                self._db.close()
+            except Exception:
+                pass
         print("[HVAC] reader stop")
 
+    def _feed(self, chunk: bytes):
+        buf = self._buf
+        buf.extend(chunk)
+        start = 0
+        while True:
+            i = buf.find(b"\n", start)
+            if i < 0:
+                break
+            line = bytes(buf[start:i]).strip()
+            start = i + 1
+            if not line:
+                continue
+            snap = parse_hvac_status(line)
+            if snap is not None:
+                self._snaps.append((datetime.now(ZoneInfo("Asia/Seoul")).replace(tzinfo=None), snap))
+                if len(self._snaps) > TELEMETRY_BUFFER_MAX:
+                    del self._snaps[:len(self._snaps) - TELEMETRY_BUFFER_MAX]
+                self.status_rx.emit(snap)
+            self.line_rx.emit(line.decode("utf-8", errors="ignore"))
+        del buf[:start]
+        if len(buf) > HVAC_LINE_MAX:
+            buf.clear()
+
+    def _flush(self):
+        self._next_flush = time.monotonic() + TELEMETRY_FLUSH_SECS
+        if not self._snaps:
+            return
+        snaps = self._snaps
+        try:
+            if self._db is None:
+                self._db = connect_db()
+            cur = self._db.cursor()
+            try:
+                self._db.start_transaction()
+                values = ",".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(snaps))
+                cur.execute(
+                    "INSERT INTO building_status_history "
+                    "(building_id, ts, temp_c, hum_pct, hvac_on, light_on, state, mode) "
+                    f"VALUES {values}",
+                    [v for ts, d in snaps for v in (self.building_id, ts, d["temp_c"], d["hum_pct"],
+                                                     d["hvac_on"], d["light_on"], d["state"], d["mode"])]
+                )
+                ts, d = snaps[-1]
+                cur.execute(
+                    """
+                    INSERT INTO building_system_status
+                        (building_id, hvac_on, light_on, temp_c, hum_pct, state, mode, updated_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        hvac_on=VALUES(hvac_on), light_on=VALUES(light_on),
+                        temp_c=VALUES(temp_c), hum_pct=VALUES(hum_pct),
+                        state=VALUES(state), mode=VALUES(mode), updated_at=VALUES(updated_at)
+                    """,
+                    (self.building_id, d["hvac_on"], d["light_on"], d["temp_c"], d["hum_pct"],
+                     d["state"], d["mode"], ts)
+                )
+                self._db.commit()
+            finally:
+                cur.close()
+        except Exception as e:
+            print(f"[HVAC][ERROR] telemetry flush ({len(snaps)} kept):", e)
+            try:
+                self._db.rollback()
+                self._db.close()
+            except Exception:
+                pass
+            self._db = None
+            return
+        self._snaps = []
+
     def stop(self):
         self.requestInterruption()
 
 
+# ==========================
+#  HVAC 명령 스케줄러 (유지 시간 + 응답 확인 + 전송 제한)
+# ==========================
+class HvacCommander(QObject):
+    """
+    원하는 상태(desired)만 받아 두고, 보드의 실제 상태(actual: "[OK] HE" 응답 또는 HR 의 ENABLE)와
+    다를 때에만 HE 를 보낸다.
+      - 유지 시간: 마지막 전환 후 HVAC_MIN_ON_SECS / HVAC_MIN_OFF_SECS 가 지나야 반대로 전환
+      - 응답 확인: HVAC_ACK_TIMEOUT_MS 안에 "[OK] HE x" 가 없으면 재전송 (HVAC_MAX_RETRIES 회)
+      - 전송 제한: 최근 60초 HVAC_MAX_CMDS_PER_MIN 회
+    출퇴근 러시로 인원이 0↔1 을 오가도 릴레이 전환 횟수는 유지 시간으로 묶인다.
+    """
+
+    def __init__(self, send_line, is_connected, parent=None):
+        super().__init__(parent)
+        self.send_line = send_line          # (text, quiet) -> bool
+        self.is_connected = is_connected
+        self.desired = None
+        self.actual = None
+        self._changed_at = 0.0              # actual 이 마지막으로 바뀐 시각(monotonic)
+        self._inflight = None               # (enable, tries)
+        self._sent_at = []                  # 최근 HE 전송 시각들
+        self._hr_asked = False
+        self._backoff_until = 0.0
+        self.stats = dict(requested=0, sent=0, acked=0, retries=0, timeouts=0, gave_up=0,
+                          dup=0, held=0, rate_limited=0)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._evaluate)
+        self._ack_timer = QTimer(self)
+        self._ack_timer.setSingleShot(True)
+        self._ack_timer.timeout.connect(self._on_ack_timeout)
+
+    # ----- 입력 -----
+    def request(self, enable: bool):
+        """자동 제어: 원하는 상태만 갱신 (실제 전송은 조건이 맞을 때)."""
+        if self.desired != enable:
+            self.desired = enable
+        self.stats["requested"] += 1
+        self._evaluate()
+
+    def force(self, enable: bool):
+        """수동 제어(Ctrl+1/0): 유지 시간·전송 제한 무시, 응답 확인은 그대로."""
+        self.desired = enable
+        self._backoff_until = 0.0
+        if self._inflight is None or self._inflight[0] != enable:
+            self._send(enable, tries=0)
+
+    def reset(self):
+        """보드 재연결(리셋): 실제 상태를 모르는 것으로 보고 다시 판단."""
+        self._ack_timer.stop()
+        self._inflight = None
+        self.actual = None
+        self._changed_at = 0.0
+        self._hr_asked = False
+        self._backoff_until = 0.0
+        self._timer.start(0)
+
+    def on_status(self, snap: dict):
+        on = bool(snap.get("hvac_on"))
+        if self.actual != on:
+            if self.actual is not None:
+                print(f"[HVAC] device state changed externally -> {'ON' if on else 'OFF'}")
+            self.actual = on
+            self._changed_at = time.monotonic()
+        self._evaluate()
+
+    def on_line(self, line: str):
+        if self._inflight is None:
+            return
+        enable = self._inflight[0]
+        if line.startswith(f"[OK] HE {'1' if enable else '0'}"):
+            self._ack_timer.stop()
+            self._inflight = None
+            self.stats["acked"] += 1
+            if self.actual != enable:
+                self.actual = enable
+                self._changed_at = time.monotonic()
+            self._evaluate()
+        elif line.startswith("[ERR] HE") or line.startswith("[ERR] Usage: HE"):
+            print("[HVAC][WARN] HE rejected:", line)
+            self._ack_timer.stop()
+            self._on_ack_timeout()
+
+    # ----- 판단/전송 -----
+    def _evaluate(self):
+        if self.desired is None or self._inflight is not None or not self.is_connected():
+            return
+        now = time.monotonic()
+        if now < self._backoff_until:
+            self._schedule(self._backoff_until - now)
+            return
+        if self.actual is None and not self._hr_asked:
+            # 실제 상태부터 확인 (HR 응답은 on_status 로 들어옴)
+            self._hr_asked = True
+            self.send_line("HR", True)
+            self._schedule(HVAC_ACK_TIMEOUT_MS / 1000.0)
+            return
+        if self.actual == self.desired:
+            self.stats["dup"] += 1
+            return
+        if self.actual is not None:
+            hold = HVAC_MIN_ON_SECS if self.actual else HVAC_MIN_OFF_SECS
+            left = self._changed_at + hold - now
+            if left > 0:
+                self.stats["held"] += 1
+                self._schedule(left)
+                return
+        wait = self._rate_wait(now)
+        if wait > 0:
+            self.stats["rate_limited"] += 1
+            self._schedule(wait)
+            return
+        self._send(self.desired, tries=0)
+
+    def _rate_wait(self, now) -> float:
+        self._sent_at = [t for t in self._sent_at if now - t < 60.0]
+        if len(self._sent_at) < HVAC_MAX_CMDS_PER_MIN:
+            return 0.0
+        return self._sent_at[0] + 60.0 - now
+
+    def _schedule(self, secs: float):
+        ms = max(0, int(secs * 1000))
+        if not self._timer.isActive() or self._timer.remainingTime() > ms:
+            self._timer.start(ms)
+
+    def _send(self, enable: bool, tries: int):
+        if not self.send_line(f"HE {'1' if enable else '0'}", False):
+            self._inflight = None
+            return
+        self._sent_at.append(time.monotonic())
+        self.stats["sent"] += 1
+        self._inflight = (enable, tries)
+        self._ack_timer.start(HVAC_ACK_TIMEOUT_MS)
+
+    def _on_ack_timeout(self):
+        if self._inflight is None:
+            return
+        enable, tries = self._inflight
+        self.stats["timeouts"] += 1
+        if tries < HVAC_MAX_RETRIES and self.is_connected():
+            self.stats["retries"] += 1
+            print(f"[HVAC][WARN] no ack for HE {int(enable)} -> retry {tries + 1}/{HVAC_MAX_RETRIES}")
+            self._send(enable, tries + 1)
+            return
+        print(f"[HVAC][ERROR] HE {int(enable)} not acknowledged; retry in {HVAC_GIVEUP_BACKOFF_SECS:.0f}s")
+        self.stats["gave_up"] += 1
+        self._inflight = None
+        self.actual = None          # 모름 → 다음 판단 때 HR 로 확인
+        self._hr_asked = False
+        self._backoff_until = time.monotonic() + HVAC_GIVEUP_BACKOFF_SECS
+        self._evaluate()
+
+    def summary(self) -> str:
+        return " ".join(f"{k}={v}" for k, v in self.stats.items())
+
+
+# ==========================
+#  사용자 디렉터리 캐시 (users, 변경분 동기화)
+# ==========================
+def uid_key(uid) -> int:
+    """4바이트 UID(bytes 또는 hex 문자열) → int 키. 형식이 틀리면 -1."""
+    if isinstance(uid, (bytes, bytearray)):
+        return int.from_bytes(uid, "big") if len(uid) == 4 else -1
+    if not isinstance(uid, str) or len(uid) != 8:
+        return -1
+    try:
+        return int(uid, 16)
+    except ValueError:
+        return -1
+
+
+class VisitorExpiry:
+    """
+    방문객 만료 판정 (DB 조회 없음).
+      - _until  : 활성 방문객 uid -> valid_until
+      - _heap   : (valid_until, uid) 최소 힙. 값이 바뀌면 새로 넣고 예전 항목은 꺼낼 때 버린다(지연 삭제)
+      - _expired: 만료됐거나 비활성(active=0)인 방문객
+    태깅 시 is_denied 는 dict/set 조회뿐이고, 다음 만료 시각은 힙 맨 앞에서 바로 나온다.
+    """
+
+    def __init__(self):
+        self._until = {}
+        self._heap = []
+        self._expired = set()
+        self.denied = 0
+
+    def update(self, key: int, is_visitor: bool, valid_until, active: bool = True):
+        self._expired.discard(key)
+        self._until.pop(key, None)
+        if not is_visitor:
+            return
+        if not active:
+            self._expired.add(key)
+        elif valid_until is not None:      # 기한 없는 방문객은 통과
+            self._until[key] = valid_until
+            heapq.heappush(self._heap, (valid_until, key))
+
+    def is_denied(self, key: int, now: datetime) -> bool:
+        if key in self._expired:
+            return True
+        vu = self._until.get(key)
+        return vu is not None and vu <= now
+
+    def next_expiry(self):
+        heap = self._heap
+        while heap and self._until.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_expired(self, now: datetime):
+        """now 까지 만료된 활성 방문객을 만료 집합으로 옮기고 uid 목록을 돌려준다."""
+        out = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            vu, key = heapq.heappop(heap)
+            if self._until.get(key) != vu:
+                continue
+            del self._until[key]
+            self._expired.add(key)
+            out.append(key)
+        return out
+
+    def active_count(self) -> int:
+        return len(self._until)
+
+
+class UserDirectory:
+    """
+    uid(int) -> (name, company). 처음 한 번 전체를 읽고, 이후엔 users.updated_at 워터마크 이후 행만 읽는다.
+    다른 PC 에서 등록/수정한 카드도 재시작 없이 USERS_SYNC_MS 안에 반영된다.
+    (삭제는 워터마크로 알 수 없음 — 이 앱은 users 를 지우지 않는다)
+    """
+
+    def __init__(self, visitors: VisitorExpiry = None):
+        self._by_uid = {}
+        self.visitors = visitors  # class/valid_until/active 변경을 같이 반영
+        self.watermark = None     # 지금까지 본 가장 큰 updated_at
+        self.synced_rows = 0
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._by_uid
+
+    def __len__(self):
+        return len(self._by_uid)
+
+    def get(self, key: int, default=None):
+        return self._by_uid.get(key, default)
+
+    def put(self, key: int, name: str, company: str):
+        """이 PC 에서 직접 바꾼 값 (DB 반영 후 호출). 다음 sync 에서 같은 값으로 덮어써진다."""
+        self._by_uid[key] = (name, company)
+
+    def sync(self, db) -> int:
+        """워터마크 이후 변경분만 반영. 반영한 행 수. (시작 시 1회 — 이후 주기 조회는 fetch 를 쓰기 스레드에서)"""
+        return self.apply(*self.fetch(db, self.watermark))
+
+    @staticmethod
+    def fetch(db, watermark):
+        """(rows, server_now) — watermark 이후 바뀐 users 행. DB 만 읽으므로 어느 스레드에서든 부를 수 있다."""
+        cur = db.cursor()
+        try:
+            cols = "SELECT uid, name, company, updated_at, class, valid_until, active FROM users"
+            server_now = None
+            if watermark is None:
+                # updated_at 은 서버 CURRENT_TIMESTAMP(세션 time_zone) 기준 → 빈 테이블의 워터마크도 서버 시계로
+                cur.execute("SELECT NOW()")
+                server_now = cur.fetchone()[0]
+                cur.execute(cols)
+            else:
+                cur.execute(
+                    cols + " WHERE updated_at >= %s",
+                    (watermark - timedelta(seconds=USERS_SYNC_OVERLAP_SECS),)
+                )
+            return cur.fetchall(), server_now
+        finally:
+            cur.close()
+
+    def apply(self, rows, server_now=None) -> int:
+        """fetch 결과를 캐시/방문객 만료에 반영하고 워터마크를 올린다 (GUI 스레드). 반영한 행 수."""
+        wm = self.watermark
+        for uid, name, company, updated_at, klass, valid_until, active in rows:
+            key = uid_key((uid or "").strip().lower())
+            if key < 0:
+                continue
+            self._by_uid[key] = (name or "", company or "")
+            if self.visitors is not None:
+                self.visitors.update(key, klass == "방문객", valid_until, bool(active))
+            if updated_at is not None and (wm is None or updated_at > wm):
+                wm = updated_at
+        if wm is None:
+            wm = server_now   # 빈 테이블: 서버 기준 지금부터 (None 이면 다음에도 전체 조회)
+        self.watermark = wm
+        self.synced_rows += len(rows)
+        return len(rows)
+
+
+# ==========================
+#  출입 상태 원장 (메모리)
+# ==========================
+def canonical_action(action: str) -> str:
+    if action in ("IN", "FIRST_IN"):
+        return "IN"
+    if action in ("OUT", "LAST_OUT"):
+        return "OUT"
+    return action
+
+
+class OccupancyLedger:
+    """
+    access_log 를 시작 시 한 번 읽어두고, 이후에는 태깅마다 메모리에서 갱신하는 원장.
+    - uid별 마지막 동작/시각 (쿨다운 판정용, 날짜 무관)
+    - 오늘 uid별 마지막 동작, 재실자 집합
+    - 오늘 첫 출근(FIRST_IN) / 마지막 퇴근(LAST_OUT) 소유자 (access_log 에는 저장하지 않고 여기서 파생)
+    IN/OUT 판정, 중복 판정, 인원수 계산은 DB 왕복 없이 여기서 끝난다.
+    """
+
+    def __init__(self):
+        self.day = None            # 'YYYY-MM-DD' (KST)
+        self.last = {}             # uid -> (canonical action, ts)
+        self.today_last = {}       # uid -> canonical action (오늘)
+        self.present = set()       # 오늘 마지막 동작이 IN 인 uid
+        self.first_in = {}         # uid -> 오늘 첫 IN 시각 (오늘 출근자 표)
+        self.first_in_uid = None   # 오늘 가장 먼저 IN 한 uid
+        self.last_out_uid = None   # 마지막 OUT 으로 건물이 비었을 때 그 uid (이후 IN 이 오면 None)
+
+    def load(self, db, day: str, pending=()):
+        """오늘 access_log 를 시간 순으로 재생해 원장을 다시 만든다. pending: 저널의 미반영 이벤트"""
+        cur = db.cursor()
+        cur.execute(
+            "SELECT uid, ts, action FROM access_log WHERE log_date=%s ORDER BY ts ASC, id ASC",
+            (day,)
+        )
+        rows = cur.fetchall()
+        cur.close()
+
+        self.day = None
+        self.roll(day)
+        for uid, ts, action in rows:
+            self.apply(uid, action, ts)
+        for ev in pending:
+            if ev["ts"][:10] == day:
+                self.apply(ev["uid"], ev["action"], datetime.strptime(ev["ts"], "%Y-%m-%d %H:%M:%S"))
+        print(f"[LEDGER] loaded {len(rows)} events for {day} (present={len(self.present)})")
+
+    def roll(self, day: str):
+        """날짜가 바뀌면 오늘 상태만 비운다(쿨다운용 last 는 유지)."""
+        if day == self.day:
+            return
+        self.day = day
+        self.today_last.clear()
+        self.present.clear()
+        self.first_in.clear()
+        self.first_in_uid = None
+        self.last_out_uid = None
+
+    def next_action(self, uid: str) -> str:
+        return "OUT" if self.today_last.get(uid) == "IN" else "IN"
+
+    def is_duplicate(self, uid: str, action: str, now_ts: datetime, cooldown_secs: float) -> bool:
+        prev = self.last.get(uid)
+        if not prev:
+            return False
+        last_action, last_ts = prev
+        if last_action != canonical_action(action):
+            return False
+        delta = (now_ts - last_ts).total_seconds()
+        return 0 <= delta < cooldown_secs
+
+    def present_count(self) -> int:
+        return len(self.present)
+
+    def apply(self, uid: str, action: str, ts: datetime):
+        """access_log 에 기록된(또는 기록될) 한 행을 원장에 반영. (attendance_sql.DAY_OWNERS_SQL 과 같은 정의)"""
+        canon = canonical_action(action)
+        self.last[uid] = (canon, ts)
+        self.today_last[uid] = canon
+        if canon == "IN":
+            if self.first_in_uid is None:
+                self.first_in_uid = uid
+            self.first_in.setdefault(uid, ts)
+            self.present.add(uid)
+            self.last_out_uid = None          # 다시 누군가 들어오면 LAST_OUT 은 아직 없음
+        else:
+            self.present.discard(uid)
+            self.last_out_uid = None if self.present else uid
+
+
+class OccupancyState(QObject):
+    """
+    원장(OccupancyLedger)을 감싸 바뀐 것만 신호로 알린다. 원장 변경은 모두 여기를 거친다.
+    - count_changed(n): 재실 인원이 바뀔 때만 (근무 인원 라벨, HVAC 자동 제어)
+    - attendees_changed(): 재실자 집합이나 오늘 출근자(첫 IN)가 바뀔 때 (오늘 출근자 표)
+    구독자는 count / present / first_in 을 읽기만 하고 DB 를 다시 조회하지 않는다.
+    """
+    count_changed = pyqtSignal(int)
+    attendees_changed = pyqtSignal()
+
+    def __init__(self, ledger: OccupancyLedger, parent=None):
+        super().__init__(parent)
+        self.ledger = ledger
+        self.count = 0
+        self.emitted = 0   # 보낸 신호 수 (종료 시 통계)
+
+    @property
+    def present(self):
+        return self.ledger.present
+
+    @property
+    def first_in(self):
+        return self.ledger.first_in
+
+    def load(self, db, day: str, pending=()):
+        self.ledger.load(db, day, pending)
+        self._publish(True)
+
+    def roll(self, day: str):
+        if day != self.ledger.day:
+            self.ledger.roll(day)
+            self._publish(True)
+
+    def apply(self, uid: str, action: str, ts: datetime):
+        led = self.ledger
+        was_present, was_seen = uid in led.present, uid in led.first_in
+        led.apply(uid, action, ts)
+        self._publish(was_present != (uid in led.present) or was_seen != (uid in led.first_in))
+
+    def _publish(self, attendees: bool):
+        n = len(self.ledger.present)
+        if n != self.count:
+            self.count = n
+            self.emitted += 1
+            self.count_changed.emit(n)
+        if attendees:
+            self.emitted += 1
+            self.attendees_changed.emit()
+
+
+# ==========================
+#  access_log 저널 + 쓰기 스레드
+# ==========================
+class AccessJournal:
+    """
+    태깅 이벤트를 DB 반영 전에 먼저 남기는 로컬 append-only 저널(JSONL).
+    - 이벤트 줄: {"seq", "ev_id", "uid", "name", "company", "ts", "action"}
+    - 확인 줄:   {"ack": [ev_id, ...]}
+    재시작/재연결 시 ack 되지 않은 이벤트를 pending() 으로 돌려준다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._outstanding = {}   # ev_id -> event (아직 DB 미반영)
+        self._seq = 0
+        self._scan()
+        self._fp = open(self.path, "a", encoding="utf-8")
+
+    def _scan(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            data = f.read()
+        for raw in data.splitlines():
+            try:
+                rec = json.loads(raw)
+            except ValueError:
+                continue   # 기록 도중 끊긴 줄
+            if "ack" in rec:
+                for ev_id in rec["ack"]:
+                    self._outstanding.pop(ev_id, None)
+            else:
+                self._outstanding[rec["ev_id"]] = rec
+                self._seq = max(self._seq, int(rec.get("seq", 0)))
+        if data and not data.endswith(b"\n"):
+            with open(self.path, "ab") as f:
+                f.write(b"\n")
+        if self._outstanding:
+            print(f"[JOURNAL] {len(self._outstanding)} unflushed events from previous run")
+
+    def _write(self, rec: dict):
+        self._fp.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+
+    def append(self, ev: dict):
+        with self._lock:
+            self._seq += 1
+            ev["seq"] = self._seq
+            self._write(ev)
+            self._outstanding[ev["ev_id"]] = ev
+
+    def ack(self, ev_ids):
+        with self._lock:
+            self._write({"ack": list(ev_ids)})
+            for ev_id in ev_ids:
+                self._outstanding.pop(ev_id, None)
+            if not self._outstanding and self._fp.tell() > JOURNAL_COMPACT_BYTES:
+                self._fp.truncate(0)
+                self._fp.seek(0)
+
+    def reject(self, ev: dict, reason: str):
+        """DB 가 받지 않는 이벤트(데이터 오류)를 격리 파일로 옮기고 ack — 재생 대상에서 뺀다."""
+        with self._lock:
+            with open(JOURNAL_REJECT_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(dict(ev, reason=reason), ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        self.ack([ev["ev_id"]])
+
+    def is_outstanding(self, ev_id: str) -> bool:
+        with self._lock:
+            return ev_id in self._outstanding
+
+    def pending(self):
+        with self._lock:
+            return sorted(self._outstanding.values(), key=lambda ev: ev["seq"])
+
+    def close(self):
+        with self._lock:
+            try:
+                self._fp.close()
+            except Exception:
+                pass
+
+
+class AccessLogWriter(QThread):
+    """
+    access_log 쓰기 전용 스레드 (GUI 스레드와 별도 DB 연결 사용).
+    큐에서 이벤트를 JOURNAL_FLUSH_MS 동안 모아 다중 행 INSERT 1회 + 일별 요약 갱신을
+    하나의 트랜잭션으로 반영하고, 성공하면 저널에 ack 를 남긴다.
+    연결이 끊기면 DB_RETRY_SECS 뒤 재연결하고 저널의 미반영 이벤트를 다시 보낸다(ev_id 로 중복 방지).
+    행 단위 오류(is_row_error)는 재시도해도 같으므로 배치를 한 건씩 나눠
+    문제 이벤트만 JOURNAL_REJECT_PATH 로 격리하고 나머지는 반영한다.
+    그 밖의 오류(테이블/컬럼 없음, 권한, 읽기 전용 리더로 failover 등)는 서버 쪽 문제 → 저널에 둔 채 재시도.
+    """
+    # 이벤트 한 건 때문에 나는 오류 번호: 1406 너무 긴 값, 1048 NULL 불가, 1366 잘못된 문자열/숫자 값,
+    # 1452 외래 키 없음, 1264 범위 밖, 1292 잘못된 날짜/시각
+    ROW_ERRNOS = {1406, 1048, 1366, 1452, 1264, 1292}
+    flushed = pyqtSignal(int)          # 반영된 이벤트 수
+    connection_changed = pyqtSignal(bool)
+    users_fetched = pyqtSignal(object, object)   # (users 변경 행, 서버 NOW()) — UserDirectory.apply 로 반영
+
+    def __init__(self, journal: AccessJournal, parent=None):
+        super().__init__(parent)
+        self.journal = journal
+        self.q = queue.Queue(maxsize=JOURNAL_QUEUE_MAX)
+        self._replay = threading.Event()
+        self._replay.set()   # 시작 시 이전 실행의 미반영분부터
+        # users 변경분 조회도 이 스레드의 연결로 (GUI 스레드에서 RDS 왕복 안 함).
+        # GUI 가 반영 후 워터마크를 돌려 넣는다 — 그 전에 한 번 더 읽어도 겹쳐 읽을 뿐.
+        self.users_watermark = None
+        self._next_users_sync = time.monotonic() + USERS_SYNC_MS / 1000.0
+
+    def enqueue(self, ev: dict):
+        try:
+            self.q.put_nowait(ev)
+        except queue.Full:
+            # 저널에는 이미 기록됨 → 다음 루프에서 저널 재생으로 반영
+            self._replay.set()
+
+    def stop(self):
+        self.requestInterruption()
+
+    def _collect(self, pending: dict):
+        timeout = 0 if pending else 0.5
+        try:
+            ev = self.q.get(timeout=timeout) if timeout else self.q.get_nowait()
+        except queue.Empty:
+            return
+        deadline = time.monotonic() + JOURNAL_FLUSH_MS / 1000.0
+        while True:
+            if self.journal.is_outstanding(ev["ev_id"]):   # 재생으로 이미 반영된 건 건너뜀
+                pending[ev["ev_id"]] = ev
+            if len(pending) >= JOURNAL_BATCH_MAX:
+                return
+            remain = deadline - time.monotonic()
+            if remain <= 0:
+                return
+            try:
+                ev = self.q.get(timeout=remain)
+            except queue.Empty:
+                return
+
+    def _flush(self, db, batch, check_existing: bool) -> int:
+        cur = db.cursor()
+        try:
+            db.start_transaction()
+            if check_existing:
+                ph = ",".join(["%s"] * len(batch))
+                cur.execute(f"SELECT ev_id FROM access_log WHERE ev_id IN ({ph})",
+                            [ev["ev_id"] for ev in batch])
+                done = {r[0] for r in cur.fetchall()}
+                batch = [ev for ev in batch if ev["ev_id"] not in done]
+
+            # access_log 는 IN/OUT 만 (이전 저널의 FIRST_IN/LAST_OUT 도 여기서 정규화)
+            rows = [(ev["uid"], ev["name"], ev["company"], ev["ts"], canonical_action(ev["action"]), ev["ev_id"],
+                     ev.get("door"))
+                    for ev in batch]
+            if rows:
+                values = ",".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(rows))
+                cur.execute(
+                    "INSERT INTO access_log (uid, name, company, ts, action, ev_id, door_id) "
+                    f"VALUES {values} ON DUPLICATE KEY UPDATE id=id",
+                    [v for r in rows for v in r]
+                )
+
+            # 같은 트랜잭션에서 일별 요약 갱신
+            by_day = {}
+            for r in rows:
+                by_day.setdefault(r[3][:10], set()).add(r[0])
+            for day, uids in by_day.items():
+                refresh_daily_attendance(cur, day, uids)
+                refresh_daily_owners(cur, day)
+            db.commit()
+            return len(rows)
+        finally:
+            cur.close()
+
+    @classmethod
+    def is_row_error(cls, e) -> bool:
+        if isinstance(e, (mysql.connector.errors.DataError, mysql.connector.errors.IntegrityError)):
+            return True
+        return isinstance(e, mysql.connector.Error) and e.errno in cls.ROW_ERRNOS
+
+    def _poll_users(self, db):
+        if time.monotonic() < self._next_users_sync:
+            return
+        self._next_users_sync = time.monotonic() + USERS_SYNC_MS / 1000.0
+        try:
+            rows, server_now = UserDirectory.fetch(db, self.users_watermark)
+        except Exception as e:
+            print("[WRITER][WARN] users 동기화 조회 실패:", e)
+            return
+        if rows or self.users_watermark is None:
+            self.users_fetched.emit(rows, server_now)
+
+    def _wait_retry(self):
+        for _ in range(int(DB_RETRY_SECS * 10)):
+            if self.isInterruptionRequested():
+                break
+            self.msleep(100)
+
+    def _flush_each(self, db, batch, check_existing: bool):
+        """데이터 오류가 난 배치를 한 건씩 반영. 반영/격리된 ev_id 목록과 반영 수를 돌려준다.
+        행 단위가 아닌 오류는 그대로 올려 보내 재연결/재시도 경로를 탄다."""
+        done, n = [], 0
+        for ev in batch:
+            try:
+                n += self._flush(db, [ev], check_existing)
+                self.journal.ack([ev["ev_id"]])
+            except Exception as e:
+                if not self.is_row_error(e):
+                    raise
+                try:
+                    db.rollback()
+                except Exception:
+                    pass
+                print(f"[WRITER][ERROR] rejected event {ev.get('ev_id')} ({ev.get('uid')} {ev.get('ts')}): {e}")
+                self.journal.reject(ev, str(e))
+            done.append(ev["ev_id"])
+        return done, n
+
+    def run(self):
+        print("[WRITER] start")
+        db = None
+        pending = {}              # ev_id -> event
+        check_existing = False
+        while not self.isInterruptionRequested():
+            self._collect(pending)
+
+            if db is None:
+                try:
+                    db = connect_db()
+                    self._replay.set()
+                    self.connection_changed.emit(True)
+                except Exception as e:
+                    print("[WRITER][WARN] DB connect failed:", e)
+                    self._wait_retry()
+                    continue
+
+            self._poll_users(db)
+
+            if self._replay.is_set():
+                self._replay.clear()
+                for ev in self.journal.pending():
+                    pending.setdefault(ev["ev_id"], ev)
+                check_existing = True
+
+            if not pending:
+                check_existing = False
+                continue
+
+            batch = sorted(pending.values(), key=lambda ev: ev["seq"])[:JOURNAL_BATCH_MAX]
+            try:
+                try:
+                    n = self._flush(db, batch, check_existing)
+                    ids = [ev["ev_id"] for ev in batch]
+                    self.journal.ack(ids)
+                except Exception as e:
+                    if not self.is_row_error(e):
+                        raise
+                    print(f"[WRITER][WARN] batch of {len(batch)} rejected ({e}), retrying one by one")
+                    db.rollback()
+                    ids, n = self._flush_each(db, batch, check_existing)
+            except Exception as e:
+                # 연결/서버 오류: 연결을 버리고 잠시 뒤 재연결 (배치는 저널에 남는다)
+                print("[WRITER][ERROR] flush failed:", e)
+                try:
+                    db.rollback()
+                    db.close()
+                except Exception:
+                    pass
+                db = None
+                self.connection_changed.emit(False)
+                self._wait_retry()
+                continue
+
+            for ev_id in ids:
+                pending.pop(ev_id, None)
+            self.flushed.emit(n)
+
+        try:
+            if db is not None:
+                db.close()
+        except Exception:
+            pass
+        print("[WRITER] stop")
+
+
 # ==========================
 #  BOOKED 예약 조회 다이얼로그
 # ==========================
@@ -208,6 +1416,479 @@ class ReservationViewer(QDialog):
         self.table.resizeColumnsToContents()
 
 
+# ==========================
+#  화면 갱신 스케줄러 (합치기 + 보일 때만)
+# ==========================
+class RefreshScheduler(QObject):
+    """
+    뷰 이름별로 dirty 표시만 받아 두었다가, 뷰마다 min_interval 에 한 번, 보이는 뷰만 다시 그린다.
+    숨겨진 뷰는 dirty 로 남겨 두고 show_changed() 로 보이게 될 때 한 번 갱신한다.
+    출근 러시처럼 태깅이 몰려도 요청 수와 상관없이 전체 재조회 횟수는 간격으로 묶인다.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._views = {}     # name -> (fn, is_visible, interval_s)
+        self._dirty = set()
+        self._last_run = {}  # name -> monotonic
+        self.stats = {}      # name -> {requested, merged, skipped, ran}
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._drain)
+
+    def register(self, name: str, fn, is_visible=None, min_interval_ms: int = 1000):
+        self._views[name] = (fn, is_visible, min_interval_ms / 1000.0)
+        self._last_run[name] = 0.0
+        self.stats[name] = dict(requested=0, merged=0, skipped=0, ran=0)
+
+    def mark_dirty(self, *names):
+        """갱신 요청. 실제 재그리기는 이벤트 루프에서 간격에 맞춰 일어난다."""
+        for name in names or tuple(self._views):
+            st = self.stats[name]
+            st["requested"] += 1
+            if name in self._dirty:
+                st["merged"] += 1
+            self._dirty.add(name)
+        self._schedule()
+
+    def show_changed(self, name: str):
+        """뷰가 보이게 됐을 때 호출. 쌓인 dirty 가 있으면 간격을 무시하고 바로 갱신."""
+        if name in self._dirty:
+            self._last_run[name] = 0.0
+            self._schedule()
+
+    def mark_clean(self, name: str):
+        """방금 직접 갱신한 뷰의 dirty 를 지운다."""
+        self._dirty.discard(name)
+        self._last_run[name] = time.monotonic()
+
+    def _is_visible(self, name):
+        vis = self._views[name][1]
+        try:
+            return True if vis is None else bool(vis())
+        except RuntimeError:
+            return False   # 위젯이 이미 파괴됨
+
+    def _schedule(self):
+        now = time.monotonic()
+        wait = None
+        for name in self._dirty:
+            if not self._is_visible(name):
+                continue
+            due = self._last_run[name] + self._views[name][2] - now
+            wait = due if wait is None else min(wait, due)
+        if wait is None:
+            return
+        ms = max(0, int(wait * 1000))
+        if not self._timer.isActive() or self._timer.remainingTime() > ms:
+            self._timer.start(ms)
+
+    def _drain(self):
+        now = time.monotonic()
+        for name in list(self._views):          # 등록 순서대로
+            if name not in self._dirty:
+                continue
+            fn, _, interval = self._views[name]
+            if not self._is_visible(name):
+                self.stats[name]["skipped"] += 1
+                continue                        # dirty 유지 → 보일 때 갱신
+            if now - self._last_run[name] < interval:
+                continue
+            self._dirty.discard(name)
+            self._last_run[name] = now
+            self.stats[name]["ran"] += 1
+            try:
+                fn()
+            except Exception as e:
+                print(f"[REFRESH][ERROR] {name}: {e}")
+        self._schedule()
+
+    def summary(self) -> str:
+        return " ".join(
+            f"{n}(req={s['requested']} ran={s['ran']} merged={s['merged']} skipped={s['skipped']})"
+            for n, s in self.stats.items()
+        )
+
+
+# ==========================
+#  근태 관리 테이블 모델 (페이지 단위 지연 로딩)
+# ==========================
+class AttendanceModel(QAbstractTableModel):
+    """
+    daily_attendance 를 (date DESC, name, uid) 키셋 페이지로 읽는 모델.
+    스크롤이 끝에 닿을 때만 fetchMore 로 다음 페이지를 가져오므로 이력이 길어도 여는 비용은 한 페이지분.
+    편집은 setData → on_edit(uid, date, col, text) 콜백으로 넘긴다 (받아들인 정규화 텍스트 반환 시 반영, None 이면 거부).
+    다음 페이지 키셋 커서는 DB 에서 읽은 원래 값으로 따로 둔다 (일괄 편집으로 화면 행의 이름/날짜가 바뀌어도 안 흔들림).
+    """
+    HEADERS = ["UID", "이름", "회사", "날짜", "출근시간", "퇴근시간"]
+    STAR = " ★"
+    NAME_EXPR = "COALESCE(NULLIF(u.name,''), 'Unknown')"
+
+    def __init__(self, db, fmt_time, on_edit=None, page_size=200, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.fmt_time = fmt_time
+        self.on_edit = on_edit
+        self.page_size = page_size
+        self.date_from = None
+        self.date_to = None
+        self._rows = []          # [uid, name, company, date, first_in, last_out, first_owner, last_owner]
+        self._cursor = None      # 마지막으로 읽은 행의 원래 키 (uid, name, date, 그 날짜에서 읽은 행 수)
+        self._exhausted = True
+        self._marked = set()     # 일괄 편집에서 삭제 예정인 행 번호
+
+    # ----- 조회 -----
+    def set_range(self, date_from: str, date_to: str):
+        self.date_from, self.date_to = date_from, date_to
+        self.reload()
+
+    def reload(self, keep_rows: bool = False):
+        """처음부터 다시 읽는다. keep_rows 면 지금까지 펼친 행 수만큼은 다시 채운다."""
+        if self.date_from is None:
+            return
+        want = len(self._rows) if keep_rows else 0
+        self.beginResetModel()
+        self._rows = []
+        self._cursor = None
+        self._marked = set()
+        self._exhausted = False
+        try:
+            self._rows.extend(self._fetch_page())
+            while not self._exhausted and len(self._rows) < want:
+                self._rows.extend(self._fetch_page())
+        except Exception as e:
+            print("[DB][ERROR] attendance page:", e)
+            self._exhausted = True
+        finally:
+            self.endResetModel()
+
+    def _fetch_page(self):
+        if self._exhausted:
+            return []
+        name = self.NAME_EXPR
+        cur = self.db.cursor()
+        try:
+            hi = self.date_to
+            consumed = 0
+            if self._cursor:
+                k_uid, k_name, k_date, consumed = self._cursor
+                hi = k_date
+
+            # 이번 페이지가 닿을 가장 오래된 날짜: PK(date, uid)를 역순으로 page_size 개만 훑는다
+            cur.execute(
+                "SELECT date FROM daily_attendance WHERE date BETWEEN %s AND %s "
+                "ORDER BY date DESC LIMIT 1 OFFSET %s",
+                (self.date_from, hi, consumed + self.page_size)
+            )
+            r = cur.fetchall()
+            lo = r[0][0].isoformat() if r else self.date_from
+
+            sql = f"""
+                SELECT d.uid,
+                       {name}                                    AS name,
+                       COALESCE(NULLIF(u.company,''), 'Unknown') AS company,
+                       d.date,
+                       TIME(d.first_in),
+                       TIME(d.last_out),
+                       d.first_owner,
+                       d.last_owner
+                  FROM daily_attendance d
+                  LEFT JOIN users u ON u.uid = d.uid
+                 WHERE d.date BETWEEN %s AND %s
+            """
+            params = [lo, hi]
+            if self._cursor:
+                sql += f" AND (d.date < %s OR (d.date = %s AND ({name} > %s OR ({name} = %s AND d.uid > %s))))"
+                params += [k_date, k_date, k_name, k_name, k_uid]
+            sql += " ORDER BY d.date DESC, name ASC, d.uid ASC LIMIT %s"
+            cur.execute(sql, params + [self.page_size])
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+
+        if len(rows) < self.page_size:
+            self._exhausted = True
+        if rows:
+            uid, nm, d = rows[-1][0], rows[-1][1], rows[-1][3].isoformat()
+            same = sum(1 for r in rows if r[3].isoformat() == d)
+            if self._cursor and self._cursor[2] == d:
+                same += self._cursor[3]
+            self._cursor = (uid, nm, d, same)
+        return [
+            [uid or "", nm or "", company or "", d.isoformat() if d else "",
+             self.fmt_time(fi), self.fmt_time(lo_), bool(fo), bool(lo_owner)]
+            for uid, nm, company, d, fi, lo_, fo, lo_owner in rows
+        ]
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        try:
+            rows = self._fetch_page()
+        except Exception as e:
+            print("[DB][ERROR] attendance page:", e)
+            self._exhausted = True
+            return
+        if not rows:
+            return
+        n = len(self._rows)
+        self.beginInsertRows(QModelIndex(), n, n + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def row_key(self, row: int):
+        r = self._rows[row]
+        return r[0], r[3]
+
+    def mark_deleted(self, rows):
+        self._marked.update(rows)
+        for r in rows:
+            self.dataChanged.emit(self.index(r, 0), self.index(r, len(self.HEADERS) - 1))
+
+    # ----- Qt 모델 인터페이스 -----
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        r = self._rows[index.row()]
+        c = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if c == 4 and r[4] and r[6]:
+                return r[4] + self.STAR
+            if c == 5 and r[5] and r[7]:
+                return r[5] + self.STAR
+            return r[c]
+        if role == Qt.ItemDataRole.EditRole:
+            return r[c]
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignCenter
+        if index.row() in self._marked:
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return QColor("gray")
+            if role == Qt.ItemDataRole.FontRole:
+                f = QFont()
+                f.setStrikeOut(True)
+                return f
+        return None
+
+    def flags(self, index):
+        f = super().flags(index)
+        if index.isValid() and index.column() > 0 and index.row() not in self._marked:
+            f |= Qt.ItemFlag.ItemIsEditable
+        return f
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.EditRole or not index.isValid():
+            return False
+        r = self._rows[index.row()]
+        c = index.column()
+        text = ("" if value is None else str(value)).strip()
+        if text == r[c]:
+            return False
+        if self.on_edit is not None:
+            text = self.on_edit(r[0], r[3], c, text)   # 정규화된 값 (예: 9:5 → 09:05:00)
+            if text is None:
+                return False
+        r[c] = text
+        self.dataChanged.emit(index, index)
+        return True
+
+
+# ==========================
+#  근태 일괄 편집 (한 트랜잭션)
+# ==========================
+class AttendanceBatch:
+    """
+    관리 화면 편집/삭제를 모아 두었다가 apply() 한 번에 반영한다.
+      - 삭제: (log_date, uid) 다중 행 DELETE 1회
+      - 이름/회사: users 다중 행 upsert 1회 + access_log 빈 이름/회사 보정 CASE UPDATE
+      - 날짜/출근/퇴근: 대상 (uid, 날짜)의 이벤트를 한 번에 읽어 메모리에서 순서대로 적용한 뒤
+        ts CASE UPDATE / id 목록 DELETE / 다중 행 INSERT 각 1회
+      - 요약 정규화: 영향받은 날짜마다 refresh_daily_attendance + refresh_daily_owners 1회
+    전부 한 트랜잭션이므로 중간에 실패하면 아무것도 반영되지 않는다.
+    키 (uid, 날짜)는 화면에 처음 보였던 날짜 기준 (날짜를 바꾼 행도 같은 키로 이어서 편집됨).
+    """
+
+    def __init__(self):
+        self.ops = []          # [((uid, 원래 날짜), col, text)] — 편집 순서대로
+        self.deletes = set()   # {(uid, 원래 날짜)}
+        self._alias = {}       # (uid, 바뀐 날짜) -> (uid, 원래 날짜)
+
+    def __len__(self):
+        return len(self.ops) + len(self.deletes)
+
+    def key(self, uid: str, d: str):
+        return self._alias.get((uid, d), (uid, d))
+
+    def stage_edit(self, uid: str, d: str, col: int, text: str):
+        k = self.key(uid, d)
+        self.ops.append((k, col, text))
+        if col == 3:
+            self._alias[(uid, text)] = k
+
+    def stage_delete(self, uid: str, d: str):
+        self.deletes.add(self.key(uid, d))
+
+    def clear(self):
+        self.ops.clear()
+        self.deletes.clear()
+        self._alias.clear()
+
+    # ----- 반영 -----
+    def apply(self, db, lookup_user):
+        """lookup_user(uid) -> (name, company). 반영된 (uid, 날짜) 목록을 돌려준다. 실패 시 롤백 후 예외."""
+        names, companies = {}, {}
+        for (uid, _), col, text in self.ops:
+            if col == 1:
+                names[uid] = text
+            elif col == 2:
+                companies[uid] = text
+
+        def staged_user(uid):
+            name, company = lookup_user(uid)
+            return names.get(uid, name), companies.get(uid, company)
+
+        cur = db.cursor()
+        try:
+            db.start_transaction()
+            self._apply_users(cur, names, companies, staged_user)
+            touched = self._apply_days(cur, staged_user)
+
+            by_day = {}
+            for uid, d in touched:
+                by_day.setdefault(d, set()).add(uid)
+            for d, uids in by_day.items():
+                refresh_daily_attendance(cur, d, uids)
+                refresh_daily_owners(cur, d)
+            db.commit()
+            return touched
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            cur.close()
+
+    def _apply_users(self, cur, names, companies, staged_user):
+        uids = sorted(set(names) | set(companies))
+        if not uids:
+            return
+        rows = [(uid, *staged_user(uid)) for uid in uids]
+        cur.execute(
+            "INSERT INTO users (uid, name, company) VALUES "
+            + ",".join(["(%s, %s, %s)"] * len(rows))
+            + " ON DUPLICATE KEY UPDATE name=VALUES(name), company=VALUES(company)",
+            [v for r in rows for v in r]
+        )
+        # 과거 기록 중 이름/회사가 비어 있던 행 보정
+        for col, vals in (("name", names), ("company", companies)):
+            if not vals:
+                continue
+            ph = ",".join(["%s"] * len(vals))
+            cur.execute(
+                f"UPDATE access_log SET {col} = CASE uid " + " ".join(["WHEN %s THEN %s"] * len(vals))
+                + f" ELSE {col} END WHERE uid IN ({ph}) AND ({col} IS NULL OR {col}='' OR {col}='Unknown')",
+                [v for kv in vals.items() for v in kv] + list(vals)
+            )
+
+    def _apply_days(self, cur, lookup_user):
+        touched = set(self.deletes)
+        if self.deletes:
+            dels = sorted(self.deletes)
+            cur.execute(
+                "DELETE FROM access_log WHERE (log_date, uid) IN ("
+                + ",".join(["(%s, %s)"] * len(dels)) + ")",
+                [v for uid, d in dels for v in (d, uid)]
+            )
+
+        day_ops = [(k, col, text) for k, col, text in self.ops if col in (3, 4, 5) and k not in self.deletes]
+        if not day_ops:
+            return sorted(touched)
+        keys = sorted({k for k, _, _ in day_ops})
+
+        # 대상 (uid, 날짜)의 이벤트를 한 번에 읽는다
+        cur.execute(
+            "SELECT id, uid, log_date, action, ts FROM access_log WHERE (log_date, uid) IN ("
+            + ",".join(["(%s, %s)"] * len(keys)) + ")",
+            [v for uid, d in keys for v in (d, uid)]
+        )
+        events = {k: [] for k in keys}   # k -> [{"id", "canon", "ts"}] (id None = 새로 넣을 이벤트)
+        for eid, uid, d, action, ts in cur.fetchall():
+            events[(uid, d.isoformat())].append({"id": eid, "canon": canonical_action(action), "ts": ts})
+        orig_ts = {ev["id"]: ev["ts"] for evs in events.values() for ev in evs}
+        removed = set()
+        cur_date = {k: k[1] for k in keys}
+
+        def boundary(evs, canon):
+            cand = [ev for ev in evs if ev["canon"] == canon]
+            if not cand:
+                return None
+            return min(cand, key=lambda ev: ev["ts"]) if canon == "IN" else max(cand, key=lambda ev: ev["ts"])
+
+        for k, col, text in day_ops:
+            evs = events[k]
+            if col == 3:
+                for canon in ("IN", "OUT"):
+                    ev = boundary(evs, canon)
+                    if ev is not None:
+                        ev["ts"] = datetime.strptime(f"{text} {ev['ts']:%H:%M:%S}", "%Y-%m-%d %H:%M:%S")
+                cur_date[k] = text
+                continue
+            canon = "IN" if col == 4 else "OUT"
+            if text == "":
+                removed.update(ev["id"] for ev in evs if ev["canon"] == canon and ev["id"] is not None)
+                evs[:] = [ev for ev in evs if ev["canon"] != canon]
+                continue
+            new_ts = datetime.strptime(f"{cur_date[k]} {text}", "%Y-%m-%d %H:%M:%S")
+            ev = boundary(evs, canon)
+            if ev is not None:
+                ev["ts"] = new_ts
+            else:
+                evs.append({"id": None, "canon": canon, "ts": new_ts})
+
+        updates, inserts = [], []
+        for (uid, d), evs in events.items():
+            for ev in evs:
+                if ev["id"] is None:
+                    name, company = lookup_user(uid)
+                    inserts.append((uid, name, company, ev["ts"], ev["canon"]))
+                elif ev["ts"] != orig_ts[ev["id"]]:
+                    updates.append((ev["id"], ev["ts"]))
+                else:
+                    continue
+                touched.add((uid, ev["ts"].date().isoformat()))
+            touched.add((uid, d))
+
+        if removed:
+            ids = sorted(removed)
+            cur.execute(f"DELETE FROM access_log WHERE id IN ({','.join(['%s'] * len(ids))})", ids)
+        if updates:
+            cur.execute(
+                "UPDATE access_log SET ts = CASE id " + " ".join(["WHEN %s THEN %s"] * len(updates))
+                + f" END WHERE id IN ({','.join(['%s'] * len(updates))})",
+                [v for u in updates for v in u] + [u[0] for u in updates]
+            )
+        if inserts:
+            cur.execute(
+                "INSERT INTO access_log (uid, name, company, ts, action) VALUES "
+                + ",".join(["(%s, %s, %s, %s, %s)"] * len(inserts)),
+                [v for r in inserts for v in r]
+            )
+        return sorted(touched)
+
+
 # ==========================
 #  메인 다이얼로그
 # ==========================
@@ -217,44 +1898,57 @@ class MyDialog(QDialog, from_class):
         self.setupUi(self)
 
         # 직렬 핸들
-        self.conn = None        # RFID 포트
-        self.recv = None        # RFID 수신 스레드
+        self.rfid_events = queue.Queue()   # (door_id, uid) : 모든 출입문 공용
+        self.rfid = None        # RFID 수신 스레드 (출입문 전체)
         self.hvac_conn = None   # HVAC 포트
-        self.hvac_recv = None   # HVAC 수신 스레드(현재 미사용)
+        self.hvac_recv = None   # HVAC 수신 스레드 (상태 줄 파싱 + 건물 상태 기록)
+        self.hvac_status = None # 마지막 HR 응답 (parse_hvac_status)
 
         # 냉난방 자동 제어 상태
-        self._hvac_enabled_cache = None  # 마지막 보낸 enable 상태
         self._auto_hvac = True           # True면 인원수 기반 자동 HE 전송
+        self.hvac_cmd = HvacCommander(
+            self._serial_send_line,
+            lambda: bool(self.hvac_conn and getattr(self.hvac_conn, "is_open", False)),
+            parent=self,
+        )
 
         # 설정: 중복 태깅 쿨다운(초)
         self.cooldown_secs = 10
 
-        # --- 시리얼 연결(오프라인 허용) ---
-        self.conn = self.try_open_serial()
-        if self.conn:
-            self.recv = Receiver(self.conn, parent=self)
-            self.recv.detected.connect(self.detected)
-            self.recv.start()
-            self.uidLabel.setText("카드 대주세요")
-        else:
-            self.uidLabel.setText("오프라인 모드: 카드 대주세요 (RFID 미연결)")
+        # --- RFID 리더(오프라인 허용): 포트는 수신 스레드가 열고, 끊기면 다시 연다 ---
+        self.rfid = RfidIngest(self._checked_doors(), self.rfid_events, parent=self)
+        self.rfid.events_ready.connect(self.drain_rfid_events)
+        self.rfid.door_state.connect(self.on_door_state)
+        self.uidLabel.setText("오프라인 모드: 카드 대주세요 (RFID 미연결)")
 
-        # HVAC 포트(별도 포트 자동 탐색)
-        self.hvac_conn = self.try_open_hvac_serial(exclude=self.conn.port if self.conn else None)
-        if self.hvac_conn:
-            print(f"[SERIAL] HVAC connected: {self.hvac_conn.port}")
-        else:
-            print("[SERIAL] HVAC not connected (off-line mode)")
+        # HVAC 포트: 감시 스레드가 포트를 식별해 붙여 준다 (그 전까진 off-line)
+        self.serials = SerialSupervisor(self.rfid, parent=self)
+        self.serials.hvac_attached.connect(self.on_hvac_attached)
+        self.serials.hvac_detached.connect(self.on_hvac_detached)
 
         # DB/유저 로드
         self.init_db()
-        self.load_users()  # users → self.users 캐시
+        self.load_users()  # users → self.users 캐시 (이후 쓰기 스레드가 USERS_SYNC_MS 마다 변경분만)
+
+        # 출입 저널 + 쓰기 스레드: 태깅은 저널에 먼저 남기고 DB 반영은 백그라운드에서
+        self.journal = AccessJournal(JOURNAL_PATH)
+        self.writer = AccessLogWriter(self.journal, parent=self)
+        self.writer.flushed.connect(self.on_events_flushed)
+        self.writer.users_fetched.connect(self.on_users_fetched)
+        self.writer.users_watermark = self.users.watermark
+
+        # 출입 상태 원장: 오늘 access_log 를 한 번만 읽고 이후엔 메모리에서 갱신
+        # (변경은 self.occupancy 로만 — 인원 라벨/오늘 출근자 표/HVAC 가 신호를 구독)
+        self.occupancy = OccupancyState(OccupancyLedger(), parent=self)
+        self.ledger = self.occupancy.ledger
+        self.writer.start()
+        self.rfid.start()
+        self.serials.start()
 
         # UI 초기화
         self.current_uid_hex = None
         self.registerButton.setDisabled(True)
         self.registerButton.clicked.connect(self.register_user)
-        self.tableWidget.setVisible(False)
         self.managementButton.clicked.connect(self.toggle_management_view)
 
         # --- guest 버튼 / 방문객 테이블 초기화 ---
@@ -270,20 +1964,31 @@ class MyDialog(QDialog, from_class):
         if gb:
             gb.clicked.connect(self.toggle_guest_view)
 
-        # 테이블 준비 & 초기 로드
-        self._updating_table = False  # 편집 루프 방지
+        # 근태 관리 테이블(모델/뷰) 준비
         self.setup_table()
-        self.tableWidget.itemChanged.connect(self.on_item_changed)
 
         # 오늘 출근자 테이블/라벨
         self.setup_present_table()
+
+        # 화면 갱신 스케줄러: 요청은 dirty 표시만, 실제 조회는 뷰별 간격 + 보일 때만
+        self.refresher = RefreshScheduler(self)
+        self.refresher.register("present", self.refresh_present_table, self.tableWidget_2.isVisible,
+                                min_interval_ms=REFRESH_INTERVAL_MS["present"])
+        self.refresher.register("table", self.refresh_table, self.attendanceView.isVisible,
+                                min_interval_ms=REFRESH_INTERVAL_MS["table"])
+
+        # 재실 상태 구독: 인원이 바뀔 때 한 번씩만 라벨/HVAC, 출근자가 바뀌면 표
+        self.occupancy.count_changed.connect(self.on_headcount_changed)
+        self.occupancy.attendees_changed.connect(lambda: self.refresher.mark_dirty("present"))
+        self.occupancy.load(self.db, self._today_kst(), self.journal.pending())
+        if self.occupancy.count == 0:
+            self.on_headcount_changed(0)   # 0명이면 신호가 없으므로 라벨/HVAC 초기화
         self.refresh_all_views()
 
-        # 실시간 갱신 타이머 (15초)
+        # 날짜 변경 확인 타이머 (15초): 자정이 지나면 원장을 비우고 신호로 알린다
         self.headcount_timer = QTimer(self)
         self.headcount_timer.setInterval(15000)
-        self.headcount_timer.timeout.connect(self.refresh_headcount)
-        self.headcount_timer.timeout.connect(self.refresh_present_table)
+        self.headcount_timer.timeout.connect(lambda: self.occupancy.roll(self._today_kst()))
         self.headcount_timer.start()
 
         # 단축키
@@ -294,6 +1999,12 @@ class MyDialog(QDialog, from_class):
         QShortcut(QKeySequence("Ctrl+1"), self, activated=lambda: self.send_he(True))
         QShortcut(QKeySequence("Ctrl+0"), self, activated=lambda: self.send_he(False))
 
+        # HVAC 상태 요청 (응답은 HvacReader 가 building_system_status 로 기록)
+        self.hvac_poll_timer = QTimer(self)
+        self.hvac_poll_timer.setInterval(HVAC_POLL_MS)
+        self.hvac_poll_timer.timeout.connect(lambda: self.send_hr(quiet=True))
+        self.hvac_poll_timer.start()
+
         # --- mtrcheckButton 클릭 시 BOOKED 예약 창 열기 ---
         self._resv_viewer = None
         btn = getattr(self, "mtrcheckButton", None)
@@ -304,76 +2015,84 @@ class MyDialog(QDialog, from_class):
 
 
     # ---------------- 시리얼 도우미 ----------------
-    def try_open_serial(self, port="/dev/ttyACM0", baudrate=9600):
-        try:
-            s = serial.Serial(port=port, baudrate=baudrate, timeout=1)
-            print(f"[SERIAL] Connected to {s.port} @ {baudrate}")
-            return s
-        except Exception as e:
-            print(f"[SERIAL] 포트 열기 실패: {e} -> 오프라인 모드로 계속 진행")
-            return None
-
-    def try_open_hvac_serial(self, exclude=None, baudrate=9600):
-        """RFID 포트(exclude)를 제외한 다른 ttyACM/ttyUSB를 찾아 HVAC용으로 연다."""
-        try:
-            ports = [p.device for p in lp.comports()]
-            for dev in ports:
-                if exclude and dev == exclude:
-                    continue
-                if "ttyACM" in dev or "ttyUSB" in dev:
-                    try:
-                        s = serial.Serial(port=dev, baudrate=baudrate, timeout=1)
-                        return s
-                    except Exception:
-                        continue
-            return None
-        except Exception as e:
-            print("[SERIAL][HVAC] scan failed:", e)
-            return None
+    def _checked_doors(self) -> dict:
+        """RFID_DOORS 중 access_log.door_id 에 들어가지 않는 이름은 빼고 알린다.
+        (strict 모드에서 모든 INSERT 가 실패하는 것을 시작 시점에 막는다)"""
+        bad = [d for d in RFID_DOORS if not d or len(d) > DOOR_ID_MAX]
+        for d in bad:
+            print(f"[RFID][ERROR] door_id '{d}' 는 1~{DOOR_ID_MAX}자여야 합니다 → 이 리더는 사용하지 않음")
+        if bad:
+            QMessageBox.critical(self, "RFID 설정 오류",
+                                 f"door_id 는 1~{DOOR_ID_MAX}자여야 합니다. 다음 출입문은 사용하지 않습니다:\n"
+                                 + "\n".join(bad))
+        return {d: port for d, port in RFID_DOORS.items() if d not in bad}
 
     def reconnect_serial(self):
-        """F5: 미연결 시 재연결 시도 (이미 실행 중이면 재시작하지 않음)"""
-        if self.conn and getattr(self.conn, "is_open", False):
-            QMessageBox.information(self, "시리얼", "이미 연결되어 있습니다.")
+        """F5: 끊긴 리더/보드 재연결을 바로 시도하게 한다 (열기·식별은 백그라운드, GUI 안 멈춤)"""
+        self.serials.rescan()
+        up = self.rfid.connected_doors()
+        if len(up) == len(self.rfid.doors):
+            QMessageBox.information(self, "시리얼", f"이미 연결되어 있습니다: {', '.join(up)}")
             return
-        self.conn = self.try_open_serial()
-        if self.conn:
-            if self.recv is None:
-                self.recv = Receiver(self.conn, parent=self)
-                self.recv.detected.connect(self.detected)
-                self.recv.start()
-            else:
-                self.recv.conn = self.conn
-                if not self.recv.isRunning():
-                    self.recv.start()
-            self.uidLabel.setText("카드 대주세요 (연결됨)")
-            QMessageBox.information(self, "시리얼", "연결 성공")
+        self.rfid.reopen_now()
+        QMessageBox.information(self, "시리얼", "미연결 리더 재연결을 시도합니다. (연결되면 안내 문구가 바뀝니다)")
+
+    def on_door_state(self, door_id: str, connected: bool):
+        up = self.rfid.connected_doors()
+        if up:
+            self.uidLabel.setText("카드 대주세요" + (f" ({len(up)}/{len(self.rfid.doors)} 리더)" if len(self.rfid.doors) > 1 else ""))
         else:
-            QMessageBox.warning(self, "시리얼", "연결 실패 (오프라인 모드 유지)")
+            self.uidLabel.setText("오프라인 모드: 카드 대주세요 (RFID 미연결)")
+
+    def on_hvac_attached(self, ser):
+        self.hvac_conn = ser
+        self.hvac_recv = HvacReader(ser, parent=self)
+        self.hvac_recv.status_rx.connect(self.on_hvac_status)
+        self.hvac_recv.line_rx.connect(self.hvac_cmd.on_line)
+        self.hvac_recv.start()
+        # 보드가 리셋됐으므로 실제 상태부터 다시 확인 (HR) 후 필요하면 HE
+        self.hvac_cmd.reset()
+        self._maybe_send_hvac_by_occupancy(self.occupancy.count)
+
+    def on_hvac_detached(self, port: str):
+        if self.hvac_conn is not None and self.hvac_conn.port == port:
+            self.hvac_conn = None
+            if self.hvac_recv is not None:
+                self.hvac_recv.stop()   # 포트가 닫혀 곧 빠져나옴 (남은 스냅샷은 기록 후 종료)
+                self.hvac_recv = None
+            self.hvac_status = None
+            self.hvac_cmd.reset()
+            print("[SERIAL] HVAC not connected (off-line mode)")
+
+    def on_hvac_status(self, snap: dict):
+        self.hvac_status = snap
+        self.hvac_cmd.on_status(snap)
 
     # -------- HVAC 직렬 명령 --------
-    def _serial_send_line(self, text: str):
+    def _serial_send_line(self, text: str, quiet: bool = False):
         ser = None
         if self.hvac_conn and getattr(self.hvac_conn, "is_open", False):
             ser = self.hvac_conn
-        elif self.conn and getattr(self.conn, "is_open", False):
-            ser = self.conn
         else:
-            print("[SERIAL] not connected; skip:", text)
-            return
+            if not quiet:
+                print("[SERIAL] not connected; skip:", text)
+            return False
         try:
             # 개행 정정: '\r\n'
             ser.write((text + "\r\n").encode("utf-8"))
-            print(f"[TX] {text} -> {ser.port}")
+            if not quiet:
+                print(f"[TX] {text} -> {ser.port}")
+            return True
         except Exception as e:
             print("[SERIAL][ERROR] write:", e)
+            return False
 
     def send_he(self, enable: bool):
-        self._serial_send_line(f"HE {'1' if enable else '0'}")
-        self._hvac_enabled_cache = enable
+        """수동 HE (Ctrl+1/0). 응답 확인/재전송은 스케줄러가 처리."""
+        self.hvac_cmd.force(enable)
 
-    def send_hr(self):
-        self._serial_send_line("HR")
+    def send_hr(self, quiet: bool = False):
+        self._serial_send_line("HR", quiet=quiet)
 
     # ---------------- 공통 유틸 ----------------
     def _td_to_hms(self, val) -> str:
@@ -414,27 +2133,9 @@ class MyDialog(QDialog, from_class):
                 continue
         return None
 
-    def _combine_date_time(self, date_str: str, time_str: str) -> datetime:
-        dt = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M:%S")
-        return dt.replace(tzinfo=None)
-
-    def _canonical_action(self, action: str) -> str:
-        if action in ("IN", "FIRST_IN"):
-            return "IN"
-        if action in ("OUT", "LAST_OUT"):
-            return "OUT"
-        return action
-
     # ---------------- MySQL 초기화 ----------------
     def init_db(self):
-        self.db = mysql.connector.connect(
-            host="database-1.c1kkeqig4j9x.ap-northeast-2.rds.amazonaws.com",
-            port=3306,
-            user="joeffice_user",
-            password="12345678",
-            database="joeffice",
-            autocommit=True,
-        )
+        self.db = connect_db()
         cur = self.db.cursor()
         cur.execute("""
             CREATE TABLE IF NOT EXISTS access_log (
@@ -482,151 +2183,240 @@ class MyDialog(QDialog, from_class):
             except Exception:
                 pass
 
+        # --- 스키마 보강: 저널 이벤트 ID (재전송 시 중복 방지) ---
+        cur = self.db.cursor()
+        if not self._column_exists(cur, "access_log", "ev_id"):
+            cur.execute("ALTER TABLE access_log ADD COLUMN ev_id CHAR(32) NULL")
+        if not self._index_exists(cur, "access_log", "uq_ev_id"):
+            cur.execute("ALTER TABLE access_log ADD UNIQUE INDEX uq_ev_id (ev_id)")
+
+        # --- 스키마 보강: 방문객 만료 비활성화 (active + 범위 인덱스) ---
+        if not self._column_exists(cur, "users", "active"):
+            cur.execute("ALTER TABLE users ADD COLUMN active TINYINT(1) NOT NULL DEFAULT 1")
+        if not self._index_exists(cur, "users", "idx_class_active_valid"):
+            cur.execute("ALTER TABLE users ADD INDEX idx_class_active_valid (class, active, valid_until)")
+
+        # --- 스키마 보강: 사용자 변경분 동기화(updated_at 워터마크)용 인덱스 ---
+        if not self._index_exists(cur, "users", "idx_updated_at"):
+            cur.execute("ALTER TABLE users ADD INDEX idx_updated_at (updated_at)")
+
+        # --- 스키마 보강: 출입문 (RFID_DOORS 의 door_id, 예전 행은 NULL) ---
+        if not self._column_exists(cur, "access_log", "door_id"):
+            cur.execute(f"ALTER TABLE access_log ADD COLUMN door_id VARCHAR({DOOR_ID_MAX}) NULL")
+
+        # --- 스키마 보강: 날짜 생성 컬럼 + 복합 인덱스 ---
+        # DATE(ts)=%s 는 인덱스를 못 타므로 모든 '하루' 조회는 log_date 로 한다.
+        if not self._column_exists(cur, "access_log", "log_date"):
+            cur.execute("ALTER TABLE access_log ADD COLUMN log_date DATE AS (DATE(ts)) STORED")
+        if not self._index_exists(cur, "access_log", "idx_date_uid_ts"):
+            cur.execute("ALTER TABLE access_log ADD INDEX idx_date_uid_ts (log_date, uid, ts)")
+        if not self._index_exists(cur, "access_log", "idx_date_action"):
+            cur.execute("ALTER TABLE access_log ADD INDEX idx_date_action (log_date, action, ts)")
+
+        # --- 건물 상태: 최신 1행(adminGUI 가 읽음) + 이력 ---
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS building_system_status (
+                building_id INT PRIMARY KEY,
+                hvac_on TINYINT(1) NOT NULL DEFAULT 0,
+                light_on TINYINT(1) NOT NULL DEFAULT 0,
+                temp_c DECIMAL(4,1) NULL,
+                hum_pct DECIMAL(4,1) NULL,
+                state VARCHAR(16) NULL,
+                mode VARCHAR(8) NULL,
+                updated_at DATETIME NULL
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """)
+        # --- 스키마 보강: adminGUI 가 먼저 만든 building_system_status 에는 텔레메트리 컬럼이 없을 수 있다 ---
+        for col, ddl in (
+            ("hvac_on", "TINYINT(1) NOT NULL DEFAULT 0"),
+            ("light_on", "TINYINT(1) NOT NULL DEFAULT 0"),
+            ("temp_c", "DECIMAL(4,1) NULL"),
+            ("hum_pct", "DECIMAL(4,1) NULL"),
+            ("state", "VARCHAR(16) NULL"),
+            ("mode", "VARCHAR(8) NULL"),
+            ("updated_at", "DATETIME NULL"),
+        ):
+            if not self._column_exists(cur, "building_system_status", col):
+                cur.execute(f"ALTER TABLE building_system_status ADD COLUMN {col} {ddl}")
+        # 텔레메트리 upsert(ON DUPLICATE KEY)가 행을 덮어쓰려면 building_id 로 시작하는 유일 키가 필요
+        cur.execute("""
+            SELECT 1 FROM INFORMATION_SCHEMA.STATISTICS
+             WHERE TABLE_SCHEMA=%s AND TABLE_NAME='building_system_status'
+               AND COLUMN_NAME='building_id' AND SEQ_IN_INDEX=1 AND NON_UNIQUE=0
+             LIMIT 1
+        """, (DB_CFG["database"],))
+        if cur.fetchone() is None:
+            try:
+                cur.execute("ALTER TABLE building_system_status ADD UNIQUE INDEX uq_building_id (building_id)")
+            except Exception as e:
+                print("[DB][WARN] building_system_status.building_id 유일 키 추가 실패 (중복 행?):", e)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS building_status_history (
+                id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                building_id INT NOT NULL,
+                ts DATETIME NOT NULL,
+                temp_c DECIMAL(4,1) NULL,
+                hum_pct DECIMAL(4,1) NULL,
+                hvac_on TINYINT(1) NOT NULL,
+                light_on TINYINT(1) NOT NULL,
+                state VARCHAR(16) NULL,
+                mode VARCHAR(8) NULL,
+                INDEX idx_building_ts (building_id, ts)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """)
+
+        # --- 일별 근태 요약: 관리 화면은 이 테이블만 읽는다 ---
+        cur.execute("""
+            SELECT 1 FROM INFORMATION_SCHEMA.TABLES
+             WHERE TABLE_SCHEMA=%s AND TABLE_NAME='daily_attendance'
+        """, (DB_CFG["database"],))
+        had_summary = cur.fetchone() is not None
+        ensure_daily_table(cur)
+        if not had_summary:
+            print("[INFO] daily_attendance 새로 생성 → access_log 에서 채움 (access_admin.py rebuild-daily 와 동일)")
+            insert_daily_rows(cur)
+            cur.execute("SELECT MIN(log_date), MAX(log_date) FROM access_log")
+            lo, hi = cur.fetchone()
+            if lo is not None:
+                update_day_owners(cur, lo, hi + timedelta(days=1))
+
+        # --- 아카이브 경계: 이 날짜 이전 원본은 access_admin.py archive 로 DB 밖에 있다 ---
+        self.archived_before = None
+        cur.execute("""
+            SELECT 1 FROM INFORMATION_SCHEMA.TABLES
+             WHERE TABLE_SCHEMA=%s AND TABLE_NAME='access_archive'
+        """, (DB_CFG["database"],))
+        if cur.fetchone() is not None:
+            cur.execute("SELECT MAX(month) FROM access_archive")
+            last = cur.fetchone()[0]
+            if last:
+                y, m = map(int, last.split("-"))
+                self.archived_before = date(y + m // 12, m % 12 + 1, 1).isoformat()
+                print(f"[INFO] {self.archived_before} 이전 출입 원본은 아카이브됨 (근태 요약만 표시, 편집 불가)")
+        cur.close()
+
+    def _is_archived(self, d: str) -> bool:
+        """원본 이벤트가 아카이브된 날짜 — 여기서 요약을 다시 계산하면 행이 사라지므로 편집/삭제 금지."""
+        return bool(self.archived_before) and d < self.archived_before
+
+    def _column_exists(self, cur, table, col):
+        cur.execute("""
+            SELECT 1 FROM INFORMATION_SCHEMA.COLUMNS
+             WHERE TABLE_SCHEMA=%s AND TABLE_NAME=%s AND COLUMN_NAME=%s
+             LIMIT 1
+        """, (DB_CFG["database"], table, col))
+        return cur.fetchone() is not None
+
+    def _index_exists(self, cur, table, index_name):
+        cur.execute("""
+            SELECT 1 FROM INFORMATION_SCHEMA.STATISTICS
+             WHERE TABLE_SCHEMA=%s AND TABLE_NAME=%s AND INDEX_NAME=%s
+             LIMIT 1
+        """, (DB_CFG["database"], table, index_name))
+        return cur.fetchone() is not None
+
     # ---------------- 사용자 로드 ----------------
     def load_users(self):
-        self.users = {}
+        self.visitors = VisitorExpiry()
+        self.users = UserDirectory(self.visitors)
         self.users_csv_path = os.path.join(os.path.dirname(__file__), "users.csv")
         try:
-            cur = self.db.cursor()
-            cur.execute("SELECT uid, name, company FROM users")
-            for uid, name, company in cur.fetchall():
-                if uid:
-                    self.users[uid.strip().lower()] = (name or "", company or "")
-            cur.close()
+            self.users.sync(self.db)
         except Exception as e:
             print("[WARN] users 로드 실패:", e)
 
-        # (선택) CSV → DB 백필
-        if not self.users and os.path.exists(self.users_csv_path):
-            print("[INFO] users 비어있음 → users.csv에서 로드 후 DB 반영")
-            import_rows = []
-            with open(self.users_csv_path, "r", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    uid = (row.get("uid_hex") or "").strip().lower()
-                    name = (row.get("name") or "").strip()
-                    company = (row.get("company") or "").strip()
-                    if uid:
-                        self.users[uid] = (name, company)
-                        import_rows.append((uid, name, company))
-            if import_rows:
-                cur = self.db.cursor()
-                cur.executemany(
-                    "INSERT INTO users(uid, name, company) VALUES (%s, %s, %s) "
-                    "ON DUPLICATE KEY UPDATE name=VALUES(name), company=VALUES(company)",
-                    import_rows
-                )
-                cur.close()
+        # CSV 백필은 GUI 밖에서: 대량 가져오기가 화면을 멈추지 않도록
+        if not len(self.users) and os.path.exists(self.users_csv_path):
+            print(f"[INFO] users 비어있음 → python access_admin.py import-users {self.users_csv_path}")
+
+        # 다른 PC 에서 등록/수정한 사용자 반영: 쓰기 스레드가 USERS_SYNC_MS 마다 조회 → on_users_fetched
+
+        # 만료 방문객 비활성화 (힙 맨 앞이 지났을 때만 UPDATE)
+        self.visitor_sweep_timer = QTimer(self)
+        self.visitor_sweep_timer.setInterval(VISITOR_SWEEP_MS)
+        self.visitor_sweep_timer.timeout.connect(self.sweep_visitors)
+        self.visitor_sweep_timer.start()
+        self.sweep_visitors()
+
+    def on_users_fetched(self, rows, server_now):
+        """쓰기 스레드가 읽어 온 users 변경분을 캐시에 반영하고 다음 조회 워터마크를 넘겨준다."""
+        n = self.users.apply(rows, server_now)
+        self.writer.users_watermark = self.users.watermark
+        if n:
+            print(f"[USERS] synced {n} changed rows (watermark={self.users.watermark})")
+            self.refresher.mark_dirty("present")   # 출근자 표의 이름/회사
+
+    def sweep_visitors(self):
+        """valid_until 이 지난 방문객을 한 번의 범위 UPDATE 로 active=0 처리."""
+        now = datetime.now(ZoneInfo("Asia/Seoul")).replace(tzinfo=None)
+        nxt = self.visitors.next_expiry()
+        if nxt is None or nxt > now:
+            return
+        # DB 반영이 끝난 뒤에야 힙에서 꺼낸다: 실패하면 그대로 남아 다음 주기에 다시 시도
+        # (그 사이 태깅은 is_denied 가 valid_until 로 이미 막는다)
+        try:
+            cur = self.db.cursor()
+            cur.execute(
+                "UPDATE users SET active=0 WHERE class='방문객' AND active=1 AND valid_until <= %s",
+                (now,)
+            )
+            n = cur.rowcount
+            cur.close()
+        except Exception as e:
+            print("[WARN] 방문객 만료 처리 실패 (다음 주기에 재시도):", e)
+            return
+        keys = self.visitors.pop_expired(now)
+        print(f"[VISITOR] expired {len(keys)} (deactivated {n} rows), active={self.visitors.active_count()}")
+        if hasattr(self, "tableWidget_3") and self.tableWidget_3.isVisible():
+            self.refresh_guest_table()
 
     # ---------------- 출퇴근 기록 ----------------
-    def _is_duplicate_action(self, uid: str, action: str, now_ts: datetime) -> bool:
-        cur = self.db.cursor()
-        cur.execute("SELECT ts, action FROM access_log WHERE uid=%s ORDER BY id DESC LIMIT 1", (uid,))
-        row = cur.fetchone()
-        cur.close()
-        if not row:
-            return False
-        last_ts, last_action = row
-        if self._canonical_action(last_action) != self._canonical_action(action):
-            return False
-        delta = (now_ts - last_ts).total_seconds()
-        return (0 <= delta < self.cooldown_secs)
-
-    def infer_next_action(self, uid_hex: str) -> str:
-        today = date.today().isoformat()
-        cur = self.db.cursor()
-        cur.execute(
-            """
-            SELECT action
-              FROM access_log
-             WHERE uid=%s AND DATE(ts)=%s
-             ORDER BY id DESC
-             LIMIT 1
-            """,
-            (uid_hex, today)
-        )
-        row = cur.fetchone()
-        cur.close()
-        last = self._canonical_action(row[0]) if row else None
-        return "OUT" if last == "IN" else "IN"
-
-    def _normalize_day_flags(self, date_str: str):
-        cur = self.db.cursor()
-        cur.execute("UPDATE access_log SET action='IN'  WHERE DATE(ts)=%s AND action='FIRST_IN'", (date_str,))
-        cur.execute("UPDATE access_log SET action='OUT' WHERE DATE(ts)=%s AND action='LAST_OUT'", (date_str,))
-        cur.execute(
-            """
-            SELECT id FROM access_log
-            WHERE DATE(ts)=%s AND action IN ('IN','FIRST_IN')
-            ORDER BY ts ASC
-            LIMIT 1
-            """,
-            (date_str,)
-        )
-        row = cur.fetchone()
-        if row:
-            cur.execute("UPDATE access_log SET action='FIRST_IN' WHERE id=%s", (row[0],))
-        cur.execute(
-            """
-            SELECT id FROM access_log
-            WHERE DATE(ts)=%s AND action IN ('OUT','LAST_OUT')
-            ORDER BY ts DESC
-            LIMIT 1
-            """,
-            (date_str,)
-        )
-        row = cur.fetchone()
-        if row:
-            cur.execute("UPDATE access_log SET action='LAST_OUT' WHERE id=%s", (row[0],))
-        cur.close()
-
-    def record_event(self, uid_hex: str):
-        name, company = self.users.get(uid_hex, ("Unknown", "Unknown"))
-        action = self.infer_next_action(uid_hex)
+    def record_event(self, uid_hex: str, door_id: str = None):
+        name, company = self.users.get(uid_key(uid_hex), ("Unknown", "Unknown"))
         now_ts = datetime.now(ZoneInfo("Asia/Seoul")).replace(tzinfo=None)
         today = now_ts.date().isoformat()
 
-        if self._is_duplicate_action(uid_hex, action, now_ts):
-            print(f"[SKIP] duplicate {action} for {uid_hex}")
-            return
+        # IN/OUT 판정·중복 판정·인원수는 메모리 원장에서 (DB 조회 없음)
+        led = self.ledger
+        self.occupancy.roll(today)
+        action = led.next_action(uid_hex)
 
-        present_before = self._present_count(today)
-
-        cur = self.db.cursor()
-        cur.execute(
-            "INSERT INTO access_log (uid, name, company, ts, action) VALUES (%s, %s, %s, %s, %s)",
-            (uid_hex, name, company, now_ts, action)
-        )
-        inserted_id = cur.lastrowid
-        cur.close()
+        # 만료된 방문객은 입장 거부 (이미 들어와 있으면 퇴장은 기록)
+        if action == "IN" and self.visitors.is_denied(uid_key(uid_hex), now_ts):
+            self.visitors.denied += 1
+            print(f"[DENY] expired visitor {uid_hex} {name} {company}")
+            self.uidLabel.setText(f"{uid_hex} 방문 기간 만료 — 입장 불가")
+            return
 
-        if action in ("IN", "FIRST_IN"):
-            if present_before == 0:
-                cur = self.db.cursor()
-                cur.execute(
-                    "UPDATE access_log SET action='IN' WHERE DATE(ts)=%s AND action='FIRST_IN'",
-                    (today,)
-                )
-                cur.execute("UPDATE access_log SET action='FIRST_IN' WHERE id=%s", (inserted_id,))
-                cur.close()
-            self._clear_last_out_flag_for_day(today)
-        else:
-            present_after = self._present_count(today)
-            if present_after == 0:
-                self._clear_last_out_flag_for_day(today)
-                cur = self.db.cursor()
-                cur.execute("UPDATE access_log SET action='LAST_OUT' WHERE id=%s", (inserted_id,))
-                cur.close()
-            else:
-                self._clear_last_out_flag_for_day(today)
+        if led.is_duplicate(uid_hex, action, now_ts, self.cooldown_secs):
+            print(f"[SKIP] duplicate {action} for {uid_hex}")
+            return
 
-        print(f"[ATTEND] {now_ts} {uid_hex} {name} {company} -> {action}")
+        # DB 반영은 쓰기 스레드가: 저널에 먼저 남기고(유실 방지) 큐에 넣는다
+        ev = {
+            "ev_id": uuid.uuid4().hex,
+            "uid": uid_hex,
+            "name": name,
+            "company": company,
+            "ts": now_ts.strftime("%Y-%m-%d %H:%M:%S"),
+            "action": action,
+            "door": door_id,
+        }
+        self.journal.append(ev)
+        self.writer.enqueue(ev)
+        self.occupancy.apply(uid_hex, action, now_ts)   # 인원 라벨/HVAC/출근자 표는 신호로 갱신
+
+        flag = ""
+        if action == "IN" and led.first_in_uid == uid_hex and led.present_count() == 1:
+            flag = " (FIRST_IN)"
+        elif action == "OUT" and led.last_out_uid == uid_hex:
+            flag = " (LAST_OUT)"
+        print(f"[ATTEND] {now_ts} [{door_id or '-'}] {uid_hex} {name} {company} -> {action}{flag}")
         self.uidLabel.setText(f"{uid_hex}")
-        self.refresh_all_views()
 
-        # 인원수 기반 HVAC 자동 제어
-        pc = self._present_count(today)
-        self._maybe_send_hvac_by_occupancy(pc)
+    def on_events_flushed(self, n: int):
+        """쓰기 스레드가 access_log 반영을 마친 뒤 화면 갱신."""
+        self.refresh_all_views()
 
     # ---------------- 신규 사용자 등록 ----------------
     def register_user(self):
@@ -635,7 +2425,8 @@ class MyDialog(QDialog, from_class):
             return
         uid_hex = self.current_uid_hex
 
-        if uid_hex in self.users:
+        now = datetime.now(ZoneInfo("Asia/Seoul")).replace(tzinfo=None)
+        if uid_key(uid_hex) in self.users and not self.visitors.is_denied(uid_key(uid_hex), now):
             QMessageBox.information(self, "등록", "이미 등록된 UID입니다.")
             self.registerButton.setDisabled(True)
             return
@@ -674,13 +2465,14 @@ class MyDialog(QDialog, from_class):
             cur = self.db.cursor()
             cur.execute(
                 """
-                INSERT INTO users (uid, name, company, class, valid_until)
-                VALUES (%s, %s, %s, %s, %s)
+                INSERT INTO users (uid, name, company, class, valid_until, active)
+                VALUES (%s, %s, %s, %s, %s, 1)
                 ON DUPLICATE KEY UPDATE
                     name=VALUES(name),
                     company=VALUES(company),
                     class=VALUES(class),
-                    valid_until=VALUES(valid_until)
+                    valid_until=VALUES(valid_until),
+                    active=1
                 """,
                 (uid_hex, name.strip(), company.strip(), klass, valid_until)
             )
@@ -690,7 +2482,8 @@ class MyDialog(QDialog, from_class):
             return
 
         # self.users 캐시는 기존 구조 (name, company) 유지
-        self.users[uid_hex] = (name.strip(), company.strip())
+        self.users.put(uid_key(uid_hex), name.strip(), company.strip())
+        self.visitors.update(uid_key(uid_hex), klass == "방문객", valid_until, True)
 
         # 과거 access_log에 Unknown 보정
         try:
@@ -729,109 +2522,103 @@ class MyDialog(QDialog, from_class):
         self.refresh_all_views()
 
     # ---------------- 카드 감지 콜백 ----------------
-    def detected(self, uid_bytes: bytes):
+    def drain_rfid_events(self):
+        """공용 큐에 쌓인 태깅을 모두 처리 (여러 출입문에서 동시에 들어와도 한 번에)."""
+        while True:
+            try:
+                door_id, uid = self.rfid_events.get_nowait()
+            except queue.Empty:
+                return
+            self.detected(uid, door_id)
+
+    def detected(self, uid_bytes: bytes, door_id: str = None):
         uid_hex = uid_bytes.hex()
-        print("detected:", uid_hex)
+        print(f"detected: {uid_hex} @ {door_id}")
         self.current_uid_hex = uid_hex
 
-        if uid_hex not in self.users:
+        key = uid_key(uid_bytes)
+        if key not in self.users:
             self.registerButton.setDisabled(False)
             self.uidLabel.setText(f"{uid_hex} (미등록) / 태그됨")
         else:
-            self.registerButton.setDisabled(True)
+            # 만료된 방문객은 재등록(기간 연장) 가능
+            now = datetime.now(ZoneInfo("Asia/Seoul")).replace(tzinfo=None)
+            self.registerButton.setDisabled(not self.visitors.is_denied(key, now))
 
-        self.record_event(uid_hex)
+        self.record_event(uid_hex, door_id)
 
     # ---------------- 테이블 구성/조회/갱신 ----------------
     def setup_table(self):
-        tw = self.tableWidget
-        tw.setColumnCount(6)
-        tw.setHorizontalHeaderLabels(["UID", "이름", "회사", "날짜", "출근시간", "퇴근시간"])
-        header = tw.horizontalHeader()
-        header.setStretchLastSection(True)
-        tw.verticalHeader().setVisible(False)
-        try:
-            tw.setEditTriggers(QAbstractItemView.EditTrigger.AllEditTriggers)
-            tw.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
-            tw.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
-        except AttributeError:
-            tw.setEditTriggers(QAbstractItemView.AllEditTriggers)
-            tw.setSelectionBehavior(QAbstractItemView.SelectRows)
-            tw.setSelectionMode(QAbstractItemView.ExtendedSelection)
-        tw.setAlternatingRowColors(True)
-        tw.setSortingEnabled(True)
-
-    def fetch_daily_spans(self):
-        cur = self.db.cursor()
-        cur.execute(
-            """
-            SELECT
-                al.uid,
-                COALESCE(NULLIF(u.name,''), NULLIF(al.name,''), 'Unknown')      AS name,
-                COALESCE(NULLIF(u.company,''), NULLIF(al.company,''), 'Unknown') AS company,
-                DATE(al.ts) AS d,
-                TIME(MIN(CASE WHEN al.action IN ('IN','FIRST_IN')  THEN al.ts END)) AS first_in,
-                TIME(MAX(CASE WHEN al.action IN ('OUT','LAST_OUT') THEN al.ts END)) AS last_out,
-                CASE WHEN al.uid = df.first_uid THEN 1 ELSE 0 END AS is_first_in_owner,
-                CASE WHEN al.uid = dl.last_uid  THEN 1 ELSE 0 END AS is_last_out_owner
-            FROM access_log al
-            LEFT JOIN users u ON u.uid = al.uid
-            LEFT JOIN (
-                SELECT DATE(ts) AS d, uid AS first_uid
-                FROM access_log
-                WHERE action='FIRST_IN'
-            ) df ON df.d = DATE(al.ts)
-            LEFT JOIN (
-                SELECT DATE(ts) AS d, uid AS last_uid
-                FROM access_log
-                WHERE action='LAST_OUT'
-            ) dl ON dl.d = DATE(al.ts)
-            GROUP BY al.uid, DATE(al.ts), df.first_uid, dl.last_uid, u.name, u.company
-            ORDER BY d DESC, name ASC
-            """
-        )
-        rows = cur.fetchall()
-        cur.close()
-        return rows
+        """.ui 의 tableWidget 자리에 페이지 로딩 모델을 쓰는 QTableView + 기간 필터를 올린다."""
+        self.tableWidget.setVisible(False)
+        self.attendanceModel = AttendanceModel(self.db, self._td_to_hms, on_edit=self.on_attendance_edited, parent=self)
+
+        view = self.attendanceView = QTableView(self)
+        view.setGeometry(self.tableWidget.geometry())
+        view.setModel(self.attendanceModel)
+        view.horizontalHeader().setStretchLastSection(True)
+        view.verticalHeader().setVisible(False)
+        view.setEditTriggers(QAbstractItemView.EditTrigger.AllEditTriggers)
+        view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        view.setAlternatingRowColors(True)
+        view.setVisible(False)
+
+        # 기간 필터 (서버 측 WHERE date BETWEEN)
+        today = QDate.currentDate()
+        self.dateFromEdit = QDateEdit(today.addDays(-365), self)
+        self.dateToEdit = QDateEdit(today, self)
+        for w in (self.dateFromEdit, self.dateToEdit):
+            w.setCalendarPopup(True)
+            w.setDisplayFormat("yyyy-MM-dd")
+        self.dateTildeLabel = QLabel("~", self)
+        self.dateFilterButton = QPushButton("조회", self)
+        self.dateFilterButton.clicked.connect(self.apply_date_filter)
+        g = self.tableWidget.geometry()
+        self.dateFromEdit.setGeometry(g.x(), g.y() - 26, 120, 22)
+        self.dateTildeLabel.setGeometry(g.x() + 126, g.y() - 26, 12, 22)
+        self.dateToEdit.setGeometry(g.x() + 140, g.y() - 26, 120, 22)
+        self.dateFilterButton.setGeometry(g.x() + 266, g.y() - 27, 60, 24)
+
+        # 일괄 편집: 켜져 있는 동안 편집/삭제는 모아 두었다가 '적용' 한 번에 한 트랜잭션으로 반영
+        self.batch = AttendanceBatch()
+        self.batchEditButton = QPushButton("일괄 편집", self)
+        self.batchEditButton.setCheckable(True)
+        self.batchEditButton.toggled.connect(self.toggle_batch_edit)
+        self.batchApplyButton = QPushButton("적용 (0)", self)
+        self.batchApplyButton.clicked.connect(self.apply_batch)
+        self.batchCancelButton = QPushButton("취소", self)
+        self.batchCancelButton.clicked.connect(self.cancel_batch)
+        self.batchEditButton.setGeometry(g.x() + 340, g.y() - 27, 80, 24)
+        self.batchApplyButton.setGeometry(g.x() + 426, g.y() - 27, 80, 24)
+        self.batchCancelButton.setGeometry(g.x() + 512, g.y() - 27, 60, 24)
+        self.batchApplyButton.setEnabled(False)
+        self.batchCancelButton.setEnabled(False)
+
+        self._date_filter_widgets = (self.dateFromEdit, self.dateTildeLabel, self.dateToEdit, self.dateFilterButton,
+                                     self.batchEditButton, self.batchApplyButton, self.batchCancelButton)
+        for w in self._date_filter_widgets:
+            w.setVisible(False)
+
+    def apply_date_filter(self):
+        if len(self.batch):
+            QMessageBox.information(self, "조회", "일괄 편집 내용을 먼저 적용하거나 취소하세요.")
+            return
+        d_from = self.dateFromEdit.date().toString("yyyy-MM-dd")
+        d_to = self.dateToEdit.date().toString("yyyy-MM-dd")
+        if d_from > d_to:
+            QMessageBox.information(self, "조회", "시작일이 종료일보다 늦습니다.")
+            return
+        self.attendanceModel.set_range(d_from, d_to)
+        self.refresher.mark_clean("table")
+        self.attendanceView.resizeColumnsToContents()
 
     def refresh_table(self):
-        rows = self.fetch_daily_spans()
-        tw = self.tableWidget
-
-        self._updating_table = True
-        tw.setRowCount(len(rows))
-
-        STAR = " ★"
-
-        for r, (uid, name, company, d, first_in, last_out, is_first_owner, is_last_owner) in enumerate(rows):
-            fi = self._td_to_hms(first_in)
-            lo = self._td_to_hms(last_out)
-            fi_disp = f"{fi}{STAR}" if fi and is_first_owner else fi
-            lo_disp = f"{lo}{STAR}" if lo and is_last_owner else lo
-
-            values = [
-                uid or "",
-                name or "",
-                company or "",
-                str(d) if d else "",
-                fi_disp,
-                lo_disp,
-            ]
-
-            for c, val in enumerate(values):
-                it = QTableWidgetItem(val)
-                it.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                it.setData(Qt.ItemDataRole.UserRole, uid or "")
-                it.setData(Qt.ItemDataRole.UserRole + 1, str(d) if d else "")
-                it.setData(Qt.ItemDataRole.UserRole + 2, val)
-                if c == 0:
-                    it.setFlags(it.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                else:
-                    it.setFlags(it.flags() | Qt.ItemFlag.ItemIsEditable)
-                tw.setItem(r, c, it)
-
-        tw.resizeColumnsToContents()
-        self._updating_table = False
+        if self.attendanceModel.date_from is None:
+            return   # 관리 화면을 한 번도 안 열었으면 읽을 필요 없음
+        if len(self.batch):
+            return   # 적용 전 편집 내용이 화면에 있으므로 다시 읽지 않음 (적용/취소 때 갱신)
+        self.attendanceModel.reload(keep_rows=True)
 
     # ---------------- 방문객 테이블 (tableWidget_3) ----------------
     def setup_guest_table(self):
@@ -893,92 +2680,126 @@ class MyDialog(QDialog, from_class):
             self.refresh_guest_table()
 
     # ---------------- 편집 반영 로직 ----------------
-    def on_item_changed(self, item: QTableWidgetItem):
-        if self._updating_table:
-            return
-
-        row = item.row()
-        col = item.column()
-        new_text = (item.text() or "").strip()
-
-        uid = item.data(Qt.ItemDataRole.UserRole) or ""
-        old_date = item.data(Qt.ItemDataRole.UserRole + 1) or ""
-        old_val = item.data(Qt.ItemDataRole.UserRole + 2) or ""
-
-        if col == 0:
-            return
-
+    def on_attendance_edited(self, uid: str, old_date: str, col: int, new_text: str):
+        """AttendanceModel.setData 에서 호출. 일괄 편집 중이면 모아 두고, 아니면 바로 한 건짜리 트랜잭션으로 반영.
+        받아들인 값(시간은 HH:MM:SS 로 정규화)을 돌려주고, 거부하면 None."""
         try:
-            if col == 1:
-                self._update_user_name(uid, new_text)
-            elif col == 2:
-                self._update_user_company(uid, new_text)
+            if col in (1, 2):
+                if not new_text:
+                    raise ValueError("이름/회사는 비워 둘 수 없습니다.")
             elif col == 3:
                 if not self._is_valid_date(new_text):
                     raise ValueError("날짜는 YYYY-MM-DD 형식이어야 합니다.")
-                self._update_date_for_boundaries(uid, old_date, new_text)
-                self._normalize_day_flags(new_text)
-                if old_date:
-                    self._normalize_day_flags(old_date)
-                item.setData(Qt.ItemDataRole.UserRole + 1, new_text)
-            elif col == 4:
-                date_text = self.tableWidget.item(row, 3).text().strip()
-                if not self._is_valid_date(date_text):
-                    raise ValueError("날짜 셀 값이 유효하지 않습니다(YYYY-MM-DD).")
-                if new_text == "":
-                    self._clear_first_in(uid, date_text)
-                else:
-                    t = self._normalize_time(new_text)
-                    if t is None:
-                        raise ValueError("시간은 HH:MM 또는 HH:MM:SS 형식이어야 합니다.")
-                    self._update_first_in_time(uid, date_text, t)
-                self._normalize_day_flags(date_text)
-            elif col == 5:
-                date_text = self.tableWidget.item(row, 3).text().strip()
-                if not self._is_valid_date(date_text):
+            elif col in (4, 5):
+                if not self._is_valid_date(old_date):
                     raise ValueError("날짜 셀 값이 유효하지 않습니다(YYYY-MM-DD).")
-                if new_text == "":
-                    self._clear_last_out(uid, date_text)
-                else:
-                    t = self._normalize_time(new_text)
-                    if t is None:
+                if new_text != "":
+                    new_text = self._normalize_time(new_text)
+                    if new_text is None:
                         raise ValueError("시간은 HH:MM 또는 HH:MM:SS 형식이어야 합니다.")
-                    self._update_last_out_time(uid, date_text, t)
-                self._normalize_day_flags(date_text)
             else:
-                return
-
-        except Exception as e:
+                return None
+        except ValueError as e:
             QMessageBox.warning(self, "입력 오류", str(e))
-            self._updating_table = True
-            item.setText(old_val)
-            self._updating_table = False
-            return
+            return None
+        if self._is_archived(old_date) or (col == 3 and self._is_archived(new_text)):
+            QMessageBox.warning(self, "편집 불가", f"{self.archived_before} 이전 기록은 아카이브되어 수정할 수 없습니다.")
+            return None
+
+        if self.batchEditButton.isChecked():
+            self.batch.stage_edit(uid, old_date, col, new_text)
+            self._update_batch_buttons()
+            return new_text
+
+        one = AttendanceBatch()
+        one.stage_edit(uid, old_date, col, new_text)
+        return new_text if self._apply_attendance_batch(one) else None
+
+    def _lookup_user(self, uid: str):
+        return self.users.get(uid_key(uid), ("Unknown", "Unknown"))
 
+    def _apply_attendance_batch(self, batch) -> bool:
+        try:
+            touched = batch.apply(self.db, self._lookup_user)
+        except Exception as e:
+            QMessageBox.critical(self, "DB 오류", f"반영 실패 (변경 없음):\n{e}")
+            return False
+        # 이름/회사 캐시 갱신
+        for (uid, _), col, text in batch.ops:
+            if col in (1, 2):
+                name, company = self._lookup_user(uid)
+                self.users.put(uid_key(uid), text if col == 1 else name, text if col == 2 else company)
+        if touched:
+            self.occupancy.load(self.db, self._today_kst(), self.journal.pending())   # 출입 기록이 바뀌었으니 원장 재구성
+        # 실제 갱신은 스케줄러가 이벤트 루프에서 수행 (setData 안에서 모델 리셋 안 함)
         self.refresh_all_views()
+        return True
+
+    # ======== 일괄 편집 ========
+    def toggle_batch_edit(self, on: bool):
+        if not on and len(self.batch):
+            resp = QMessageBox.question(
+                self, "일괄 편집", f"적용하지 않은 변경 {len(self.batch)}건이 있습니다. 지금 적용할까요?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.Yes,
+            )
+            if resp == QMessageBox.StandardButton.Yes:
+                self.apply_batch()
+            else:
+                self.cancel_batch()
+        self._update_batch_buttons()
+
+    def _update_batch_buttons(self):
+        n = len(self.batch)
+        self.batchApplyButton.setText(f"적용 ({n})")
+        self.batchApplyButton.setEnabled(n > 0)
+        self.batchCancelButton.setEnabled(n > 0)
+
+    def apply_batch(self):
+        if not len(self.batch):
+            return
+        t0 = time.perf_counter()
+        n = len(self.batch)
+        if not self._apply_attendance_batch(self.batch):
+            return   # 실패: 모아 둔 내용 유지 (다시 시도 가능)
+        print(f"[BATCH] applied {n} changes in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        self.batch.clear()
+        self._update_batch_buttons()
+        self.refresher.mark_dirty("table")
+
+    def cancel_batch(self):
+        self.batch.clear()
+        self._update_batch_buttons()
+        self.attendanceModel.reload(keep_rows=True)   # 화면의 미적용 편집 되돌림
 
     # ======== 행 삭제 ========
     def delete_selected_rows(self):
-        tw = self.tableWidget
-        sel_rows = sorted(set(idx.row() for idx in tw.selectedIndexes()))
+        if not self.attendanceView.isVisible():
+            return
+        sel_rows = sorted(idx.row() for idx in self.attendanceView.selectionModel().selectedRows())
         if not sel_rows:
             QMessageBox.information(self, "삭제", "삭제할 행을 선택하세요.")
             return
 
         targets = []
         for r in sel_rows:
-            uid_item = tw.item(r, 0)
-            date_item = tw.item(r, 3)
-            if not uid_item or not date_item:
-                continue
-            uid = uid_item.text().strip()
-            d = date_item.text().strip()
+            uid, d = self.attendanceModel.row_key(r)
             if uid and d:
                 targets.append((uid, d))
 
         if not targets:
             QMessageBox.information(self, "삭제", "유효한 UID/날짜가 없습니다.")
             return
+        if any(self._is_archived(d) for _, d in targets):
+            QMessageBox.warning(self, "삭제 불가", f"{self.archived_before} 이전 기록은 아카이브되어 삭제할 수 없습니다.")
+            return
+
+        if self.batchEditButton.isChecked():
+            for uid, d in targets:
+                self.batch.stage_delete(uid, d)
+            self.attendanceModel.mark_deleted(sel_rows)
+            self._update_batch_buttons()
+            return
 
         msg = "\n".join(f"{u} / {d}" for u, d in targets)
         resp = QMessageBox.question(
@@ -991,154 +2812,11 @@ class MyDialog(QDialog, from_class):
         if resp != QMessageBox.StandardButton.Yes:
             return
 
-        cur = self.db.cursor()
-        touched_days = set()
+        batch = AttendanceBatch()
         for uid, d in targets:
-            cur.execute("DELETE FROM access_log WHERE uid=%s AND DATE(ts)=%s", (uid, d))
-            touched_days.add(d)
-        cur.close()
-
-        for d in touched_days:
-            self._normalize_day_flags(d)
-
-        self.refresh_all_views()
-        QMessageBox.information(self, "삭제 완료", f"{len(targets)}개 날짜의 기록을 삭제했습니다.")
-
-    # ======== DB 업데이트 헬퍼 ========
-    def _update_user_name(self, uid: str, new_name: str):
-        cur = self.db.cursor()
-        cur.execute("UPDATE users SET name=%s WHERE uid=%s", (new_name, uid))
-        if cur.rowcount == 0:
-            _, cur_company = self.users.get(uid, ("Unknown", "Unknown"))
-            cur.execute(
-                "INSERT INTO users (uid, name, company) VALUES (%s, %s, %s)",
-                (uid, new_name, cur_company or "Unknown")
-            )
-        cur.close()
-        old_company = self.users.get(uid, ("Unknown", "Unknown"))[1]
-        self.users[uid] = (new_name, old_company)
-        try:
-            cur2 = self.db.cursor()
-            cur2.execute(
-                """
-                UPDATE access_log
-                   SET name=%s
-                 WHERE uid=%s
-                   AND (name IS NULL OR name='' OR name='Unknown')
-                """,
-                (new_name, uid)
-            )
-            cur2.close()
-        except Exception as e:
-            print("[WARN] access_log name backfill failed:", e)
-
-    def _update_user_company(self, uid: str, new_company: str):
-        cur = self.db.cursor()
-        cur.execute("UPDATE users SET company=%s WHERE uid=%s", (new_company, uid))
-        if cur.rowcount == 0:
-            cur_name, _ = self.users.get(uid, ("Unknown", "Unknown"))
-            cur.execute(
-                "INSERT INTO users (uid, name, company) VALUES (%s, %s, %s)",
-                (uid, cur_name or "Unknown", new_company)
-            )
-        cur.close()
-        old_name = self.users.get(uid, ("Unknown", "Unknown"))[0]
-        self.users[uid] = (old_name, new_company)
-        try:
-            cur2 = self.db.cursor()
-            cur2.execute(
-                """
-                UPDATE access_log
-                   SET company=%s
-                 WHERE uid=%s
-                   AND (company IS NULL OR company='' OR company='Unknown')
-                """,
-                (new_company, uid)
-            )
-            cur2.close()
-        except Exception as e:
-            print("[WARN] access_log company backfill failed:", e)
-
-    def _get_boundary_event(self, uid: str, date_str: str, action: str, earliest: bool):
-        cur = self.db.cursor()
-        order = "ASC" if earliest else "DESC"
-        cur.execute(
-            f"""
-            SELECT id, ts
-              FROM access_log
-             WHERE uid=%s AND DATE(ts)=%s AND action IN (%s, %s)
-             ORDER BY ts {order}
-             LIMIT 1
-            """,
-            (uid, date_str, action, 'FIRST_IN' if action == 'IN' else 'LAST_OUT')
-        )
-        row = cur.fetchone()
-        cur.close()
-        if not row:
-            return None
-        return row[0], row[1]
-
-    def _update_event_dt(self, event_id: int, new_dt: datetime):
-        cur = self.db.cursor()
-        cur.execute("UPDATE access_log SET ts=%s WHERE id=%s", (new_dt, event_id))
-        cur.close()
-
-    def _insert_event(self, uid: str, action: str, dt: datetime):
-        name, company = self.users.get(uid, ("Unknown", "Unknown"))
-        cur = self.db.cursor()
-        cur.execute(
-            "INSERT INTO access_log (uid, name, company, ts, action) VALUES (%s, %s, %s, %s, %s)",
-            (uid, name, company, dt, action)
-        )
-        cur.close()
-
-    def _update_date_for_boundaries(self, uid: str, old_date: str, new_date: str):
-        if not old_date:
-            return
-        min_in = self._get_boundary_event(uid, old_date, action='IN', earliest=True)
-        max_out = self._get_boundary_event(uid, old_date, action='OUT', earliest=False)
-        if min_in:
-            eid, ts = min_in
-            new_dt = self._combine_date_time(new_date, ts.strftime("%H:%M:%S"))
-            self._update_event_dt(eid, new_dt)
-        if max_out:
-            eid, ts = max_out
-            new_dt = self._combine_date_time(new_date, ts.strftime("%H:%M:%S"))
-            self._update_event_dt(eid, new_dt)
-
-    def _update_first_in_time(self, uid: str, date_str: str, time_str: str):
-        row = self._get_boundary_event(uid, date_str, action='IN', earliest=True)
-        new_dt = self._combine_date_time(date_str, time_str)
-        if row:
-            eid, _ts = row
-            self._update_event_dt(eid, new_dt)
-        else:
-            self._insert_event(uid, 'IN', new_dt)
-
-    def _update_last_out_time(self, uid: str, date_str: str, time_str: str):
-        row = self._get_boundary_event(uid, date_str, action='OUT', earliest=False)
-        new_dt = self._combine_date_time(date_str, time_str)
-        if row:
-            eid, _ts = row
-            self._update_event_dt(eid, new_dt)
-        else:
-            self._insert_event(uid, 'OUT', new_dt)
-
-    def _clear_action_on_date(self, uid: str, date_str: str, action: str):
-        cur = self.db.cursor()
-        if action == 'IN':
-            cur.execute("DELETE FROM access_log WHERE uid=%s AND DATE(ts)=%s AND action IN ('IN','FIRST_IN')",
-                        (uid, date_str))
-        else:
-            cur.execute("DELETE FROM access_log WHERE uid=%s AND DATE(ts)=%s AND action IN ('OUT','LAST_OUT')",
-                        (uid, date_str))
-        cur.close()
-
-    def _clear_first_in(self, uid: str, date_str: str):
-        self._clear_action_on_date(uid, date_str, 'IN')
-
-    def _clear_last_out(self, uid: str, date_str: str):
-        self._clear_action_on_date(uid, date_str, 'OUT')
+            batch.stage_delete(uid, d)
+        if self._apply_attendance_batch(batch):
+            QMessageBox.information(self, "삭제 완료", f"{len(targets)}개 날짜의 기록을 삭제했습니다.")
 
     # ---------------- 실시간 인원/오늘 출근자 ----------------
     def setup_present_table(self):
@@ -1153,32 +2831,8 @@ class MyDialog(QDialog, from_class):
         tw2.setAlternatingRowColors(True)
         tw2.setSortingEnabled(True)
 
-    def refresh_headcount(self):
-        """
-        label_2: 오늘(uid별) 마지막 이벤트가 IN/FIRST_IN 인 사람 수
-        """
-        today = self._today_kst()
-        cur = self.db.cursor()
-        cur.execute(
-            """
-            SELECT COUNT(*) FROM (
-                SELECT al.uid
-                FROM access_log al
-                JOIN (
-                        SELECT uid, MAX(ts) AS max_ts
-                        FROM access_log
-                        WHERE DATE(ts)=%s
-                        GROUP BY uid
-                ) m ON m.uid=al.uid AND m.max_ts=al.ts
-                WHERE DATE(al.ts)=%s AND al.action IN ('IN','FIRST_IN')
-                GROUP BY al.uid
-            ) AS present
-            """,
-            (today, today)
-        )
-        row = cur.fetchone()
-        cur.close()
-        n = row[0] if row else 0
+    def on_headcount_changed(self, n: int):
+        """OccupancyState.count_changed: 재실 인원(오늘 마지막 동작이 IN 인 uid 수)이 바뀔 때만 호출."""
         try:
             self.label_2.setText(f"실시간 근무 인원: {n}명")
         except Exception:
@@ -1188,97 +2842,38 @@ class MyDialog(QDialog, from_class):
         self._maybe_send_hvac_by_occupancy(n)
 
     def _maybe_send_hvac_by_occupancy(self, present_count: int):
-        """present_count > 0이면 HE 1, ==0이면 HE 0. 마지막 전송과 다를 때만 전송."""
+        """present_count > 0이면 HE 1, ==0이면 HE 0. 실제 전송 여부/시점은 HvacCommander 가 결정."""
         if not self._auto_hvac:
             return
         want_enable = (present_count > 0)
-        if self._hvac_enabled_cache is None or self._hvac_enabled_cache != want_enable:
-            self.send_he(want_enable)
-            print(f"[HVAC] auto {'ENABLE' if want_enable else 'DISABLE'} (present={present_count})")
-
-    def fetch_today_attendees(self):
-        today = self._today_kst()
-        cur = self.db.cursor()
-        cur.execute(
-            """
-            SELECT
-                al.uid,
-                COALESCE(NULLIF(u.name,''), 'Unknown')    AS name,
-                COALESCE(NULLIF(u.company,''), 'Unknown') AS company,
-                DATE(al.ts)                               AS d,
-                TIME(MIN(al.ts))                          AS first_in
-            FROM access_log al
-            LEFT JOIN users u ON u.uid = al.uid
-            WHERE DATE(al.ts)=%s AND al.action IN ('IN','FIRST_IN')
-            GROUP BY al.uid, DATE(al.ts), u.name, u.company
-            ORDER BY first_in ASC
-            """,
-            (today,)
-        )
-        rows = cur.fetchall()
-        cur.close()
-        return rows
-
-    def _present_count(self, date_str: str) -> int:
-        cur = self.db.cursor()
-        cur.execute(
-            """
-            SELECT COUNT(*) FROM (
-                SELECT al.uid
-                FROM access_log al
-                JOIN (
-                        SELECT uid, MAX(ts) AS max_ts
-                        FROM access_log
-                        WHERE DATE(ts)=%s
-                        GROUP BY uid
-                ) m ON m.uid=al.uid AND m.max_ts=al.ts
-                WHERE DATE(al.ts)=%s AND al.action IN ('IN','FIRST_IN')
-                GROUP BY al.uid
-            ) AS present
-            """,
-            (date_str, date_str)
-        )
-        row = cur.fetchone()
-        cur.close()
-        return int(row[0] if row else 0)
-
-    def _clear_last_out_flag_for_day(self, date_str: str):
-        cur = self.db.cursor()
-        cur.execute(
-            "UPDATE access_log SET action='OUT' WHERE DATE(ts)=%s AND action='LAST_OUT'",
-            (date_str,)
-        )
-        cur.close()
+        if self.hvac_cmd.desired != want_enable:
+            print(f"[HVAC] auto want {'ENABLE' if want_enable else 'DISABLE'} (present={present_count})")
+        self.hvac_cmd.request(want_enable)
 
     def refresh_present_table(self):
-        # label_2의 현재 텍스트 확인
-        try:
-            label_text = self.label_2.text()
-            n = int("".join([ch for ch in label_text if ch.isdigit()]))
-        except Exception:
-            n = 0
-
+        """오늘 출근자(첫 IN 순). 아무도 없으면 비운다. 원장 + 사용자 캐시만 읽음 (DB 조회 없음)"""
         tw2 = self.tableWidget_2
-        if n == 0:
-            # 인원이 0이면 테이블 비우기
+        if self.occupancy.count == 0:
             tw2.setRowCount(0)
             return
 
-        # 인원이 있을 때만 오늘 출근자 조회
-        rows = self.fetch_today_attendees()
+        day = self.ledger.day
+        rows = sorted(self.occupancy.first_in.items(), key=lambda kv: kv[1])
+        tw2.setSortingEnabled(False)   # 채우는 도중 정렬되면 행이 섞인다
         tw2.setRowCount(len(rows))
-        for r, (uid, name, company, d, first_in) in enumerate(rows):
-            vals = [uid or "", name or "", company or "", str(d) if d else "", self._td_to_hms(first_in)]
+        for r, (uid, ts) in enumerate(rows):
+            name, company = self.users.get(uid_key(uid), ("Unknown", "Unknown"))
+            vals = [uid, name or "Unknown", company or "Unknown", day, ts.strftime("%H:%M:%S")]
             for c, v in enumerate(vals):
                 it = QTableWidgetItem(v)
                 it.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
                 tw2.setItem(r, c, it)
+        tw2.setSortingEnabled(True)
         tw2.resizeColumnsToContents()
 
     def refresh_all_views(self):
-        self.refresh_table()
-        self.refresh_present_table()
-        self.refresh_headcount()
+        """즉시 조회하지 않고 dirty 표시만 한다. (RefreshScheduler 가 합쳐서 갱신)"""
+        self.refresher.mark_dirty("present", "table")
 
     # ---------------- BOOKED 예약 창 열기 ----------------
     def open_booked_reservations(self):
@@ -1296,25 +2891,34 @@ class MyDialog(QDialog, from_class):
     # ---------------- 종료 정리 ----------------
     def closeEvent(self, event):
         try:
-            if self.recv is not None:
-                self.recv.stop()
-                self.recv.wait(1500)
+            print("[REFRESH]", self.refresher.summary())
+            print("[HVAC]", self.hvac_cmd.summary())
+            print("[RFID] dedup", self.rfid.dedup.summary())
         except Exception:
             pass
         try:
-            if self.hvac_recv is not None:
-                self.hvac_recv.stop()
-                self.hvac_recv.wait(1000)
+            if self.rfid is not None:
+                self.rfid.stop()
+                self.rfid.wait(1500)
+        except Exception:
+            pass
+        try:
+            # 남은 이벤트는 저널에 있으므로 다음 실행 때 재전송된다
+            self.writer.stop()
+            self.writer.wait(3000)
+            self.journal.close()
         except Exception:
             pass
         try:
-            if self.conn and getattr(self.conn, "is_open", False):
-                self.conn.close()
+            if self.hvac_recv is not None:
+                self.hvac_recv.stop()
+                self.hvac_recv.wait(1000)
         except Exception:
             pass
         try:
-            if self.hvac_conn and getattr(self.hvac_conn, "is_open", False):
-                self.hvac_conn.close()
+            # HVAC 포트는 감시 스레드가 닫는다
+            self.serials.stop()
+            self.serials.wait(int(PROBE_BANNER_SECS * 1000) + 1000)
         except Exception:
             pass
         try:
@@ -1327,10 +2931,15 @@ class MyDialog(QDialog, from_class):
 
     # ---------------- 관리 버튼 ----------------
     def toggle_management_view(self):
-        want_show = not self.tableWidget.isVisible()
-        self.tableWidget.setVisible(want_show)
+        want_show = not self.attendanceView.isVisible()
+        self.attendanceView.setVisible(want_show)
+        for w in self._date_filter_widgets:
+            w.setVisible(want_show)
         if want_show:
-            self.refresh_all_views()
+            if self.attendanceModel.date_from is None:
+                self.apply_date_filter()
+            else:
+                self.refresher.show_changed("table")
         try:
             self.managementButton.setText("닫기" if want_show else " 근태 관리")
         except Exception:
@@ -11,7 +11,7 @@ from PyQt6.QtWidgets import (
 )
 
 # === 각 앱 클래스 임포트 (환경에 맞게) ===
-from iot_project_parking import MainWindow as ParkingMainWindow
+from iot_project_parking import MainWindow as ParkingMainWindow, start_ocr_pool
 from iot_project_access import MyDialog as AccessMainWindow   # access는 QDialog 기반
 
 
@@ -62,7 +62,7 @@ class _WindowToTabAdapter(QWidget):
 
 
 class ControlHub(QMainWindow):
-    def __init__(self):
+    def __init__(self, ocr_pool=None):
         super().__init__()
         self.setWindowTitle("Joeffice Control Hub (Parking + Access)")
 
@@ -71,11 +71,13 @@ class ControlHub(QMainWindow):
 
         # ---- Parking 탭 ----
         try:
-            self.parking_win = ParkingMainWindow()   # QMainWindow 기반
+            self.parking_win = ParkingMainWindow(ocr_pool)   # QMainWindow 기반 (풀 정리는 주차 창이 맡음)
             self.parking_tab = _WindowToTabAdapter(self.parking_win, parent=self)
             self.tabs.addTab(self.parking_tab, "주차(Parking)")
         except Exception as e:
             self.parking_win = None
+            if ocr_pool is not None:
+                ocr_pool.close()
             self.tabs.addTab(QWidget(), "주차(Parking)")
             QMessageBox.critical(self, "로드 오류", f"Parking 로드 실패: {e}")
 
@@ -138,8 +140,9 @@ class ControlHub(QMainWindow):
 
 
 def main():
+    ocr_pool = start_ocr_pool()   # OCR 작업 프로세스 fork: QApplication/스레드/시리얼 포트보다 먼저
     app = QApplication(sys.argv)
-    hub = ControlHub()
+    hub = ControlHub(ocr_pool)
     hub.resize(1280, 800)
     hub.show()
     sys.exit(app.exec())
@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import os, sys, time, re
+import os, sys, time, threading, itertools
+from collections import deque
 import mysql.connector
 import cv2
-import pytesseract
-from ultralytics import YOLO
+from plate_ocr import OcrPool, read_plate, normalize_text, validate_plate
 
 import serial
 import serial.tools.list_ports
@@ -245,73 +245,292 @@ CONF_THRES = 0.25
 IOU_THRES = 0.5
 IMGSZ = 640
 
-TESSERACT_BIN = "/usr/bin/tesseract"
-if os.path.exists(TESSERACT_BIN):
-    pytesseract.pytesseract.tesseract_cmd = TESSERACT_BIN
-else:
-    print(f"[WARN] Tesseract not found at {TESSERACT_BIN}. Adjust path if needed.")
-
-def resolve_tess_lang() -> str:
-    try:
-        langs = set(pytesseract.get_languages(config=""))
-    except Exception as e:
-        print(f"[WARN] get_languages failed: {e} -> fallback to 'eng'")
-        return "eng"
-    if "kor" in langs and "eng" in langs: return "kor+eng"
-    if "kor" in langs: return "kor"
-    return "eng"
-
-TESS_LANG = resolve_tess_lang()
-print(f"[INFO] OCR language set to: {TESS_LANG}")
-
-WHITELIST = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ가나다라마바사아자차카타파하허호무부거너더러머버서어저고노도로모보소오조우배국합육공하허호음임"
-PLATE_PATTERN = re.compile(r"\b\d{2,3}[가-힣]\d{4}\b")
 DEDUP_SECONDS = 6  # 같은 번호 연속 중복 방지 시간(초)
 
-# ================== OCR 유틸 ==================
-def preprocess_for_ocr(crop_bgr):
-    if crop_bgr is None or crop_bgr.size == 0: return None
-    gray = cv2.cvtColor(crop_bgr, cv2.COLOR_BGR2GRAY)
-    scale = 3.0 if max(crop_bgr.shape[:2]) < 200 else 2.0
-    resized = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
-    _, th = cv2.threshold(resized, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    th = cv2.morphologyEx(th, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (2,2)), 1)
-    return th
-
-def normalize_text(s:str)->str:
-    return re.sub(r"[^0-9A-Z가-힣]", "", s.strip().upper())
-
-def validate_plate(text:str)->str|None:
-    m = PLATE_PATTERN.search(text) if text else None
-    return m.group(0) if m else None
-
-def ocr_plate(crop_bgr)->str:
-    img = preprocess_for_ocr(crop_bgr)
-    if img is None: return ""
-    config = (f'--oem 1 --psm 7 --dpi 300 '
-              f'-c tessedit_char_whitelist={WHITELIST} '
-              f'-c preserve_interword_spaces=1')
-    try:
-        raw = pytesseract.image_to_string(img, lang=TESS_LANG, config=config)
-    except Exception as e:
-        print(f"[OCR] {e}")
-        return ""
-    clean = normalize_text(raw)
-    valid = validate_plate(clean)
-    return valid or ""
+# ================== 파이프라인 설정 (캡처 → 탐지 → OCR) ==================
+PREVIEW_FPS = 15           # 미리보기 전송 상한
+OCR_WORKERS = 2            # OCR 작업 프로세스 수 (풀을 못 띄우면 같은 수의 스레드로 대신)
+CROP_QUEUE_MAX = 8         # 탐지 → OCR 대기 크롭 상한 (가득 차면 가장 오래된 크롭을 버림)
+PIPE_STATS_SECS = 5.0      # 단계별 FPS/지연/큐 깊이 로그 주기
+
+# ================== 번호판 추적 설정 ==================
+TRACK_IOU_MIN = 0.3          # 이전 박스와 이만큼 겹치면 같은 차
+TRACK_CENTER_FRAC = 0.5      # IoU 가 낮아도 중심 이동이 이전 박스 대각선의 이 비율 이내면 같은 차
+TRACK_MAX_MISSES = 15        # 이 프레임 수만큼 안 보이면 트랙 종료
+TRACK_MAX_OCR = 8            # 확정 못 해도 트랙당 OCR 상한
+TRACK_OCR_GAP_FRAMES = 2     # 같은 트랙 OCR 시도 사이 최소 프레임 간격
+
+# ================== 번호 합의(투표) 설정 ==================
+# 트랙마다 최근 판독을 글자 자리별로 신뢰도 가중 투표 → 합의가 충분할 때만 번호 확정(= 게이트 열림)
+VOTE_LAST_K = 5              # 트랙별 최근 K 개 판독만 투표
+VOTE_MIN_WEIGHT = 1.2        # 합의 번호의 모든 자리가 이 신뢰도 합 이상으로 지지돼야 함 (한 번 읽힌 걸로는 부족)
+VOTE_MIN_AGREE = 0.6         # 자리마다 1등 글자 가중치 / 그 자리 전체 가중치 하한
+
+# ================== 파이프라인 부품 ==================
+class LatestFrameSlot:
+    """캡처 → 탐지 사이 1칸 슬롯. 새 프레임이 오면 덮어쓴다 (탐지가 느리면 중간 프레임은 버려짐)."""
+    def __init__(self):
+        self._cv = threading.Condition()
+        self._item = None          # (ts, frame) — 아직 안 읽힌 최신 프레임
+        self.dropped = 0           # 읽히기 전에 덮어쓴 프레임 수
+
+    def put(self, ts, frame):
+        with self._cv:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = (ts, frame)
+            self._cv.notify()
+
+    def get(self, timeout: float):
+        with self._cv:
+            if self._item is None:
+                self._cv.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def depth(self) -> int:
+        return 0 if self._item is None else 1
+
+
+class DropOldestQueue:
+    """상한 있는 큐. 가득 차면 가장 오래된 항목을 버리고 넣는다 (생산자는 막히지 않음)."""
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._dq = deque()
+        self._cv = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        """버린 항목을 돌려준다 (없으면 None)."""
+        dropped = None
+        with self._cv:
+            if len(self._dq) >= self.maxsize:
+                dropped = self._dq.popleft()
+                self.dropped += 1
+            self._dq.append(item)
+            self._cv.notify()
+        return dropped
+
+    def get(self, timeout: float):
+        with self._cv:
+            if not self._dq:
+                self._cv.wait(timeout)
+            return self._dq.popleft() if self._dq else None
+
+    def depth(self) -> int:
+        return len(self._dq)
+
+
+class StageStats:
+    """단계별 처리 수/지연. snapshot() 마다 그 사이 구간의 FPS, 평균/최대 지연을 내고 구간을 비운다."""
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._t0 = time.monotonic()
+        self._n = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self.total = 0
+
+    def record(self, latency_s: float):
+        with self._lock:
+            self._n += 1
+            self._sum += latency_s
+            self._max = max(self._max, latency_s)
+            self.total += 1
+
+    def snapshot(self, depth=None, dropped=None) -> str:
+        with self._lock:
+            now = time.monotonic()
+            fps = self._n / max(1e-6, now - self._t0)
+            avg = (self._sum / self._n * 1000.0) if self._n else 0.0
+            out = f"{self.name} {fps:5.1f}fps {avg:6.1f}/{self._max * 1000.0:6.1f}ms"
+            self._t0, self._n, self._sum, self._max = now, 0, 0.0, 0.0
+        if depth is not None:
+            out += f" q={depth}"
+        if dropped:
+            out += f" drop={dropped}"
+        return out
+
+
+# ================== 번호판 추적 (IoU/중심 매칭) ==================
+def box_iou(a, b) -> float:
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def vote_plate(reads):
+    """
+    reads: [(번호, 신뢰도)] → (합의 번호, 지지 가중치, 최저 자리 합의율) | None
+    가중치 합이 가장 큰 길이(7/8자리)의 판독만 자리별로 맞춰, 자리마다 신뢰도 합이 가장 큰 글자를 고른다.
+    지지 가중치 = 고른 글자들의 가중치 중 최솟값 (가장 약한 자리 기준).
+    """
+    by_len = {}
+    for plate, conf in reads:
+        by_len[len(plate)] = by_len.get(len(plate), 0.0) + conf
+    if not by_len:
+        return None
+    n = max(by_len, key=by_len.get)
+    same = [(p, c) for p, c in reads if len(p) == n]
+    chars, support, agree = [], float("inf"), 1.0
+    for i in range(n):
+        w = {}
+        for p, c in same:
+            w[p[i]] = w.get(p[i], 0.0) + c
+        ch = max(w, key=w.get)
+        total = sum(w.values())
+        chars.append(ch)
+        support = min(support, w[ch])
+        agree = min(agree, w[ch] / total if total > 0 else 0.0)
+    return "".join(chars), support, agree
+
+
+class PlateTrack:
+    def __init__(self, tid: int, box, frame_no: int):
+        self.id = tid
+        self.box = box
+        self.last_frame = frame_no
+        self.reads = deque(maxlen=VOTE_LAST_K)   # 최근 (plate, conf)
+        self.plate = None          # 확정 번호 (확정되면 OCR 중단)
+        self.pending = False       # OCR 진행 중 크롭 있음
+        self.ocr_calls = 0
+        self.next_ocr_frame = frame_no
+
+
+class PlateTracker:
+    """
+    프레임마다 탐지 박스를 기존 트랙에 붙인다 (IoU 우선, 안 되면 중심 거리). 탐지 스레드에서 update,
+    OCR 결과 스레드에서 on_read/cancel 을 부르므로 잠금으로 보호한다.
+    OCR 은 want_ocr 가 True 인 트랙만: 미확정 + 진행 중 크롭 없음 + 간격/상한 이내.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tracks = {}          # id -> PlateTrack
+        self._next_id = 1
+        self.frame_no = 0
+        self.boxes = 0             # 탐지된 박스 수 (예전엔 전부 OCR)
+        self.ocr_calls = 0
+        self.confirmed = 0
+
+    def update(self, boxes):
+        """boxes: [(x1, y1, x2, y2)] → 박스 순서대로 [PlateTrack]"""
+        with self._lock:
+            self.frame_no += 1
+            self.boxes += len(boxes)
+            free = dict(self._tracks)
+            out = []
+            for box in boxes:
+                best, best_score = None, 0.0
+                for t in free.values():
+                    score = box_iou(t.box, box)
+                    if score < TRACK_IOU_MIN:
+                        # 빠르게 움직여 안 겹치면 중심 거리로 (0~1, 가까울수록 큼) — IoU 매칭보다 항상 낮게
+                        tx, ty = (t.box[0] + t.box[2]) / 2, (t.box[1] + t.box[3]) / 2
+                        bx, by = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+                        diag = max(1.0, ((t.box[2] - t.box[0]) ** 2 + (t.box[3] - t.box[1]) ** 2) ** 0.5)
+                        dist = ((tx - bx) ** 2 + (ty - by) ** 2) ** 0.5 / diag
+                        score = (1.0 - dist / TRACK_CENTER_FRAC) * TRACK_IOU_MIN if dist < TRACK_CENTER_FRAC else 0.0
+                    if score > best_score:
+                        best, best_score = t, score
+                if best is None:
+                    best = PlateTrack(self._next_id, box, self.frame_no)
+                    self._tracks[best.id] = best
+                    self._next_id += 1
+                else:
+                    del free[best.id]
+                    best.box = box
+                best.last_frame = self.frame_no
+                out.append(best)
+            for t in free.values():
+                if self.frame_no - t.last_frame > TRACK_MAX_MISSES:
+                    del self._tracks[t.id]
+            return out
+
+    def want_ocr(self, t: PlateTrack) -> bool:
+        """True 면 OCR 을 맡긴 것으로 표시한다 (결과/취소가 올 때까지 같은 트랙은 다시 안 냄)."""
+        with self._lock:
+            if t.plate or t.pending or t.ocr_calls >= TRACK_MAX_OCR or self.frame_no < t.next_ocr_frame:
+                return False
+            t.pending = True
+            t.ocr_calls += 1
+            t.next_ocr_frame = self.frame_no + TRACK_OCR_GAP_FRAMES
+            self.ocr_calls += 1
+            return True
 
-# ================== Detector Thread (라벨 미리보기 + 무한 감지) ==================
+    def cancel(self, tid: int):
+        """큐에서 버려진 크롭 → 다음 프레임에 다시 시도할 수 있게."""
+        with self._lock:
+            t = self._tracks.get(tid)
+            if t is not None:
+                t.pending = False
+                t.ocr_calls -= 1
+                self.ocr_calls -= 1
+
+    def on_read(self, tid: int, plate: str, conf: float) -> str | None:
+        """OCR 결과를 투표에 넣는다. 이번 결과로 합의가 이뤄지면 그 번호를 돌려준다 (트랙당 한 번)."""
+        with self._lock:
+            t = self._tracks.get(tid)
+            if t is None:
+                return None
+            t.pending = False
+            if not plate or t.plate:
+                return None
+            t.reads.append((plate, conf))
+            vote = vote_plate(t.reads)
+            if vote is None:
+                return None
+            consensus, support, agree = vote
+            if support < VOTE_MIN_WEIGHT or agree < VOTE_MIN_AGREE or validate_plate(consensus) != consensus:
+                return None
+            t.plate = consensus
+            self.confirmed += 1
+            if consensus != plate or len(set(p for p, _ in t.reads)) > 1:
+                print(f"[VOTE] track {tid}: {consensus} <- {[f'{p}:{c:.2f}' for p, c in t.reads]}")
+            return consensus
+
+    def summary(self) -> str:
+        with self._lock:
+            return (f"tracks={len(self._tracks)} boxes={self.boxes} ocr={self.ocr_calls} "
+                    f"confirmed={self.confirmed}")
+
+
+# ================== Detector Thread (캡처/탐지/OCR 단계 분리) ==================
 class DetectorThread(QThread):
+    """
+    캡처 스레드 → LatestFrameSlot → 탐지(이 스레드) → DropOldestQueue → OCR 작업 프로세스 풀(OcrPool).
+    풀에는 빈 공유 메모리 슬롯이 있을 때만 넘기므로(진행 중 상한) 밀린 크롭은 큐에서 오래된 것부터 버린다.
+    pool 이 None 이면 OCR_WORKERS 개 스레드가 read_plate 를 직접 부른다.
+    작업 프로세스가 죽으면(OcrPool.reap) 그 작업은 실패한 판독으로 처리하고, 하나도 안 남으면 스레드 OCR 로 넘어간다.
+    박스는 PlateTracker 로 트랙에 묶고, 번호가 확정되지 않은 트랙만 OCR 한다.
+    판독은 트랙별 글자 단위 신뢰도 가중 투표(vote_plate)를 거쳐 합의됐을 때만 트랙당 한 번 emit.
+    단계별 FPS·지연·큐 깊이는 PIPE_STATS_SECS 마다 [PIPE] 로 출력.
+    """
     plateDetected = pyqtSignal(str)
     frameReady    = pyqtSignal(QImage)
     done          = pyqtSignal()
+    _generations = itertools.count(1)   # 감지 스레드 세대: 풀은 재시작 후에도 공유되므로 이전 세대 결과를 가려낸다
 
-    def __init__(self, parent=None):
+    def __init__(self, pool=None, parent=None):
         super().__init__(parent)
+        self.pool = pool
+        self.gen = next(self._generations)
+        self._workers = []    # 캡처/OCR 보조 스레드 (종료 시 join)
         self._running = True
         self.last_seen = {}   # plate -> last timestamp
+        self._seen_lock = threading.Lock()
         self._last_emit_ts = 0.0
 
+        self.slot = LatestFrameSlot()
+        self.crops = DropOldestQueue(CROP_QUEUE_MAX)
+        self.tracker = PlateTracker()
+        self.st_capture = StageStats("capture")
+        self.st_detect = StageStats("detect")
+        self.st_ocr = StageStats("ocr")
+        self.st_e2e = StageStats("frame->plate")
+
     def stop(self):
         # 안전 종료: 루프 플래그 + 인터럽트 + 조인
         self._running = False
@@ -321,6 +540,103 @@ class DetectorThread(QThread):
         except Exception:
             pass
 
+    def _alive(self) -> bool:
+        return self._running and not self.isInterruptionRequested()
+
+    def stats_line(self) -> str:
+        return " | ".join([
+            self.st_capture.snapshot(),
+            self.st_detect.snapshot(self.slot.depth(), self.slot.dropped),
+            self.st_ocr.snapshot(self.crops.depth(), self.crops.dropped)
+            + (f" busy={self.pool.in_flight()} lost={self.pool.lost}" if self.pool else ""),
+            self.st_e2e.snapshot(),
+            self.tracker.summary(),
+        ])
+
+    # ---- 1단계: 캡처 (+ 미리보기) ----
+    def _capture_loop(self, cap):
+        try:
+            while self._alive():
+                t0 = time.time()
+                ok, frame = cap.read()
+                if not ok:
+                    print("[WARN] camera read failed -> detector stop")
+                    break
+                self.st_capture.record(time.time() - t0)
+                self.slot.put(t0, frame)
+
+                # ---- 미리보기 (≈PREVIEW_FPS) ----
+                if t0 - self._last_emit_ts >= (1 / PREVIEW_FPS):
+                    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    h, w, ch = rgb.shape
+                    qimg = QImage(rgb.data, w, h, ch*w, QImage.Format.Format_RGB888)
+                    self.frameReady.emit(qimg.copy())
+                    self._last_emit_ts = t0
+        finally:
+            self._running = False
+
+    # ---- 3단계: OCR ----
+    def _report(self, meta, plate, conf, ocr_secs):
+        gen, ts, tid = meta
+        if gen != self.gen:
+            return   # 이전 감지 스레드가 맡긴 크롭 (트랙 번호가 새 트래커와 겹친다)
+        t1 = time.time()
+        self.st_ocr.record(ocr_secs)
+        plate = self.tracker.on_read(tid, plate, conf)
+        if not plate:
+            return
+        self.st_e2e.record(t1 - ts)
+        with self._seen_lock:
+            if t1 - self.last_seen.get(plate, 0) < DEDUP_SECONDS:
+                return
+            self.last_seen[plate] = t1
+        self.plateDetected.emit(plate)
+
+    def _ocr_loop(self):
+        """(풀 없이) 이 프로세스 안에서 OCR."""
+        while self._alive():
+            item = self.crops.get(0.2)
+            if item is None:
+                continue
+            meta, crop = item
+            t0 = time.time()
+            plate, conf = read_plate(crop)
+            self._report(meta, plate, conf, time.time() - t0)
+
+    def _start_ocr_threads(self):
+        ts = [threading.Thread(target=self._ocr_loop, name=f"ocr{i}", daemon=True) for i in range(OCR_WORKERS)]
+        self._workers += ts
+        for t in ts:
+            t.start()
+
+    def _dispatch_loop(self):
+        """빈 슬롯이 생길 때만 큐에서 크롭을 꺼내 풀로 (backpressure)."""
+        while self._alive() and self.pool.alive():
+            slot = self.pool.acquire_slot(0.2)
+            if slot is None:
+                continue
+            item = self.crops.get(0.2)
+            if item is None:
+                self.pool.release_slot(slot)
+                continue
+            meta, crop = item
+            self.pool.submit(slot, crop, meta)
+
+    def _collect_loop(self):
+        while self._alive():
+            down = not self.pool.alive()
+            for gen, _, tid in self.pool.reap():
+                if gen == self.gen:
+                    self.tracker.on_read(tid, "", 0.0)   # 죽은 작업 프로세스가 들고 있던 크롭: 실패한 판독으로
+            if down:
+                print("[OCR][ERROR] no OCR workers left -> in-process OCR threads")
+                self._start_ocr_threads()
+                return
+            res = self.pool.get_result(0.2)
+            if res is not None:
+                self._report(*res)
+
+    # ---- 2단계: 탐지 (이 스레드) ----
     def run(self):
         if self.isInterruptionRequested():
             return
@@ -328,6 +644,7 @@ class DetectorThread(QThread):
             self.plateDetected.emit(f"[ERR] weights not found: {WEIGHTS_PATH}")
             self.done.emit(); return
         try:
+            from ultralytics import YOLO   # torch 는 OCR 작업 프로세스를 fork 한 뒤에 올린다
             model = YOLO(WEIGHTS_PATH)
         except Exception as e:
             self.plateDetected.emit(f"[ERR] YOLO load fail: {e}")
@@ -338,42 +655,47 @@ class DetectorThread(QThread):
             self.plateDetected.emit("[ERR] Cannot open webcam")
             self.done.emit(); return
 
-        try:
-            while self._running and not self.isInterruptionRequested():
-                ok, frame = cap.read()
-                if not ok:
-                    break
-
-                # ---- 미리보기 (≈15fps) ----
-                now = time.time()
-                if now - self._last_emit_ts >= (1/15):
-                    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    h, w, ch = rgb.shape
-                    qimg = QImage(rgb.data, w, h, ch*w, QImage.Format.Format_RGB888)
-                    self.frameReady.emit(qimg.copy())
-                    self._last_emit_ts = now
+        self._workers = [threading.Thread(target=self._capture_loop, args=(cap,), name="capture", daemon=True)]
+        if self.pool:
+            self._workers += [threading.Thread(target=self._dispatch_loop, name="ocr-dispatch", daemon=True),
+                              threading.Thread(target=self._collect_loop, name="ocr-collect", daemon=True)]
+        for t in self._workers:
+            t.start()
+        if not self.pool:
+            self._start_ocr_threads()
 
-                # ---- 탐지 & OCR ----
+        next_stats = time.monotonic() + PIPE_STATS_SECS
+        try:
+            while self._alive():
+                if time.monotonic() >= next_stats:
+                    print("[PIPE]", self.stats_line())
+                    next_stats += PIPE_STATS_SECS
+
+                item = self.slot.get(0.2)
+                if item is None:
+                    continue
+                ts, frame = item
+                t0 = time.time()
                 results = model.predict(source=frame, conf=CONF_THRES, iou=IOU_THRES, imgsz=IMGSZ, verbose=False)
-                t2 = time.time()
-                for r in results:
-                    if r.boxes is None: continue
-                    for b in r.boxes:
-                        if not self._running or self.isInterruptionRequested(): break
-                        x1, y1, x2, y2 = b.xyxy[0].cpu().numpy().astype(int).tolist()
-                        pad = int(0.06 * max(1, x2 - x1))
-                        xx1 = max(0, x1 - pad); yy1 = max(0, y1 - pad)
-                        xx2 = min(frame.shape[1]-1, x2 + pad); yy2 = min(frame.shape[0]-1, y2 + pad)
-                        crop = frame[yy1:yy2, xx1:xx2]
-
-                        plate = ocr_plate(crop)
-                        if not plate: continue
-                        if t2 - self.last_seen.get(plate, 0) < DEDUP_SECONDS:
-                            continue
-                        self.last_seen[plate] = t2
-                        self.plateDetected.emit(plate)
+                boxes = [tuple(b.xyxy[0].cpu().numpy().astype(int).tolist())
+                         for r in results if r.boxes is not None for b in r.boxes]
+                for (x1, y1, x2, y2), track in zip(boxes, self.tracker.update(boxes)):
+                    if not self.tracker.want_ocr(track):
+                        continue   # 확정됐거나 OCR 진행 중인 차
+                    pad = int(0.06 * max(1, x2 - x1))
+                    xx1 = max(0, x1 - pad); yy1 = max(0, y1 - pad)
+                    xx2 = min(frame.shape[1]-1, x2 + pad); yy2 = min(frame.shape[0]-1, y2 + pad)
+                    dropped = self.crops.put(((self.gen, ts, track.id), frame[yy1:yy2, xx1:xx2]))
+                    if dropped is not None:
+                        self.tracker.cancel(dropped[0][2])
+                self.st_detect.record(time.time() - t0)
         finally:
+            self._running = False
+            for t in list(self._workers):
+                t.join(timeout=2.0)   # OCR 한 건이 끝날 때까지 (캡처는 read 한 번)
             cap.release()
+            print("[PIPE] stop:", self.stats_line(),
+                  f"(frames {self.st_capture.total}, detected {self.st_detect.total}, ocr {self.st_ocr.total})")
         self.done.emit()
 
 # ================== 등록 다이얼로그 (인식된 번호용) ==================
@@ -464,7 +786,7 @@ class ManualRegisterDialog(QDialog):
 UiClass, BaseClass = uic.loadUiType("iot_project_parking.ui")
 
 class MainWindow(BaseClass, UiClass):
-    def __init__(self):
+    def __init__(self, ocr_pool=None):
         super().__init__()
         self.setupUi(self)
 
@@ -560,12 +882,18 @@ class MainWindow(BaseClass, UiClass):
         # 아두이노
         self.arduino = ArduinoController()
 
+        # OCR 작업 프로세스 풀: 진입점(main)이 QApplication 전에 띄워 넘겨준다 (start_ocr_pool)
+        self.ocr_pool = ocr_pool
+        if self.ocr_pool is None:
+            print("[WARN] no OCR pool -> in-process OCR threads")
+
         # 감지 스레드: 지연 시작(탭 임베드 환경에서 안전)
         self.det = None
         QTimer.singleShot(0, self.start_detector)
 
         # 앱 종료/탭 닫기 대비 안전 종료
         QApplication.instance().aboutToQuit.connect(self.stop_detector)
+        QApplication.instance().aboutToQuit.connect(self.close_ocr_pool)
 
         # 실시간 갱신 타이머
         self.refresh_timer = QTimer(self)
@@ -578,7 +906,7 @@ class MainWindow(BaseClass, UiClass):
     def start_detector(self):
         if self.det and self.det.isRunning():
             return
-        self.det = DetectorThread(parent=self)
+        self.det = DetectorThread(self.ocr_pool, parent=self)
         self.det.plateDetected.connect(self.on_plate_detected)
         self.det.frameReady.connect(self.on_frame_ready)
         self.det.done.connect(self.on_detect_done)
@@ -806,16 +1134,37 @@ class MainWindow(BaseClass, UiClass):
             self.tableWidget.setRowCount(0)
 
     # ===== 종료 정리 =====
+    def close_ocr_pool(self):
+        # 감지 스레드가 멈춘 뒤에 (작업 프로세스 종료 + 공유 메모리 해제)
+        if self.ocr_pool:
+            self.ocr_pool.close()
+            self.ocr_pool = None
+
     def closeEvent(self, e):
         self.stop_detector()
+        self.close_ocr_pool()
         if hasattr(self, "arduino") and self.arduino:
             self.arduino.close()
         super().closeEvent(e)
 
 # ================== 엔트리 ==================
+def start_ocr_pool():
+    """
+    OCR 작업 프로세스 풀 (실패하면 None → 스레드 OCR).
+    fork 하므로 QApplication·스레드·시리얼 포트·torch 보다 먼저, 진입점 맨 앞에서 부른다.
+    (ultralytics 는 DetectorThread.run 에서야 import 한다)
+    """
+    try:
+        return OcrPool(OCR_WORKERS)
+    except Exception as e:
+        print(f"[WARN] OCR pool start failed: {e} -> in-process OCR threads")
+        return None
+
+
 def main():
+    pool = start_ocr_pool()
     app = QApplication(sys.argv)
-    w = MainWindow()
+    w = MainWindow(pool)
     w.setWindowTitle("Parking Management System")
     w.show()
     sys.exit(app.exec())
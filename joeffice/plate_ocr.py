@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+번호판 크롭 OCR (교체 가능한 엔진) + OCR 작업 프로세스 풀.
+
+주차 화면(iot_project_parking.py)의 탐지 스레드는 크롭을 OcrPool.submit 으로 넘기기만 하고,
+OCR 은 작업 프로세스에서 돈다. 크롭 픽셀은 공유 메모리 슬롯으로 건너가고(피클 없음)
+결과(검증된 번호판)는 get_result 로 비동기로 돌아온다.
+OCR 엔진은 OCR_BACKEND 로 고르고, 작업 프로세스(스레드)마다 한 번 만들어 계속 쓴다.
+이 모듈은 Qt/YOLO 를 import 하지 않는다 (작업 프로세스가 가볍게 뜨도록).
+"""
+
+import os, re, signal, threading, time
+import multiprocessing as mp
+from collections import deque
+from multiprocessing import shared_memory
+import queue
+
+import cv2
+import numpy as np
+
+# ================== OCR 설정 ==================
+# "tesserocr"  : Tesseract C API 바인딩 — 엔진을 한 번 올려 두고 크롭마다 SetImage (프로세스 생성 없음)
+# "paddle"     : PaddleOCR 인식 모델만(det 없이) — 크롭이 이미 번호판이므로
+# "pytesseract": 크롭마다 tesseract 실행 파일을 띄움 (예전 방식, 비교/대체용)
+# 고른 엔진을 못 쓰면 pytesseract 로 내려간다.
+OCR_BACKEND = "tesserocr"
+OCR_BACKENDS = ("tesserocr", "paddle", "pytesseract")
+
+TESSERACT_BIN = "/usr/bin/tesseract"
+PADDLE_LANG = "korean"
+
+WHITELIST = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ가나다라마바사아자차카타파하허호무부거너더러머버서어저고노도로모보소오조우배국합육공하허호음임"
+PLATE_PATTERN = re.compile(r"\b\d{2,3}[가-힣]\d{4}\b")
+
+# ================== 작업 프로세스 풀 설정 ==================
+OCR_SLOTS_PER_WORKER = 2      # 작업 프로세스당 동시에 맡길 수 있는 크롭 수 (= 진행 중 상한)
+OCR_SLOT_BYTES = 1 << 20      # 공유 메모리 슬롯 크기 (이보다 큰 크롭은 줄여서 보냄)
+
+# ================== OCR 유틸 ==================
+def preprocess_for_ocr(crop_bgr):
+    if crop_bgr is None or crop_bgr.size == 0: return None
+    gray = cv2.cvtColor(crop_bgr, cv2.COLOR_BGR2GRAY)
+    scale = 3.0 if max(crop_bgr.shape[:2]) < 200 else 2.0
+    resized = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+    _, th = cv2.threshold(resized, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    th = cv2.morphologyEx(th, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (2,2)), 1)
+    return th
+
+def normalize_text(s:str)->str:
+    return re.sub(r"[^0-9A-Z가-힣]", "", s.strip().upper())
+
+def validate_plate(text:str)->str|None:
+    m = PLATE_PATTERN.search(text) if text else None
+    return m.group(0) if m else None
+
+def pick_tess_lang(langs) -> str:
+    langs = set(langs)
+    if "kor" in langs and "eng" in langs: return "kor+eng"
+    if "kor" in langs: return "kor"
+    return "eng"
+
+# ================== OCR 엔진 ==================
+class OcrBackend:
+    """엔진 핸들을 생성자에서 한 번 만들고 read(크롭 BGR) -> (원문 텍스트, 신뢰도 0~1) 를 반복 호출한다."""
+    name = ""
+
+    def read(self, crop_bgr) -> tuple[str, float]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PytesseractBackend(OcrBackend):
+    name = "pytesseract"
+
+    def __init__(self):
+        import pytesseract
+        self._pt = pytesseract
+        if os.path.exists(TESSERACT_BIN):
+            pytesseract.pytesseract.tesseract_cmd = TESSERACT_BIN
+        else:
+            print(f"[WARN] Tesseract not found at {TESSERACT_BIN}. Adjust path if needed.")
+        try:
+            self.lang = pick_tess_lang(pytesseract.get_languages(config=""))
+        except Exception as e:
+            print(f"[WARN] get_languages failed: {e} -> fallback to 'eng'")
+            self.lang = "eng"
+        self.config = (f'--oem 1 --psm 7 --dpi 300 '
+                       f'-c tessedit_char_whitelist={WHITELIST} '
+                       f'-c preserve_interword_spaces=1')
+
+    def read(self, crop_bgr) -> tuple[str, float]:
+        img = preprocess_for_ocr(crop_bgr)
+        if img is None: return "", 0.0
+        # image_to_string 대신 image_to_data: 같은 1회 실행으로 단어별 신뢰도까지
+        d = self._pt.image_to_data(img, lang=self.lang, config=self.config, output_type=self._pt.Output.DICT)
+        words = [(w, float(c)) for w, c in zip(d["text"], d["conf"]) if w.strip() and float(c) >= 0]
+        if not words: return "", 0.0
+        return " ".join(w for w, _ in words), sum(c for _, c in words) / len(words) / 100.0
+
+
+class TesserocrBackend(OcrBackend):
+    name = "tesserocr"
+
+    def __init__(self):
+        import tesserocr
+        path, langs = tesserocr.get_languages()
+        self.lang = pick_tess_lang(langs)
+        self.api = tesserocr.PyTessBaseAPI(path=path, lang=self.lang,
+                                           psm=tesserocr.PSM.SINGLE_LINE, oem=tesserocr.OEM.LSTM_ONLY)
+        self.api.SetVariable("tessedit_char_whitelist", WHITELIST)
+        self.api.SetVariable("preserve_interword_spaces", "1")
+        self.api.SetVariable("user_defined_dpi", "300")
+
+    def read(self, crop_bgr) -> tuple[str, float]:
+        img = preprocess_for_ocr(crop_bgr)
+        if img is None: return "", 0.0
+        img = np.ascontiguousarray(img)
+        h, w = img.shape
+        self.api.SetImageBytes(img.tobytes(), w, h, 1, w)
+        return self.api.GetUTF8Text(), self.api.MeanTextConf() / 100.0
+
+    def close(self):
+        self.api.End()
+
+
+class PaddleBackend(OcrBackend):
+    name = "paddle"
+
+    def __init__(self):
+        from paddleocr import PaddleOCR
+        self.ocr = PaddleOCR(lang=PADDLE_LANG, use_angle_cls=False, show_log=False)
+
+    def read(self, crop_bgr) -> tuple[str, float]:
+        if crop_bgr is None or crop_bgr.size == 0: return "", 0.0
+        res = self.ocr.ocr(crop_bgr, det=False, cls=False)   # [[(text, score)]]
+        hits = [(text, float(score)) for line in (res or []) for text, score in (line or [])]
+        if not hits: return "", 0.0
+        return "".join(t for t, _ in hits), min(c for _, c in hits)
+
+
+def make_backend(name: str | None = None, fallback: bool = True) -> OcrBackend:
+    name = name or OCR_BACKEND
+    cls = {"tesserocr": TesserocrBackend, "paddle": PaddleBackend, "pytesseract": PytesseractBackend}[name]
+    t0 = time.perf_counter()
+    try:
+        backend = cls()
+    except Exception as e:
+        if name == "pytesseract" or not fallback:
+            raise
+        print(f"[WARN] OCR backend '{name}' unavailable: {e} -> pytesseract")
+        return make_backend("pytesseract")
+    print(f"[INFO] OCR backend: {backend.name}"
+          + (f" ({backend.lang})" if hasattr(backend, "lang") else "")
+          + f", loaded in {time.perf_counter() - t0:.2f}s")
+    return backend
+
+
+# 프로세스(fork 후엔 새로)·스레드마다 엔진 하나 — tesserocr 핸들은 스레드 간 공유 불가
+_local = threading.local()
+
+def get_backend() -> OcrBackend:
+    b = getattr(_local, "backend", None)
+    if b is None or _local.pid != os.getpid():
+        _local.backend, _local.pid = make_backend(), os.getpid()
+    return _local.backend
+
+
+def read_plate(crop_bgr, backend: OcrBackend | None = None) -> tuple[str, float]:
+    """(검증된 번호판 | "", 엔진 신뢰도 0~1)"""
+    backend = backend or get_backend()
+    try:
+        raw, conf = backend.read(crop_bgr)
+    except Exception as e:
+        print(f"[OCR] {backend.name}: {e}")
+        return "", 0.0
+    clean = normalize_text(raw)
+    valid = validate_plate(clean)
+    return (valid, max(0.0, min(1.0, conf))) if valid else ("", 0.0)
+
+def ocr_plate(crop_bgr, backend: OcrBackend | None = None)->str:
+    return read_plate(crop_bgr, backend)[0]
+
+# ================== OCR 작업 프로세스 풀 ==================
+def _ocr_worker(shm, slot_bytes, tasks, results):
+    """작업 프로세스 본체: (job_id, slot, shape) 를 받아 슬롯의 크롭을 OCR 하고 결과를 돌려준다."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)   # Ctrl+C 는 부모가 정리
+    get_backend()   # 엔진은 작업 프로세스마다 한 번만 (첫 크롭이 로딩을 기다리지 않게 미리)
+    while True:
+        job = tasks.get()
+        if job is None:
+            break
+        job_id, slot, shape = job
+        crop = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+        t0 = time.perf_counter()
+        try:
+            plate, conf = read_plate(crop)
+        except Exception as e:
+            print(f"[OCR] worker: {e}")
+            plate, conf = "", 0.0
+        del crop   # 슬롯 뷰를 놓아야 부모가 슬롯을 다시 쓴다
+        results.put((job_id, plate, conf, time.perf_counter() - t0))
+
+
+class OcrPool:
+    """
+    OCR 작업 프로세스 workers 개 + 공유 메모리 슬롯 workers*OCR_SLOTS_PER_WORKER 개.
+    - acquire_slot(timeout): 빈 슬롯 번호 (없으면 None) — 진행 중 크롭 수를 슬롯 수로 묶는 backpressure
+    - submit(slot, crop, meta): 크롭을 슬롯에 복사해 가장 한가한 작업 프로세스의 큐로
+    - get_result(timeout): (meta, plate, 신뢰도, ocr 초) — 결과를 꺼내면 슬롯이 반환된다
+    - reap(): 죽은 작업 프로세스(세그폴트/OOM kill)를 정리하고, 그 프로세스가 들고 있던 작업의 meta 목록을 돌려준다
+      (슬롯은 회수). 살아 있는 프로세스가 하나도 없으면 alive() 가 False.
+    작업을 프로세스별 큐로 나눠 주므로 어느 프로세스가 어떤 작업을 들고 있었는지 안다.
+    죽은 프로세스는 다시 띄우지 않는다 (스레드가 도는 중의 fork 는 안전하지 않음) — 호출 측이 대신 처리.
+    fork 로 띄우므로 진입점 맨 앞(QApplication·스레드·시리얼 포트·torch 보다 먼저)에서 한 번 만들고 close() 로 정리한다.
+    감지 스레드가 다시 시작돼도 같은 풀을 쓰므로 meta 에 세대 번호를 넣어 이전 결과를 가려낸다.
+    """
+
+    def __init__(self, workers: int, slots_per_worker: int = OCR_SLOTS_PER_WORKER, slot_bytes: int = OCR_SLOT_BYTES):
+        ctx = mp.get_context("fork")   # spawn 은 주차 화면 스크립트(YOLO/UI)를 작업 프로세스마다 다시 import 한다
+        self.slot_bytes = slot_bytes
+        n_slots = workers * slots_per_worker
+        self.shm = shared_memory.SharedMemory(create=True, size=n_slots * slot_bytes)
+        self._tasks = [ctx.Queue() for _ in range(workers)]
+        self._results = ctx.Queue()
+        self._free = deque(range(n_slots))
+        self._cv = threading.Condition()
+        self._jobs = {}        # job_id -> (slot, meta, 작업 프로세스 번호)
+        self._load = [0] * workers   # 작업 프로세스별 진행 중 작업 수
+        self._dead = set()     # 정리된(죽은) 작업 프로세스 번호
+        self._next_id = 0
+        self.submitted = 0
+        self.shrunk = 0        # 슬롯보다 커서 줄여 보낸 크롭 수
+        self.lost = 0          # 작업 프로세스가 죽어 잃은 작업 수
+        self.procs = [
+            ctx.Process(target=_ocr_worker, args=(self.shm, slot_bytes, self._tasks[i], self._results),
+                        name=f"ocr{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for p in self.procs:
+            p.start()
+        print(f"[OCR] pool: {workers} workers, {n_slots} slots x {slot_bytes >> 10}KiB")
+
+    def acquire_slot(self, timeout: float):
+        with self._cv:
+            if not self._free:
+                self._cv.wait(timeout)
+            return self._free.popleft() if self._free else None
+
+    def release_slot(self, slot: int):
+        with self._cv:
+            self._free.append(slot)
+            self._cv.notify()
+
+    def in_flight(self) -> int:
+        with self._cv:
+            return len(self._jobs)
+
+    def submit(self, slot: int, crop, meta):
+        if crop.nbytes > self.slot_bytes:
+            f = (self.slot_bytes / crop.nbytes) ** 0.5 * 0.99
+            crop = cv2.resize(crop, None, fx=f, fy=f, interpolation=cv2.INTER_AREA)
+            self.shrunk += 1
+        crop = np.ascontiguousarray(crop, dtype=np.uint8)
+        dst = np.ndarray(crop.shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+        dst[...] = crop
+        del dst
+        with self._cv:
+            live = [i for i, p in enumerate(self.procs) if i not in self._dead and p.is_alive()]
+            w = min(live, key=lambda i: self._load[i]) if live else 0   # 전부 죽었으면 다음 reap 에서 실패 처리
+            job_id = self._next_id
+            self._next_id += 1
+            self._jobs[job_id] = (slot, meta, w)
+            self._load[w] += 1
+            self.submitted += 1
+        self._tasks[w].put((job_id, slot, crop.shape))
+
+    def get_result(self, timeout: float):
+        try:
+            job_id, plate, conf, secs = self._results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with self._cv:
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                return None   # reap 이 이미 실패 처리한 작업 (죽기 직전에 낸 결과)
+            slot, meta, w = job
+            self._load[w] -= 1
+        self.release_slot(slot)
+        return meta, plate, conf, secs
+
+    def reap(self) -> list:
+        """죽은 작업 프로세스를 정리: 들고 있던 작업을 실패로 빼고 슬롯을 돌려받는다. 실패한 작업의 meta 목록."""
+        failed = []
+        with self._cv:
+            for i, p in enumerate(self.procs):
+                if i not in self._dead and not p.is_alive():
+                    self._dead.add(i)
+                    print(f"[OCR][ERROR] worker {p.name} died (exitcode {p.exitcode}), "
+                          f"{len(self.procs) - len(self._dead)} workers left")
+            # 죽은 프로세스 몫 (죽은 뒤에 들어간 작업 포함)
+            for job_id in [j for j, (_, _, w) in self._jobs.items() if w in self._dead]:
+                slot, meta, w = self._jobs.pop(job_id)
+                self._load[w] -= 1
+                self._free.append(slot)
+                failed.append(meta)
+            if failed:
+                self.lost += len(failed)
+                self._cv.notify_all()
+                print(f"[OCR][ERROR] {len(failed)} jobs lost with dead workers (slots reclaimed)")
+        return failed
+
+    def alive(self) -> bool:
+        """작업을 받을 작업 프로세스가 하나라도 남아 있는지."""
+        return any(p.is_alive() for p in self.procs)
+
+    def close(self):
+        for q, p in zip(self._tasks, self.procs):
+            if p.is_alive():
+                q.put(None)
+        for p in self.procs:
+            p.join(timeout=2.0)
+            if p.is_alive():
+                p.terminate()
+        for q in self._tasks:
+            q.close()
+        self._results.close()
+        self.shm.close()
+        self.shm.unlink()